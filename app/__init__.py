@@ -1,4 +1,4 @@
-from flask import Flask, g
+from flask import Flask, jsonify
 from flask_cors import CORS
 from app.config import Config
 from app.extensions import init_extensions, jwt
@@ -6,24 +6,14 @@ from app.blacklist import is_token_blacklisted
 from app.routes.auth import auth_bp
 from app.routes.api import api_bp
 from app.routes.employee import employee_bp
+from app.routes.employee_async import employee_async_bp
 from app.routes.analytics import analytics_bp
-
-# from app.db import get_db_for_org
-# from app.models.user import get_user_by_email
-
-# Workaround for verify_jwt_in_request_optional with success flag
-try:
-    from flask_jwt_extended import verify_jwt_in_request_optional, get_jwt_identity
-except ImportError:
-    from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
-    from flask_jwt_extended.exceptions import NoAuthorizationError
-
-    def verify_jwt_in_request_optional():
-        try:
-            verify_jwt_in_request()
-            return True
-        except NoAuthorizationError:
-            return False
+from app.routes.metrics import metrics_bp
+from app.services import versions
+from app.services.hashing import HashingBusy
+from app.utils.metrics import metrics
+from app.utils.profiler import RequestProfiler
+from app.commands import register_commands
 
 
 def create_app():
@@ -36,7 +26,20 @@ def create_app():
         supports_credentials=True,
     )
 
+    # Registered first so the timing covers the other request hooks.
+    if Config.METRICS_ENABLED:
+        metrics.init_app(app)
+    if Config.PROFILE_SAMPLE_RATE or Config.PROFILE_HEADER_ENABLED:
+        app.extensions["profiler"] = RequestProfiler(
+            sample_rate=Config.PROFILE_SAMPLE_RATE,
+            interval=Config.PROFILE_INTERVAL,
+            output_dir=Config.PROFILE_DIR,
+            header=Config.PROFILE_HEADER if Config.PROFILE_HEADER_ENABLED else None,
+            secret_key=Config.SECRET_KEY,
+        )
+        app.extensions["profiler"].init_app(app, Config.PROFILE_TOKEN_MAX_AGE)
     init_extensions(app)
+    versions.init_app(app)
 
     @jwt.token_in_blocklist_loader
     def check_if_token_revoked(jwt_header, jwt_payload):
@@ -45,31 +48,19 @@ def create_app():
 
     app.register_blueprint(auth_bp, url_prefix="/auth")
     app.register_blueprint(api_bp, url_prefix="/api")
-    app.register_blueprint(employee_bp, url_prefix="/employee")
+    app.register_blueprint(
+        employee_async_bp if Config.EMPLOYEE_ASYNC else employee_bp,
+        url_prefix="/employee",
+    )
     app.register_blueprint(analytics_bp)
+    if Config.METRICS_ENABLED:
+        app.register_blueprint(metrics_bp)
+    register_commands(app)
 
-    # @app.before_request
-    # def set_org_db():
-    #     jwt_verified = verify_jwt_in_request_optional()
-    #     if not jwt_verified:
-    #         # No valid JWT found; do not call get_jwt_identity
-    #         g.org_id = None
-    #         g.db = None
-    #         return
-
-    #     identity = get_jwt_identity()
-    #     if not identity:
-    #         g.org_id = None
-    #         g.db = None
-    #         return
-
-    #     user = get_user_by_email(identity)
-    #     if not user:
-    #         g.org_id = None
-    #         g.db = None
-    #         return
-
-    #     g.org_id = user["org_id"]
-    #     g.db = get_db_for_org(g.org_id)
+    @app.errorhandler(HashingBusy)
+    def handle_hashing_busy(e):
+        response = jsonify({"msg": "Server busy, please retry"})
+        response.headers["Retry-After"] = "1"
+        return response, 503
 
     return app
@@ -1,9 +1,134 @@
+import os
+import threading
+import time
+
+from app.config import Config
 from app.extensions import redis_blacklist
+from app.utils.bloom import BloomFilter
+
+# Pub/sub channel announcing each revoked JTI to every worker.
+BLACKLIST_CHANNEL = "BLACKLIST_EVENTS"
+# Sorted set of revoked JTIs scored by revocation time, for delta pulls.
+BLACKLIST_LOG = "BLACKLIST_LOG"
+# Seconds of overlap between delta pulls, to absorb clock skew between hosts.
+SYNC_OVERLAP = 60
+
+
+class RevocationFilter:
+    """In-process Bloom filter of revoked JTIs, kept in sync with Redis.
+
+    A background thread per process listens on BLACKLIST_CHANNEL and pulls
+    BLACKLIST_LOG deltas every `sync_interval` seconds. While the last pull is
+    younger than `max_staleness`, a JTI that is not in the filter is known not
+    to be revoked; anything else falls through to Redis.
+    """
+
+    def __init__(self, capacity, sync_interval, max_staleness, rebuild_interval):
+        self.capacity = capacity
+        self.sync_interval = sync_interval
+        self.max_staleness = max_staleness
+        self.rebuild_interval = rebuild_interval
+        self._bloom = BloomFilter(capacity)
+        self._pulled_until = 0.0
+        self._last_sync = 0.0
+        self._last_rebuild = 0.0
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def is_fresh(self):
+        return time.monotonic() - self._last_sync < self.max_staleness
+
+    def might_contain(self, jti):
+        return jti in self._bloom
+
+    def add(self, jti):
+        self._bloom.add(jti)
+
+    def ensure_started(self):
+        # Threads do not survive fork, so each worker process starts its own.
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._last_sync = 0.0
+            threading.Thread(
+                target=self._run, name="revocation-filter", daemon=True
+            ).start()
+
+    def rebuild(self):
+        now = time.time()
+        redis_blacklist.zremrangebyscore(
+            BLACKLIST_LOG, "-inf", now - Config.JWT_REFRESH_TOKEN_EXPIRES
+        )
+        bloom = BloomFilter(self.capacity)
+        for jti in redis_blacklist.zrangebyscore(BLACKLIST_LOG, "-inf", "+inf"):
+            bloom.add(jti.decode() if isinstance(jti, bytes) else jti)
+        self._bloom = bloom
+        self._pulled_until = now
+        self._last_rebuild = self._last_sync = time.monotonic()
+
+    def sync(self):
+        now = time.time()
+        delta = redis_blacklist.zrangebyscore(
+            BLACKLIST_LOG, self._pulled_until - SYNC_OVERLAP, "+inf"
+        )
+        for jti in delta:
+            self.add(jti.decode() if isinstance(jti, bytes) else jti)
+        self._pulled_until = now
+        self._last_sync = time.monotonic()
+
+    def _run(self):
+        pubsub = None
+        while True:
+            try:
+                if pubsub is None:
+                    pubsub = redis_blacklist.pubsub(ignore_subscribe_messages=True)
+                    pubsub.subscribe(BLACKLIST_CHANNEL)
+                    self.rebuild()
+                deadline = time.monotonic() + self.sync_interval
+                while time.monotonic() < deadline:
+                    message = pubsub.get_message(timeout=self.sync_interval)
+                    if message and message["type"] == "message":
+                        data = message["data"]
+                        self.add(data.decode() if isinstance(data, bytes) else data)
+                if time.monotonic() - self._last_rebuild >= self.rebuild_interval:
+                    self.rebuild()
+                else:
+                    self.sync()
+            except Exception as e:
+                # Stop answering locally until a pull succeeds again.
+                print(f"Revocation filter sync failed: {e}")
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+                pubsub = None
+                time.sleep(self.sync_interval)
+
+
+revocation_filter = RevocationFilter(
+    capacity=Config.REVOCATION_FILTER_CAPACITY,
+    sync_interval=Config.REVOCATION_SYNC_INTERVAL,
+    max_staleness=Config.REVOCATION_MAX_STALENESS,
+    rebuild_interval=Config.REVOCATION_REBUILD_INTERVAL,
+)
 
 
 def is_token_blacklisted(jti):
+    if Config.REVOCATION_FILTER_ENABLED:
+        revocation_filter.ensure_started()
+        if revocation_filter.is_fresh() and not revocation_filter.might_contain(jti):
+            return False
     return redis_blacklist.get(f"BLACKLISTED:{jti}") is not None
 
 
 def add_to_blacklist(jti, token_type, expiration_seconds):
-    redis_blacklist.setex(f"BLACKLISTED:{jti}", expiration_seconds, token_type)
+    pipe = redis_blacklist.pipeline()
+    pipe.setex(f"BLACKLISTED:{jti}", expiration_seconds, token_type)
+    pipe.zadd(BLACKLIST_LOG, {jti: time.time()})
+    pipe.publish(BLACKLIST_CHANNEL, jti)
+    pipe.execute()
+    revocation_filter.add(jti)
@@ -0,0 +1,91 @@
+from datetime import datetime
+
+import click
+
+from app.services import analytics, versions
+from app.services.allocation import (
+    DEFAULT_END_TIME,
+    DEFAULT_START_TIME,
+    DeskAllocator,
+)
+from app.storage.repositories import bookings
+from app.utils.bulk_import import BATCH_SIZE
+from app.utils.dates import DATE_FORMAT, booking_timestamps, tomorrow_str
+
+
+def register_commands(app):
+    @app.cli.command("backfill-booking-dates")
+    @click.argument("org_ids", nargs=-1, required=True)
+    def backfill_booking_dates(org_ids):
+        """Partition pre-existing bookings by date.
+
+        Bookings written before the date field existed get date, start_at and
+        end_at derived from their creation timestamp.
+        """
+        for org_id in org_ids:
+            pending, updated, skipped = [], 0, 0
+            for doc in bookings.missing_date(org_id):
+                data = doc.to_dict()
+                created = data.get("timestamp")
+                if not isinstance(created, datetime):
+                    skipped += 1
+                    continue
+                date_str = created.strftime(DATE_FORMAT)
+                try:
+                    start_at, end_at = booking_timestamps(
+                        date_str, data["start_time"], data["end_time"]
+                    )
+                except (KeyError, ValueError):
+                    skipped += 1
+                    continue
+                pending.append(
+                    (doc.id, {"date": date_str, "start_at": start_at, "end_at": end_at})
+                )
+                if len(pending) == BATCH_SIZE:
+                    bookings.set_many(org_id, pending, merge=True)
+                    updated += len(pending)
+                    pending = []
+            if pending:
+                bookings.set_many(org_id, pending, merge=True)
+                updated += len(pending)
+            if updated:
+                versions.bump(org_id)
+            click.echo(f"{org_id}: {updated} bookings backfilled, {skipped} skipped")
+
+    @app.cli.command("allocate-desks")
+    @click.argument("org_ids", nargs=-1, required=True)
+    @click.option("--date", "date_str", help="YYYY-MM-DD, defaults to tomorrow.")
+    @click.option("--start-time", default=DEFAULT_START_TIME, show_default=True)
+    @click.option("--end-time", default=DEFAULT_END_TIME, show_default=True)
+    @click.option("--dry-run", is_flag=True, help="Print the plan only.")
+    def allocate_desks(org_ids, date_str, start_time, end_time, dry_run):
+        """Assign desks to every in-office employee without a booking."""
+        date_str = date_str or tomorrow_str()
+        for org_id in org_ids:
+            allocator = DeskAllocator(org_id, date_str, start_time, end_time)
+            plan = allocator.plan()
+            if not dry_run:
+                allocator.commit(plan["assigned"])
+            click.echo(
+                f"{org_id} {date_str}: {len(plan['assigned'])} assigned, "
+                f"{len(plan['unassigned'])} without a desk, "
+                f"{plan['already_booked']} already booked"
+            )
+
+    @app.cli.command("rebuild-analytics")
+    @click.argument("org_ids", nargs=-1, required=True)
+    @click.option("--from", "start_date", help="First day to rebuild, YYYY-MM-DD.")
+    @click.option("--to", "end_date", help="Last day to rebuild, YYYY-MM-DD.")
+    def rebuild_analytics(org_ids, start_date, end_date):
+        """Recompute analytics rollups from bookings, visitors and attendance."""
+        for org_id in org_ids:
+            written = analytics.rebuild(org_id, start_date, end_date)
+            click.echo(f"{org_id}: {written} daily rollups rebuilt")
+
+    @app.cli.command("profile-token")
+    def profile_token():
+        """Print a header that makes the server profile a request."""
+        profiler = app.extensions.get("profiler")
+        if profiler is None or profiler.header is None:
+            raise click.ClickException("Set PROFILE_HEADER_ENABLED=1 first")
+        click.echo(f"{profiler.header}: {profiler.token()}")
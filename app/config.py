@@ -19,8 +19,30 @@ class Config:
     REDIS_DB_LIMITER = 0
     REDIS_DB_BLACKLIST = 1
     REDIS_DB_OTP = 2
+    REDIS_DB_VERSIONS = 3
+    # Connections per Redis DB pool, shared by every client of that DB
+    REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+    # Seconds to wait for a free pooled connection before failing
+    REDIS_POOL_TIMEOUT = 5
+    # Ping connections idle for longer than this before reusing them
+    REDIS_HEALTH_CHECK_INTERVAL = 30
+    REDIS_SOCKET_TIMEOUT = 5
+    # Limit applied to every route without its own @limiter.limit
+    DEFAULT_RATE_LIMIT = "1000 per hour"
+    # "strict": every request increments the limit in Redis.
+    # "hybrid": the default limit is checked against in-process token buckets
+    # reconciled with Redis in batches; /auth/* stays strict.
+    RATELIMIT_MODE = os.getenv("RATELIMIT_MODE", "hybrid")
+    # Seconds between batched pushes of locally counted hits to Redis
+    RATELIMIT_SYNC_INTERVAL = 2
+    # Unreported hits per client per worker that force an early push
+    RATELIMIT_MAX_DRIFT = int(os.getenv("RATELIMIT_MAX_DRIFT", 50))
     # OTP expiration in seconds (1 minutes)
     OTP_TTL = 60
+    # Seconds a registration (org_id, verified flag) stays pending in Redis
+    REGISTRATION_TTL = 300
+    # Wrong OTPs accepted before the pending registration is dropped
+    OTP_MAX_ATTEMPTS = 5
     JWT_TOKEN_LOCATION = ["headers", "cookies"]
     JWT_COOKIE_SECURE = False  # TODO Change to True for production
     JWT_COOKIE_SAMESITE = "Lax"
@@ -29,3 +51,64 @@ class Config:
     EMAIL_PORT = os.getenv("EMAIL_PORT")
     EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
     EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
+    EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "1") == "1"
+    # Background mail dispatcher: messages per SMTP batch, delivery attempts,
+    # base retry backoff and idle seconds before the SMTP session is closed
+    EMAIL_BATCH_SIZE = 50
+    EMAIL_MAX_RETRIES = 5
+    EMAIL_RETRY_BACKOFF = 2
+    EMAIL_IDLE_TIMEOUT = 60
+    EMAIL_MAX_QUEUE = 10_000
+    # Document store behind app.storage: "firestore" or "memory" (local stand-in)
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "firestore")
+    # Simulated round trip (ms) per call to the memory backend, for benchmarks
+    MEMORY_STORE_LATENCY_MS = float(os.getenv("MEMORY_STORE_LATENCY_MS", 0))
+    # Serve /employee from the concurrent-read blueprint: the reads within a
+    # request overlap; requests per worker are still bounded by its threads
+    EMPLOYEE_ASYNC = os.getenv("EMPLOYEE_ASYNC", "0") == "1"
+    # Service account key for the Firestore backend, read on first use
+    FIREBASE_CREDENTIALS = os.getenv(
+        "FIREBASE_CREDENTIALS", "firebase_credentials.json"
+    )
+    # bcrypt process pool; 0 workers hashes inline on the request thread
+    HASH_WORKERS = int(os.getenv("HASH_WORKERS", os.cpu_count() or 1))
+    # Hashing jobs allowed to be queued or running before callers wait
+    HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", 4 * HASH_WORKERS or 4))
+    # Seconds to wait for a hashing slot before answering 503
+    HASH_QUEUE_TIMEOUT = float(os.getenv("HASH_QUEUE_TIMEOUT", 2))
+    # Local Bloom filter in front of the Redis JWT blacklist
+    REVOCATION_FILTER_ENABLED = os.getenv("REVOCATION_FILTER_ENABLED", "1") == "1"
+    REVOCATION_FILTER_CAPACITY = 100_000
+    # Seconds between delta pulls of revoked JTIs from Redis
+    REVOCATION_SYNC_INTERVAL = 5
+    # Fall back to Redis when the last successful pull is older than this
+    REVOCATION_MAX_STALENESS = 30
+    # Rebuild the filter from scratch (dropping expired JTIs) this often
+    REVOCATION_REBUILD_INTERVAL = 3600
+    # email -> emp_id lookups cached in process (seconds / entries)
+    EMP_ID_CACHE_TTL = 600
+    EMP_ID_CACHE_MAX_ENTRIES = 50_000
+    # Tier for orgs and employees without one on their document
+    DEFAULT_TIER = os.getenv("DEFAULT_TIER", "free")
+    # Resolved tier/tools per (org_id, email) cached in process (seconds / entries)
+    ENTITLEMENT_CACHE_TTL = 300
+    ENTITLEMENT_CACHE_MAX_ENTRIES = 50_000
+    # Seconds between analytics rollup recomputations of changed days
+    ANALYTICS_FLUSH_INTERVAL = 5
+    # Per-route latency and Firestore/Redis call counts, served on /metrics.
+    # Off by default: the endpoint exposes per-route and per-org internals.
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0") == "1"
+    # When set, /metrics requires "Authorization: Bearer <METRICS_TOKEN>";
+    # set it whenever /metrics is reachable from outside the deployment
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+    # Sampling profiler: fraction of requests profiled (0 disables sampling)
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+    # Also profile requests carrying a token from `flask profile-token`
+    PROFILE_HEADER_ENABLED = os.getenv("PROFILE_HEADER_ENABLED", "0") == "1"
+    PROFILE_HEADER = "X-Profile-Token"
+    # Seconds a profile token stays valid
+    PROFILE_TOKEN_MAX_AGE = 3600
+    # Seconds between stack samples of a profiled request
+    PROFILE_INTERVAL = 0.001
+    # Collapsed-stack files, one per endpoint, are appended here
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
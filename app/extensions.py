@@ -1,22 +1,57 @@
+from flask import request
 from flask_jwt_extended import JWTManager
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_redis import FlaskRedis
 from app.config import Config
+from app.utils.hybrid_rate_limit import HybridRateLimiter
+from app.utils.redis_pools import PooledRedis, redis_pools
+
+STRICT_RATELIMIT_BLUEPRINTS = ("auth",)
+# Scraped by monitoring at a fixed rate; never rate limited.
+EXEMPT_RATELIMIT_BLUEPRINTS = ("metrics",)
+
+
+def _default_limit_exempt():
+    # In hybrid mode hybrid_limiter enforces the default limit off Redis.
+    if request.blueprint in EXEMPT_RATELIMIT_BLUEPRINTS:
+        return True
+    return (
+        Config.RATELIMIT_MODE == "hybrid"
+        and request.blueprint not in STRICT_RATELIMIT_BLUEPRINTS
+    )
+
 
 jwt = JWTManager()
 limiter = Limiter(
     key_func=get_remote_address,
-    default_limits=["1000 per hour"],
+    default_limits=[Config.DEFAULT_RATE_LIMIT],
+    default_limits_exempt_when=_default_limit_exempt,
     storage_uri=Config.REDIS_URL + "/" + str(Config.REDIS_DB_LIMITER),
+    storage_options={"connection_pool": redis_pools.get(Config.REDIS_DB_LIMITER)},
     strategy="fixed-window",
 )
-redis_blacklist = FlaskRedis()
-redis_otp = FlaskRedis()
+hybrid_limiter = HybridRateLimiter(
+    Config.DEFAULT_RATE_LIMIT,
+    key_func=get_remote_address,
+    sync_interval=Config.RATELIMIT_SYNC_INTERVAL,
+    max_drift=Config.RATELIMIT_MAX_DRIFT,
+    pool=redis_pools.get(Config.REDIS_DB_LIMITER),
+)
+redis_blacklist = FlaskRedis.from_custom_provider(PooledRedis)
+redis_otp = FlaskRedis.from_custom_provider(PooledRedis)
+redis_versions = FlaskRedis.from_custom_provider(PooledRedis)
 
 
 def init_extensions(app):
     jwt.init_app(app)
     limiter.init_app(app)
+    if Config.RATELIMIT_MODE == "hybrid":
+        hybrid_limiter.init_app(
+            app,
+            is_enabled=lambda: limiter.enabled,
+            skip_blueprints=STRICT_RATELIMIT_BLUEPRINTS + EXEMPT_RATELIMIT_BLUEPRINTS,
+        )
     redis_blacklist.init_app(app, db=Config.REDIS_DB_BLACKLIST)
     redis_otp.init_app(app, db=Config.REDIS_DB_OTP)
+    redis_versions.init_app(app, db=Config.REDIS_DB_VERSIONS)
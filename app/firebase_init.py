@@ -1,6 +1,33 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
+"""Firestore client construction for get_db().
 
-cred = credentials.Certificate("firebase_credentials.json")
-firebase_admin.initialize_app(cred)
-db = firestore.client()
+Nothing here runs at import time. firebase_admin caches one Firestore
+client per app, and that client's gRPC channel would be inherited by
+every worker a pre-forking server forks off. So the client is built
+directly from the service account credentials, and get_db() calls
+create_client() once in each process. get_async_db() does the same with
+create_async_client().
+"""
+
+from app.config import Config
+
+
+def _certificate():
+    from firebase_admin import credentials
+
+    return credentials.Certificate(Config.FIREBASE_CREDENTIALS)
+
+
+def create_client():
+    from google.cloud import firestore
+
+    cert = _certificate()
+    return firestore.Client(credentials=cert.get_credential(), project=cert.project_id)
+
+
+def create_async_client():
+    from google.cloud import firestore
+
+    cert = _certificate()
+    return firestore.AsyncClient(
+        credentials=cert.get_credential(), project=cert.project_id
+    )
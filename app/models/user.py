@@ -1,80 +1,160 @@
 import sqlite3
-import bcrypt
+import threading
 import os
-
-DB_FILE = "./test/users.db"
-
-os.makedirs(os.path.dirname(DB_FILE), exist_ok=True)
+from app.services.hashing import hashing_pool
+
+DB_FILE = os.getenv("USERS_DB_FILE", "./test/users.db")
+
+os.makedirs(os.path.dirname(DB_FILE) or ".", exist_ok=True)
+
+# Statements are kept as module constants so each pooled connection's
+# statement cache reuses the same prepared statement for every call.
+SELECT_USER_BY_EMAIL = "SELECT * FROM users WHERE email = ?"
+INSERT_USER = """
+    INSERT INTO users (email, hashed_password, org_id)
+    VALUES (?, ?, ?)
+"""
+UPDATE_PASSWORD = """
+    UPDATE users
+    SET hashed_password = ?
+    WHERE email = ?
+"""
+UPDATE_EMP_ID = "UPDATE users SET emp_id = ? WHERE email = ?"
+
+
+class ConnectionManager:
+    """Per-thread SQLite connections for the user store.
+
+    Each thread keeps one read-write connection and one read-only connection
+    to the same WAL-mode database, so lookups never wait on the writer lock
+    and no call pays for connection setup after the first one. Connections
+    are tracked per process and reopened after a fork.
+    """
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _connect(self, read_only=False):
+        if read_only:
+            conn = sqlite3.connect(
+                f"file:{self.db_file}?mode=ro", uri=True, cached_statements=64
+            )
+        else:
+            conn = sqlite3.connect(self.db_file, cached_statements=64)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _connections(self):
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            local.pid = os.getpid()
+            local.writer = None
+            local.reader = None
+        return local
+
+    def writer(self):
+        local = self._connections()
+        if local.writer is None:
+            self.ensure_schema()
+            local.writer = self._connect()
+        return local.writer
+
+    def reader(self):
+        local = self._connections()
+        if local.reader is None:
+            self.ensure_schema()
+            local.reader = self._connect(read_only=True)
+        return local.reader
+
+    def ensure_schema(self):
+        if self._schema_ready:
+            return
+        with self._schema_lock:
+            if not self._schema_ready:
+                with sqlite3.connect(self.db_file) as conn:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS users (
+                            email TEXT PRIMARY KEY,
+                            hashed_password TEXT NOT NULL,
+                            org_id TEXT NOT NULL DEFAULT '',
+                            emp_id TEXT
+                        )
+                    """)
+                    # Databases created before emp_id was persisted here.
+                    columns = {
+                        row[1] for row in conn.execute("PRAGMA table_info(users)")
+                    }
+                    if "emp_id" not in columns:
+                        conn.execute("ALTER TABLE users ADD COLUMN emp_id TEXT")
+                self._schema_ready = True
+
+    def close(self):
+        local = self._connections()
+        for name in ("writer", "reader"):
+            conn = getattr(local, name)
+            if conn is not None:
+                conn.close()
+                setattr(local, name, None)
+
+
+connections = ConnectionManager(DB_FILE)
 
 
 def init_db():
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS users (
-                email TEXT PRIMARY KEY,
-                hashed_password TEXT NOT NULL,
-                org_id TEXT NOT NULL DEFAULT ''
-            )
-        """
-        )
-        conn.commit()
+    connections.ensure_schema()
 
 
 # Function to add a user
 def add_user(email, password, org_id):
-    hashed_password = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode(
-        "utf-8"
-    )
-
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-        try:
-            cursor.execute(
-                """
-                INSERT INTO users (email, hashed_password, org_id)
-                VALUES (?, ?, ?)
-            """,
-                (email, hashed_password, org_id),
-            )
-            conn.commit()
-        except sqlite3.IntegrityError:
-            print(f"User with email {email} already exists.")
+    add_user_hashed(email, hash_password(password), org_id)
+
+
+def hash_password(password):
+    return hashing_pool.hash_password(password)
+
+
+# Insert a user whose password was hashed with hash_password()
+def add_user_hashed(email, hashed_password, org_id):
+    conn = connections.writer()
+    try:
+        with conn:
+            conn.execute(INSERT_USER, (email, hashed_password, org_id))
+    except sqlite3.IntegrityError:
+        print(f"User with email {email} already exists.")
 
 
 # Function to get user by email
 def get_user_by_email(email):
-    with sqlite3.connect(DB_FILE) as conn:
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM users WHERE email = ?", (email,))
-        row = cursor.fetchone()
-        return dict(row) if row else None
+    row = connections.reader().execute(SELECT_USER_BY_EMAIL, (email,)).fetchone()
+    return dict(row) if row else None
 
 
 def check_password(hashed_password, password):
-    return bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8"))
+    return hashing_pool.check_password(hashed_password, password)
 
 
 # Function to update user's password
 def update_password(email, new_password):
-    hashed_password = bcrypt.hashpw(
-        new_password.encode("utf-8"), bcrypt.gensalt()
-    ).decode("utf-8")
-
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            UPDATE users
-            SET hashed_password = ?
-            WHERE email = ?
-            """,
-            (hashed_password, email),
-        )
-        conn.commit()
-        return cursor.rowcount > 0  # Returns True if password was updated
+    hashed_password = hashing_pool.hash_password(new_password)
+
+    conn = connections.writer()
+    with conn:
+        cursor = conn.execute(UPDATE_PASSWORD, (hashed_password, email))
+    return cursor.rowcount > 0  # Returns True if password was updated
+
+
+# Remember the Firestore emp_id so login does not have to look it up
+def set_emp_id(email, emp_id):
+    conn = connections.writer()
+    with conn:
+        conn.execute(UPDATE_EMP_ID, (emp_id, email))
 
 
 if __name__ == "__main__":
@@ -1,20 +1,91 @@
-from flask import Blueprint, jsonify
-from flask_jwt_extended import jwt_required
+from datetime import datetime, timedelta
+
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt
+from app.services.analytics import summarize
+from app.services.heatmap import (
+    MAX_RANGE_DAYS,
+    SLOT_MINUTES,
+    SLOTS_PER_DAY,
+    encode_bitmap,
+    heatmap_cache,
+)
+from app.storage.repositories import analytics_rollups
 from app.utils.access_control import requires_tier, requires_tool
+from app.utils.dates import DATE_FORMAT, parse_date
+from app.utils.enums import WorkspaceType
 
 analytics_bp = Blueprint('analytics', __name__)
 
+DEFAULT_WINDOW_DAYS = 30
+MAX_WINDOW_DAYS = 366
+
 
 @analytics_bp.route('/analytics/view', methods=['GET'])
 @jwt_required()
 @requires_tier('pro')
 @requires_tool('analytics')
 def view_analytics():
+    org_id = get_jwt().get('org_id')
+    end_date = request.args.get('to') or datetime.utcnow().strftime(DATE_FORMAT)
+    try:
+        end = parse_date(end_date)
+        start_date = request.args.get('from') or (
+            end - timedelta(days=DEFAULT_WINDOW_DAYS - 1)
+        ).strftime(DATE_FORMAT)
+        window = (end - parse_date(start_date)).days
+    except ValueError:
+        return jsonify({"msg": "Invalid date format, use YYYY-MM-DD"}), 400
+    if not 0 <= window < MAX_WINDOW_DAYS:
+        return jsonify({"msg": f"to must be within {MAX_WINDOW_DAYS} days after from"}), 400
+
+    days = [doc.to_dict() for doc in analytics_rollups.between(org_id, start_date, end_date)]
+    attendance_doc = analytics_rollups.get(org_id, analytics_rollups.attendance_doc_id)
+
     return jsonify({
         "msg": "Welcome to your analytics dashboard!",
         "data": {
-            "active_users": 128,
-            "usage_this_month": "24.6 hours",
-            "top_features": ["desk-allocation", "heatmaps"]
+            "from": start_date,
+            "to": end_date,
+            **summarize(days, attendance_doc.to_dict() if attendance_doc.exists else None),
         }
     })
+
+
+@analytics_bp.route('/analytics/heatmap', methods=['GET'])
+@jwt_required()
+@requires_tier('pro')
+@requires_tool('heatmaps')
+def view_heatmap():
+    """Occupancy bitmap: one row per workspace, one bit per slot per day.
+
+    Row r, day d, slot s is bit r * len(dates) * slots_per_day
+    + d * slots_per_day + s of the unpacked (MSB first) bitmap.
+    """
+    org_id = get_jwt().get('org_id')
+    start_date = request.args.get('from') or datetime.utcnow().strftime(DATE_FORMAT)
+    end_date = request.args.get('to') or start_date
+    ws_type = request.args.get('type')
+    try:
+        window = (parse_date(end_date) - parse_date(start_date)).days
+    except ValueError:
+        return jsonify({"msg": "Invalid date format, use YYYY-MM-DD"}), 400
+    if not 0 <= window < MAX_RANGE_DAYS:
+        return jsonify({"msg": f"to must be within {MAX_RANGE_DAYS} days after from"}), 400
+    if ws_type is not None and ws_type not in WorkspaceType._value2member_map_:
+        return jsonify({"msg": "Invalid workspace type"}), 400
+
+    ws_ids, ws_types, dates, matrix = heatmap_cache.matrix(org_id, start_date, end_date, ws_type)
+    encoding, bitmap = encode_bitmap(matrix, compress=request.args.get('compress') != 'none')
+    return jsonify({
+        "from": start_date,
+        "to": end_date,
+        "dates": dates,
+        "slot_minutes": SLOT_MINUTES,
+        "slots_per_day": SLOTS_PER_DAY,
+        "workspaces": ws_ids,
+        "workspace_types": [ws_types[ws_id] for ws_id in ws_ids],
+        "shape": list(matrix.shape),
+        "encoding": encoding,
+        "bitmap": bitmap,
+    })
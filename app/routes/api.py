@@ -1,39 +1,122 @@
 from flask import Blueprint, request, jsonify, g
-from app.utils.access_control import jwt_required
-from app.utils.db_utils import generate_emp_id, get_org_collection
-from app.utils.enums import WorkStatus
+from app.utils.access_control import jwt_required, requires_role
+from app.utils.db_utils import generate_emp_id, SERVER_TIMESTAMP
+from app.utils.dates import (
+    TIME_FORMAT,
+    booking_timestamps,
+    parse_date,
+    today_str,
+    tomorrow_str,
+)
+from app.utils.enums import Role, WorkStatus, WorkspaceType
+from app.utils.bulk_import import (
+    BulkImport,
+    RowError,
+    iter_rows,
+    request_format,
+    require,
+    split_list,
+)
+from app.services import change_feed
+from app.services.entitlements import entitlements
+from app.services.allocation import (
+    DEFAULT_END_TIME,
+    DEFAULT_START_TIME,
+    DeskAllocator,
+)
+from app.storage.repositories import (
+    attendance,
+    bookings,
+    employees,
+    organizations,
+    schedules,
+    team_memberships,
+    teams,
+    visitors,
+    workspaces,
+)
 import random
 import string
-from firebase_admin import firestore
+from datetime import datetime
 
 api_bp = Blueprint("api", __name__)
 
+ATTENDANCE_DAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+
+def _random_id(k=6):
+    return "".join(random.choices(string.ascii_uppercase + string.digits, k=k))
+
+
+def _run_bulk_import(repository, build, after_write=None, new_id=None):
+    fmt = request_format(request)
+    if fmt not in ("csv", "ndjson"):
+        return jsonify({"message": "format must be csv or ndjson"}), 400
+    job = BulkImport(repository, g.org_id, build, after_write, new_id)
+    job.run(iter_rows(request.stream, fmt))
+    status = 200 if job.imported or not job.failed else 400
+    return jsonify(job.summary()), status
+
 
 @api_bp.route("/add_employee", methods=["POST"])
 @jwt_required
 def add_employee():
     data = request.json
     emp_id = generate_emp_id(g.org_id)
-    ref = get_org_collection(g.org_id, "Employee_data").document(emp_id)
-    ref.set(
+    employees.set(
+        g.org_id,
+        emp_id,
         {
             "emp_ID": emp_id,
             "email": data["email"],
             "name": data["name"],
             "role": data["role"],
             "features_availed": data["features_availed"],
-        }
+        },
     )
+    entitlements.invalidate(g.org_id, data["email"])
     return jsonify({"message": "Employee added", "emp_id": emp_id})
 
 
+@api_bp.route("/set_entitlements", methods=["POST"])
+@jwt_required
+@requires_role(Role.EMPLOYER.value)
+def set_entitlements():
+    """Set the org tier, or an employee's tier/tools_access when email is given.
+
+    Employers only, including for their own entitlements. Takes effect for
+    new tokens and on the next /auth/refresh.
+    """
+    data = request.json
+    email = data.get("email")
+    if email is None:
+        if not data.get("tier"):
+            return jsonify({"message": "tier is required"}), 400
+        organizations.set(g.org_id, {"tier": data["tier"]}, merge=True)
+        entitlements.invalidate(g.org_id)
+        return jsonify({"message": "Organization tier set"})
+
+    emp_id = employees.find_id_by_email(g.org_id, email)
+    if emp_id is None:
+        return jsonify({"message": "Employee not found"}), 404
+    update = {}
+    if "tier" in data:
+        update["tier"] = data["tier"]
+    if "tools_access" in data:
+        update["tools_access"] = split_list(data["tools_access"])
+    if not update:
+        return jsonify({"message": "tier or tools_access is required"}), 400
+    employees.set(g.org_id, emp_id, update, merge=True)
+    entitlements.invalidate(g.org_id, email)
+    return jsonify({"message": "Entitlements set", "emp_id": emp_id})
+
+
 @api_bp.route("/add_team", methods=["POST"])
 @jwt_required
 def add_team():
     data = request.json
-    team_id = "".join(random.choices(string.ascii_uppercase + string.digits, k=6))
-    ref = get_org_collection(g.org_id, "Team_data").document(team_id)
-    ref.set({"Team_ID": team_id, "name": data["name"]})
+    team_id = _random_id()
+    teams.set(g.org_id, team_id, {"Team_ID": team_id, "name": data["name"]})
     return jsonify({"message": "Team added", "team_id": team_id})
 
 
@@ -41,8 +124,8 @@ def add_team():
 @jwt_required
 def correlate_employee_team():
     data = request.json
-    get_org_collection(g.org_id, "Employee_team_correlation").add(
-        {"emp_ID": data["emp_ID"], "team_ID": data["team_ID"]}
+    team_memberships.add(
+        g.org_id, {"emp_ID": data["emp_ID"], "team_ID": data["team_ID"]}
     )
     return jsonify({"message": "Employee-Team correlation added"})
 
@@ -52,14 +135,10 @@ def correlate_employee_team():
 def add_attendance():
     data = request.json
     emp_id = data["emp_ID"]
-    attendance_data = {
-        k: data.get(k, WorkStatus.NULL.value)
-        for k in ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
-    }
+    attendance_data = {k: data.get(k, WorkStatus.NULL.value) for k in ATTENDANCE_DAYS}
     attendance_data["emp_ID"] = emp_id
-    get_org_collection(g.org_id, "Employee_attendance").document(emp_id).set(
-        attendance_data
-    )
+    attendance.set(g.org_id, emp_id, attendance_data)
+    change_feed.attendance_changed(g.org_id)
     return jsonify({"message": "Attendance recorded"})
 
 
@@ -67,7 +146,8 @@ def add_attendance():
 @jwt_required
 def add_visitor():
     data = request.json
-    ref = get_org_collection(g.org_id, "Visitor_data").add(
+    visitors.add(
+        g.org_id,
         {
             "emp_ID": data["emp_ID"],
             "visitor_name": data["visitor_name"],
@@ -77,9 +157,10 @@ def add_visitor():
             "time_allocated_end": data["time_allocated_end"],
             "time_utilized_start": data["time_utilized_start"],
             "time_utilized_end": data["time_utilized_end"],
-            "timestamp": firestore.SERVER_TIMESTAMP,
-        }
+            "timestamp": SERVER_TIMESTAMP,
+        },
     )
+    change_feed.visitor_created(g.org_id, datetime.utcnow())
     return jsonify({"message": "Visitor added"})
 
 
@@ -87,9 +168,13 @@ def add_visitor():
 @jwt_required
 def add_workspace():
     data = request.json
-    workspace_id = "".join(random.choices(string.ascii_uppercase + string.digits, k=6))
-    ref = get_org_collection(g.org_id, "Workspace_data").document(workspace_id)
-    ref.set({"workspace_ID": workspace_id, "workspace_type": data["workspace_type"]})
+    workspace_id = _random_id()
+    workspaces.set(
+        g.org_id,
+        workspace_id,
+        {"workspace_ID": workspace_id, "workspace_type": data["workspace_type"]},
+    )
+    change_feed.workspace_created(g.org_id, workspace_id, data["workspace_type"])
     return jsonify({"message": "Workspace added", "workspace_ID": workspace_id})
 
 
@@ -97,16 +182,31 @@ def add_workspace():
 @jwt_required
 def book_workspace():
     data = request.json
-    get_org_collection(g.org_id, "Workspace_booking_data").add(
-        {
-            "workspace_ID": data["workspace_ID"],
-            "required_id": data["required_id"],
-            "start_time": data["start_time"],
-            "end_time": data["end_time"],
-            "purpose": data["purpose"],
-            "timestamp": firestore.SERVER_TIMESTAMP,
-        }
-    )
+    date_str = data.get("date") or today_str()
+    try:
+        start_at, end_at = booking_timestamps(
+            date_str, data["start_time"], data["end_time"]
+        )
+    except ValueError:
+        return (
+            jsonify({"message": "Invalid date or time, use YYYY-MM-DD and HH:MM"}),
+            400,
+        )
+    if end_at <= start_at:
+        return jsonify({"message": "end_time must be after start_time"}), 400
+    booking = {
+        "workspace_ID": data["workspace_ID"],
+        "required_id": data["required_id"],
+        "start_time": start_at.strftime(TIME_FORMAT),
+        "end_time": end_at.strftime(TIME_FORMAT),
+        "purpose": data["purpose"],
+        "date": date_str,
+        "start_at": start_at,
+        "end_at": end_at,
+        "timestamp": SERVER_TIMESTAMP,
+    }
+    booking_id = bookings.add(g.org_id, booking)
+    change_feed.booking_created(g.org_id, booking_id, booking)
     return jsonify({"message": "Workspace booked"})
 
 
@@ -114,14 +214,153 @@ def book_workspace():
 @jwt_required
 def schedule_workspace():
     data = request.json
-    ref = get_org_collection(g.org_id, "Scheduling_data").document(data["required_id"])
-    ref.set(
+    valid_from = data.get("valid_from") or today_str()
+    try:
+        parse_date(valid_from)
+    except ValueError:
+        return jsonify({"message": "Invalid valid_from, use YYYY-MM-DD"}), 400
+    schedules.set(
+        g.org_id,
+        data["required_id"],
         {
             "required_id": data["required_id"],
             "workspace_id": data["workspace_id"],
             "start_time": data["start_time"],
             "end_time": data["end_time"],
             "booking_pattern": data["booking_pattern"],  # list of enums
-        }
+            "valid_from": valid_from,
+            "valid_until": data.get("valid_until"),
+        },
     )
+    change_feed.schedule_changed(g.org_id, valid_from)
     return jsonify({"message": "Scheduling set"})
+
+
+@api_bp.route("/allocate_desks", methods=["POST"])
+@jwt_required
+@requires_role(Role.EMPLOYER.value)
+def allocate_desks():
+    """Assign free desks to everyone in the office on `date` (default tomorrow).
+
+    With "dry_run": true the plan is returned without writing bookings.
+    """
+    data = request.get_json(silent=True) or {}
+    date_str = data.get("date") or tomorrow_str()
+    try:
+        start_at, end_at = booking_timestamps(
+            date_str,
+            data.get("start_time", DEFAULT_START_TIME),
+            data.get("end_time", DEFAULT_END_TIME),
+        )
+    except ValueError:
+        return (
+            jsonify({"message": "Invalid date or time, use YYYY-MM-DD and HH:MM"}),
+            400,
+        )
+    if end_at <= start_at:
+        return jsonify({"message": "end_time must be after start_time"}), 400
+
+    allocator = DeskAllocator(
+        g.org_id,
+        date_str,
+        start_at.strftime(TIME_FORMAT),
+        end_at.strftime(TIME_FORMAT),
+    )
+    plan = allocator.plan()
+    if not data.get("dry_run"):
+        allocator.commit(plan["assigned"])
+    return jsonify(plan)
+
+
+# Bulk imports accept CSV (Content-Type: text/csv) or NDJSON (one JSON object
+# per line) bodies, or ?format=csv|ndjson. Rows are validated one by one and
+# written in batches; invalid rows are reported without failing the upload.
+
+
+@api_bp.route("/bulk/employees", methods=["POST"])
+@jwt_required
+def bulk_add_employees():
+    # The 4-character emp_id suffix collides within a few thousand rows, both
+    # within the upload and with existing employees (checked per batch).
+    used_ids = set()
+
+    def fresh_id():
+        emp_id = generate_emp_id(g.org_id)
+        while emp_id in used_ids:
+            emp_id = generate_emp_id(g.org_id)
+        used_ids.add(emp_id)
+        return emp_id
+
+    def new_id(data):
+        emp_id = fresh_id()
+        return emp_id, {**data, "emp_ID": emp_id}
+
+    def build(row):
+        email, name, role = require(row, "email", "name", "role")
+        emp_id = fresh_id()
+        return emp_id, {
+            "emp_ID": emp_id,
+            "email": email,
+            "name": name,
+            "role": role,
+            "features_availed": split_list(row.get("features_availed")),
+        }
+
+    def after_write(docs):
+        for _, data in docs:
+            entitlements.invalidate(g.org_id, data["email"])
+
+    return _run_bulk_import(employees, build, after_write, new_id)
+
+
+@api_bp.route("/bulk/teams", methods=["POST"])
+@jwt_required
+def bulk_add_teams():
+    def build(row):
+        (name,) = require(row, "name")
+        team_id = _random_id()
+        return team_id, {"Team_ID": team_id, "name": name}
+
+    return _run_bulk_import(teams, build)
+
+
+@api_bp.route("/bulk/attendance", methods=["POST"])
+@jwt_required
+def bulk_add_attendance():
+    statuses = {s.value for s in WorkStatus}
+
+    def build(row):
+        (emp_id,) = require(row, "emp_ID")
+        attendance_data = {}
+        for day in ATTENDANCE_DAYS:
+            status = row.get(day) or WorkStatus.NULL.value
+            if status not in statuses:
+                raise RowError(f"Invalid status for {day}: {status}")
+            attendance_data[day] = status
+        attendance_data["emp_ID"] = emp_id
+        return emp_id, attendance_data
+
+    return _run_bulk_import(
+        attendance, build, lambda docs: change_feed.attendance_changed(g.org_id)
+    )
+
+
+@api_bp.route("/bulk/workspaces", methods=["POST"])
+@jwt_required
+def bulk_add_workspaces():
+    ws_types = {t.value for t in WorkspaceType}
+
+    def build(row):
+        (ws_type,) = require(row, "workspace_type")
+        if ws_type not in ws_types:
+            raise RowError(f"Invalid workspace_type: {ws_type}")
+        workspace_id = _random_id()
+        return workspace_id, {"workspace_ID": workspace_id, "workspace_type": ws_type}
+
+    def after_write(docs):
+        for workspace_id, data in docs:
+            change_feed.workspace_created(
+                g.org_id, workspace_id, data["workspace_type"]
+            )
+
+    return _run_bulk_import(workspaces, build, after_write)
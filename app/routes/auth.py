@@ -8,29 +8,43 @@ from flask_jwt_extended import (
     set_refresh_cookies,
     unset_refresh_cookies,
 )
-from app.models.user import get_user_by_email, add_user, check_password, update_password
+from app.models.user import (
+    get_user_by_email,
+    add_user_hashed,
+    hash_password,
+    check_password,
+    update_password,
+    set_emp_id,
+)
 from app.blacklist import add_to_blacklist, is_token_blacklisted
 from app.utils.rate_limit_keys import ip_only, ip_email_combined
 from app.utils.otp import (
     generate_otp,
-    save_otp,
+    save_registration,
     verify_otp,
-    is_email_verified,
-    clear_email_verification,
-    save_org_id,
-    get_org_id,
-    clear_org_id,
+    consume_registration,
+    is_verified,
 )
 from app.utils.forgot_password import send_reset_email, verify_reset_token
 from app.services.mail_util import send_mail
 from app.extensions import limiter
 from app.config import Config
 from app.utils.access_control import jwt_required
-from app.utils.db_utils import get_emp_id_from_firestore, ensure_employee_in_firestore
+from app.storage.repositories import employees
+from app.services.entitlements import entitlements
 
 auth_bp = Blueprint("auth", __name__)
 
 
+def token_claims(email, org_id, role, emp_id):
+    return {
+        "org_id": org_id,
+        "role": role,
+        "emp_id": emp_id,
+        **entitlements.claims(org_id, email),
+    }
+
+
 @auth_bp.route("/register", methods=["POST"])
 @limiter.limit("5 per hour", key_func=ip_email_combined)
 @limiter.limit("20 per day", key_func=ip_email_combined)
@@ -43,8 +57,7 @@ def start_registration():
     if get_user_by_email(email):
         return jsonify({"msg": "Email already registered"}), 409
     otp = generate_otp()
-    save_otp(email, otp)
-    save_org_id(email, org_id)
+    save_registration(email, org_id, otp)
     html = f"<p>Your OTP is <strong>{otp}</strong>. It expires in 1 minutes.</p>"
     send_mail(email, "Verify your email", html)
     return jsonify({"msg": "OTP sent to email"}), 200
@@ -81,32 +94,30 @@ def complete_registration():
         return jsonify({"msg": "Email and password are required"}), 400
     if get_user_by_email(email):
         return jsonify({"msg": "Email already registered"}), 409
-    if not is_email_verified(email):
-        return jsonify({"msg": "Email not verified"}), 403
 
-    org_id = get_org_id(email)
-    if org_id is None:
-        return jsonify({"msg": "Organization info expired"}), 410
+    # Reject unverified emails before paying for the hash. The hash still
+    # comes before consuming the verified state, so a busy hashing pool (503)
+    # leaves the registration in place for the client's retry.
+    if not is_verified(email):
+        return jsonify({"msg": "Email not verified"}), 403
+    hashed_password = hash_password(password)
+    status, org_id = consume_registration(email)
+    if status == "unverified":
+        return jsonify({"msg": "Email not verified"}), 403
 
     # Add user to auth DB
-    add_user(email, password, org_id)
-    clear_email_verification(email)
-    clear_org_id(email)
+    add_user_hashed(email, hashed_password, org_id)
 
     user = get_user_by_email(email)
     role = user.get("role", "employee")
 
     # Ensure employee is added to Firestore and fetch emp_id
-    emp_id = ensure_employee_in_firestore(email, org_id)
+    emp_id = employees.ensure(org_id, email)
+    set_emp_id(email, emp_id)
 
-    access_token = create_access_token(
-        identity=email,
-        additional_claims={"org_id": org_id, "role": role, "emp_id": emp_id},
-    )
-    refresh_token = create_refresh_token(
-        identity=email,
-        additional_claims={"org_id": org_id, "role": role, "emp_id": emp_id},
-    )
+    claims = token_claims(email, org_id, role, emp_id)
+    access_token = create_access_token(identity=email, additional_claims=claims)
+    refresh_token = create_refresh_token(identity=email, additional_claims=claims)
 
     response = jsonify({"msg": "Registration complete", "access_token": access_token})
     set_refresh_cookies(response, refresh_token)
@@ -127,16 +138,15 @@ def login():
 
     org_id = user.get("org_id")
     role = user.get("role", "employee")
-    emp_id = get_emp_id_from_firestore(org_id, email)
+    emp_id = user.get("emp_id")
+    if not emp_id:
+        emp_id = employees.find_id_by_email(org_id, email)
+        if emp_id:
+            set_emp_id(email, emp_id)
 
-    access_token = create_access_token(
-        identity=email,
-        additional_claims={"org_id": org_id, "role": role, "emp_id": emp_id},
-    )
-    refresh_token = create_refresh_token(
-        identity=email,
-        additional_claims={"org_id": org_id, "role": role, "emp_id": emp_id},
-    )
+    claims = token_claims(email, org_id, role, emp_id)
+    access_token = create_access_token(identity=email, additional_claims=claims)
+    refresh_token = create_refresh_token(identity=email, additional_claims=claims)
 
     response = jsonify(access_token=access_token)
     set_refresh_cookies(response, refresh_token)
@@ -238,13 +248,12 @@ def refresh():
     current_user_email = get_jwt_identity()
     claims = get_jwt()
 
+    # Entitlements are re-resolved so tier/tool changes apply on refresh.
     access_token = create_access_token(
         identity=current_user_email,
-        additional_claims={
-            "org_id": claims["org_id"],
-            "role": claims["role"],
-            "emp_id": claims["emp_id"],
-        },
+        additional_claims=token_claims(
+            current_user_email, claims["org_id"], claims["role"], claims["emp_id"]
+        ),
     )
 
     return jsonify(access_token=access_token), 200
@@ -1,12 +1,37 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
-from firebase_admin import firestore
 from datetime import datetime, timedelta
+from itertools import islice
 
+from app.utils.conditional import conditional
+from app.utils.db_utils import SERVER_TIMESTAMP
+from app.utils.dates import TIME_FORMAT, booking_timestamps, parse_date, today_str
 from app.utils.enums import WorkspaceType, BookingPattern
+from app.utils.pagination import (
+    PaginationError,
+    fetch_page,
+    ndjson_response,
+    page_args,
+    wants_ndjson,
+)
+from app.services import change_feed
+from app.services.booking_index import booking_index
+from app.services.occupancy import occupancy_cache
+from app.services.schedules import (
+    MAX_WINDOW_DAYS,
+    iter_merged,
+    merge_bookings,
+    schedule_expander,
+)
+from app.storage.repositories import (
+    attendance,
+    bookings,
+    schedules,
+    visitors,
+    workspaces,
+)
 
 employee_bp = Blueprint("employee", __name__)
-db = firestore.client()
 
 
 def get_org_id():
@@ -14,8 +39,21 @@ def get_org_id():
     return claims.get("org_id")
 
 
-def today_str():
-    return datetime.utcnow().strftime("%Y-%m-%d")
+def list_response(docs, to_row, limit):
+    """Serialize a document stream as a list, an NDJSON stream or a page.
+
+    With no limit the body is a bare JSON list, as before pagination existed.
+    Paged streams must be queried with limit + 1 so the next cursor is known.
+    """
+    if wants_ndjson(request):
+        return ndjson_response(to_row(doc) for doc in islice(docs, limit))
+    if limit is None:
+        return jsonify([to_row(doc) for doc in docs]), 200
+    page, next_cursor = fetch_page(docs, limit)
+    return (
+        jsonify({"items": [to_row(doc) for doc in page], "next_cursor": next_cursor}),
+        200,
+    )
 
 
 @employee_bp.route("/mark_wfh_tomorrow", methods=["POST"])
@@ -24,13 +62,7 @@ def mark_wfh_tomorrow():
     org_id = get_org_id()
     emp_id = get_jwt_identity()
 
-    attendance_ref = (
-        db.collection("Organizations")
-        .document(org_id)
-        .collection("Employee_attendance")
-        .document(emp_id)
-    )
-    doc = attendance_ref.get()
+    doc = attendance.get(org_id, emp_id)
     attendance_data = doc.to_dict() if doc.exists else {}
 
     tomorrow = datetime.utcnow().date() + timedelta(days=1)
@@ -40,122 +72,100 @@ def mark_wfh_tomorrow():
         return jsonify({"msg": "Invalid day"}), 400
 
     attendance_data[day_key] = "wfh"
-    attendance_ref.set(attendance_data, merge=True)
+    attendance.set(org_id, emp_id, attendance_data, merge=True)
+    change_feed.attendance_changed(org_id)
 
     return jsonify({"msg": f"Marked {day_key} as WFH for employee {emp_id}"}), 200
 
 
 @employee_bp.route("/get_workstation", methods=["GET"])
 @jwt_required()
+@conditional(per_minute=True)
 def get_workstation():
     org_id = get_org_id()
-    w_type_str = request.args.get("type", "").strip()
+    args, error = workstation_args()
+    if error:
+        return error
+    w_type, limit, after, today, now_str = args
+
+    active = bookings.active_at(org_id, today, now_str)
+    occurrences = schedule_expander.for_day(org_id, today)
+    ws_docs = workspaces.of_type(org_id, w_type.value, limit and limit + 1, after)
+    return workstation_response(ws_docs, active, occurrences, now_str, limit)
 
+
+def workstation_args():
+    """((type, limit, after, today, now_str), None) or (None, error response)."""
     try:
-        w_type = WorkspaceType(w_type_str)
+        w_type = WorkspaceType(request.args.get("type", "").strip())
     except ValueError:
-        return jsonify({"msg": "Invalid workspace type"}), 400
-
-    if w_type not in WorkspaceType:
-        print("Invalid workspace type")
-        return
+        return None, (jsonify({"msg": "Invalid workspace type"}), 400)
 
-    ws_ref = (
-        db.collection("Organizations").document(org_id).collection("Workspace_data")
-    )
-    ws_docs = ws_ref.where("workspace_type", "==", w_type.value).stream()
+    try:
+        limit, after = page_args(request.args)
+    except PaginationError as e:
+        return None, (jsonify({"msg": str(e)}), 400)
 
-    booking_ref = (
-        db.collection("Organizations")
-        .document(org_id)
-        .collection("Workspace_booking_data")
-    )
     now = datetime.utcnow()
-    now_str = now.strftime("%H:%M")
-    bookings_today = (
-        booking_ref.where("start_time", "<=", now_str)
-        .where("end_time", ">=", now_str)
-        .stream()
+    return (w_type, limit, after, now.strftime("%Y-%m-%d"), now.strftime("%H:%M")), None
+
+
+def workstation_response(ws_docs, active_docs, occurrences_today, now_str, limit):
+    current_bookings = bookings_by_workspace(active_docs, occurrences_today, now_str)
+    return list_response(
+        ws_docs, lambda ws: workstation_row(ws, current_bookings), limit
     )
 
+
+def bookings_by_workspace(active_docs, occurrences_today, now_str):
+    """workspace_ID -> the one-off or recurring booking active at now_str."""
+    bookings_today = [b.to_dict() for b in active_docs]
+    recurring_now = [
+        o for o in occurrences_today if o["start_time"] <= now_str <= o["end_time"]
+    ]
     current_bookings = {}
-    for b in bookings_today:
-        bdata = b.to_dict()
+    for bdata in merge_bookings(bookings_today, recurring_now):
         current_bookings[bdata["workspace_ID"]] = bdata
-
-    results = []
-    for ws in ws_docs:
-        ws_data = ws.to_dict()
-        ws_id = ws.id
-        status = "available"
-        occupant = None
-        time_slot = None
-
-        if ws_id in current_bookings:
-            status = "booked"
-            occupant = current_bookings[ws_id]["required_id"]
-            time_slot = (
-                current_bookings[ws_id]["start_time"],
-                current_bookings[ws_id]["end_time"],
-            )
-
-        results.append(
-            {
-                "workspace_id": ws_id,
-                "workspace_type": ws_data.get("workspace_type"),
-                "status": status,
-                "occupant": occupant,
-                "time_slot": time_slot,
-            }
+    return current_bookings
+
+
+def workstation_row(ws, current_bookings):
+    ws_data = ws.to_dict()
+    ws_id = ws.id
+    status = "available"
+    occupant = None
+    time_slot = None
+
+    if ws_id in current_bookings:
+        status = "booked"
+        occupant = current_bookings[ws_id]["required_id"]
+        time_slot = (
+            current_bookings[ws_id]["start_time"],
+            current_bookings[ws_id]["end_time"],
         )
 
-    return jsonify(results), 200
+    return {
+        "workspace_id": ws_id,
+        "workspace_type": ws_data.get("workspace_type"),
+        "status": status,
+        "occupant": occupant,
+        "time_slot": time_slot,
+    }
 
 
 @employee_bp.route("/get_workstation_type_occupancy", methods=["GET"])
 @jwt_required()
+@conditional(per_minute=True)
 def get_workstation_type_occupancy():
     org_id = get_org_id()
 
-    ws_ref = (
-        db.collection("Organizations").document(org_id).collection("Workspace_data")
-    )
-    booking_ref = (
-        db.collection("Organizations")
-        .document(org_id)
-        .collection("Workspace_booking_data")
-    )
-
-    total_by_type = {t.value: 0 for t in WorkspaceType}
-    occupied_by_type = {t.value: 0 for t in WorkspaceType}
-
-    all_ws = ws_ref.stream()
-    for ws in all_ws:
-        ws_data = ws.to_dict()
-        wtype = ws_data.get("workspace_type")
-        if wtype in total_by_type:
-            total_by_type[wtype] += 1
-
     now = datetime.utcnow()
-    time_now = now.strftime("%H:%M")
-    bookings_today = (
-        booking_ref.where("start_time", "<=", time_now)
-        .where("end_time", ">=", time_now)
-        .stream()
-    )
-
-    occupied_workspace_ids = {b.to_dict()["workspace_ID"] for b in bookings_today}
-    ws_map = {ws.id: ws.to_dict().get("workspace_type") for ws in ws_ref.stream()}
-
-    for ws_id in occupied_workspace_ids:
-        wtype = ws_map.get(ws_id)
-        if wtype in occupied_by_type:
-            occupied_by_type[wtype] += 1
+    snapshot = occupancy_cache.get(org_id, now.strftime("%Y-%m-%d"))
+    counts = snapshot.at(now.strftime("%H:%M"))
 
     result = {}
     for wtype in WorkspaceType:
-        total = total_by_type[wtype.value]
-        occupied = occupied_by_type[wtype.value]
+        total, occupied = counts[wtype.value]
         unoccupied = total - occupied
         occupancy_pct = (occupied / total * 100) if total > 0 else 0
         result[wtype.value] = {
@@ -170,19 +180,58 @@ def get_workstation_type_occupancy():
 
 @employee_bp.route("/my_bookings", methods=["GET"])
 @jwt_required()
+@conditional(per_user=True)
 def my_bookings():
     org_id = get_org_id()
     emp_id = get_jwt_identity()
 
-    booking_ref = (
-        db.collection("Organizations")
-        .document(org_id)
-        .collection("Workspace_booking_data")
-    )
-    bookings = booking_ref.where("required_id", "==", emp_id).stream()
-    result = [{"booking_id": b.id, **b.to_dict()} for b in bookings]
+    try:
+        limit, after = page_args(request.args)
+    except PaginationError as e:
+        return jsonify({"msg": str(e)}), 400
 
-    return jsonify(result), 200
+    docs = bookings.for_employee(org_id, emp_id, limit and limit + 1, after)
+    return list_response(docs, lambda b: {"booking_id": b.id, **b.to_dict()}, limit)
+
+
+@employee_bp.route("/my_calendar", methods=["GET"])
+@jwt_required()
+def my_calendar():
+    """One-off bookings and expanded recurring schedules between ?from= and ?to=."""
+    org_id = get_org_id()
+    emp_id = get_jwt_identity()
+    start_date = request.args.get("from") or today_str()
+    end_date = request.args.get("to") or start_date
+    error = calendar_window_error(start_date, end_date)
+    if error:
+        return error
+
+    one_off = bookings.for_employee_between(org_id, emp_id, start_date, end_date)
+    occurrences = schedule_expander.occurrences(org_id, start_date, end_date)
+    return calendar_response(emp_id, one_off, occurrences)
+
+
+def calendar_window_error(start_date, end_date):
+    try:
+        window = (parse_date(end_date) - parse_date(start_date)).days
+    except ValueError:
+        return jsonify({"msg": "Invalid date format, use YYYY-MM-DD"}), 400
+    if not 0 <= window < MAX_WINDOW_DAYS:
+        return (
+            jsonify({"msg": f"to must be within {MAX_WINDOW_DAYS} days after from"}),
+            400,
+        )
+    return None
+
+
+def calendar_response(emp_id, one_off_docs, occurrences):
+    one_off = ({"booking_id": b.id, **b.to_dict()} for b in one_off_docs)
+    recurring = [o for o in occurrences if o["required_id"] == emp_id]
+    merged = iter_merged(one_off, recurring)
+    if wants_ndjson(request):
+        return ndjson_response(merged)
+    rows = sorted(merged, key=lambda b: (b["date"], b["start_time"]))
+    return jsonify(rows), 200
 
 
 @employee_bp.route("/delete_my_booking", methods=["POST"])
@@ -196,13 +245,7 @@ def delete_my_booking():
     if not booking_id:
         return jsonify({"msg": "booking_id required"}), 400
 
-    booking_ref = (
-        db.collection("Organizations")
-        .document(org_id)
-        .collection("Workspace_booking_data")
-        .document(booking_id)
-    )
-    booking = booking_ref.get()
+    booking = bookings.get(org_id, booking_id)
     if not booking.exists:
         return jsonify({"msg": "Booking not found"}), 404
 
@@ -210,7 +253,8 @@ def delete_my_booking():
     if booking_data.get("required_id") != emp_id:
         return jsonify({"msg": "You can only delete your own bookings"}), 403
 
-    booking_ref.delete()
+    bookings.delete(org_id, booking_id)
+    change_feed.booking_deleted(org_id, booking_id, booking_data)
     return jsonify({"msg": "Booking deleted"}), 200
 
 
@@ -227,6 +271,8 @@ def book_workspace():
     end_time = data.get("end_time")
     purpose = data.get("purpose", "")
     schedule = data.get("schedule")  # Comma-separated: "mo,tu,we"
+    valid_until = data.get("valid_until")  # Last day of the schedule, optional
+    date_str = data.get("date") or today_str()
 
     if not all([workspace_id, start_time, end_time]):
         return (
@@ -234,83 +280,71 @@ def book_workspace():
             400,
         )
 
-    ws_ref = (
-        db.collection("Organizations")
-        .document(org_id)
-        .collection("Workspace_data")
-        .document(workspace_id)
-    )
-    ws_doc = ws_ref.get()
+    try:
+        start_at, end_at = booking_timestamps(date_str, start_time, end_time)
+    except ValueError:
+        return (
+            jsonify({"msg": "Invalid date or time, use YYYY-MM-DD and HH:MM"}),
+            400,
+        )
+    if end_at <= start_at:
+        return jsonify({"msg": "end_time must be after start_time"}), 400
+    # Zero-padded so "HH:MM" strings compare correctly in queries.
+    start_time, end_time = start_at.strftime(TIME_FORMAT), end_at.strftime(TIME_FORMAT)
+
+    schedule_pattern = None
+    if schedule:
+        schedule_pattern = [s.strip() for s in schedule.split(",")]
+        for day in schedule_pattern:
+            if day not in BookingPattern._value2member_map_:
+                return jsonify({"msg": f"Invalid booking pattern day: {day}"}), 400
+        try:
+            if valid_until and parse_date(valid_until) < parse_date(date_str):
+                return jsonify({"msg": "valid_until is before date"}), 400
+        except ValueError:
+            return jsonify({"msg": "Invalid valid_until, use YYYY-MM-DD"}), 400
+
+    ws_doc = workspaces.get(org_id, workspace_id)
     if not ws_doc.exists:
         return jsonify({"msg": "Workspace not found"}), 404
 
     ws_type = ws_doc.to_dict().get("workspace_type")
 
     if ws_type == WorkspaceType.HOT_SEAT.value:
-        ws_ref_all = (
-            db.collection("Organizations").document(org_id).collection("Workspace_data")
-        )
-        workstations = ws_ref_all.where(
-            "workspace_type", "==", WorkspaceType.WORK_STATION.value
-        ).stream()
-        booking_ref = (
-            db.collection("Organizations")
-            .document(org_id)
-            .collection("Workspace_booking_data")
-        )
-
-        workstation_full = True
-        for ws in workstations:
-            ws_id = ws.id
-            bookings = booking_ref.where("workspace_ID", "==", ws_id).stream()
-            if all(
-                end_time <= b.to_dict()["start_time"]
-                or start_time >= b.to_dict()["end_time"]
-                for b in bookings
-            ):
-                workstation_full = False
-                break
-
-        if not workstation_full:
+        if booking_index.is_any_free(
+            org_id, date_str, WorkspaceType.WORK_STATION.value, start_time, end_time
+        ):
             return jsonify({"msg": "Workstations available, cannot book hot seat"}), 400
 
-    booking_ref = (
-        db.collection("Organizations")
-        .document(org_id)
-        .collection("Workspace_booking_data")
-    )
     new_booking = {
         "workspace_ID": workspace_id,
         "required_id": required_id,
         "start_time": start_time,
         "end_time": end_time,
         "purpose": purpose,
-        "timestamp": firestore.SERVER_TIMESTAMP,
+        "date": date_str,
+        "start_at": start_at,
+        "end_at": end_at,
+        "timestamp": SERVER_TIMESTAMP,
     }
-    booking_doc_ref = booking_ref.document()
-    booking_doc_ref.set(new_booking)
+    booking_id = bookings.add(org_id, new_booking)
+    change_feed.booking_created(org_id, booking_id, new_booking)
 
     if schedule:
-        schedule_pattern = [s.strip() for s in schedule.split(",")]
-        for day in schedule_pattern:
-            if day not in BookingPattern._value2member_map_:
-                return jsonify({"msg": f"Invalid booking pattern day: {day}"}), 400
-
-        scheduling_ref = (
-            db.collection("Organizations")
-            .document(org_id)
-            .collection("Scheduling_data")
-            .document(required_id)
-        )
-        scheduling_ref.set(
+        schedules.set(
+            org_id,
+            required_id,
             {
                 "required_id": required_id,
                 "workspace_id": workspace_id,
                 "start_time": start_time,
                 "end_time": end_time,
                 "booking_pattern": schedule_pattern,
-            }
+                "valid_from": date_str,
+                "valid_until": valid_until,
+            },
         )
+        change_feed.schedule_changed(org_id, date_str)
 
     return jsonify({"msg": "Workspace booked successfully"}), 201
 
@@ -319,37 +353,63 @@ def book_workspace():
 @jwt_required()
 def check_workspace_availability():
     org_id = get_org_id()
+    args, error = availability_args()
+    if error:
+        return error
+    ws_id, date_str, limit, after = args
+
+    if not workspaces.exists(org_id, ws_id):
+        return jsonify({"msg": "Workspace not found"}), 404
+
+    ws_bookings = bookings.for_workspace(
+        org_id, ws_id, date_str, limit and limit + 1, after
+    )
+    occurrences = schedule_expander.for_day(org_id, date_str)
+    return availability_response(ws_id, ws_bookings, occurrences, limit, after)
+
+
+def availability_args():
+    """((ws_id, date, limit, after), None) or (None, error response)."""
     ws_id = request.args.get("workspace_ID")
-    date_str = request.args.get("date")
+    date_str = request.args.get("date") or today_str()
 
     if not ws_id:
-        return jsonify({"msg": "workspace_ID param required"}), 400
-
-    if not date_str:
-        date_str = today_str()
+        return None, (jsonify({"msg": "workspace_ID param required"}), 400)
 
     try:
         datetime.strptime(date_str, "%Y-%m-%d")
     except ValueError:
-        return jsonify({"msg": "Invalid date format, use YYYY-MM-DD"}), 400
-
-    ws_ref = (
-        db.collection("Organizations")
-        .document(org_id)
-        .collection("Workspace_data")
-        .document(ws_id)
-    )
-    if not ws_ref.get().exists:
-        return jsonify({"msg": "Workspace not found"}), 404
+        return None, (jsonify({"msg": "Invalid date format, use YYYY-MM-DD"}), 400)
 
-    booking_ref = (
-        db.collection("Organizations")
-        .document(org_id)
-        .collection("Workspace_booking_data")
-    )
-    bookings = booking_ref.where("workspace_ID", "==", ws_id).stream()
+    try:
+        limit, after = page_args(request.args)
+    except PaginationError as e:
+        return None, (jsonify({"msg": str(e)}), 400)
+
+    return (ws_id, date_str, limit, after), None
+
+
+def availability_response(ws_id, ws_bookings, occurrences, limit, after):
+    recurring = [o for o in occurrences if o["workspace_ID"] == ws_id]
+    if limit is not None or wants_ndjson(request):
+        # Recurring occurrences are not documents and have no cursor; they
+        # are sent once, with the first page.
+        if after is not None:
+            recurring = []
+        if wants_ndjson(request):
+            one_off = (b.to_dict() for b in islice(ws_bookings, limit))
+            return ndjson_response(iter_merged(one_off, recurring))
+        page, next_cursor = fetch_page(ws_bookings, limit)
+        page = [b.to_dict() for b in page]
+        body = {
+            "bookings": merge_bookings(page, recurring),
+            "next_cursor": next_cursor,
+        }
+        if after is None:
+            body["available"] = not body["bookings"]
+        return jsonify(body), 200
 
-    bookings_on_date = [b.to_dict() for b in bookings]  # Optional: filter by date
+    bookings_on_date = merge_bookings([b.to_dict() for b in ws_bookings], recurring)
 
     if bookings_on_date:
         return jsonify({"available": False, "bookings": bookings_on_date}), 200
@@ -371,11 +431,7 @@ def get_visitor_pass():
     if not visitor_name or not visitor_email:
         return jsonify({"msg": "visitor_name and visitor_email required"}), 400
 
-    visitor_ref = (
-        db.collection("Organizations").document(org_id).collection("Visitor_data")
-    )
-    pass_doc_ref = visitor_ref.document()
-    pass_id = pass_doc_ref.id
+    pass_id = visitors.new_id(org_id)
 
     visitor_data = {
         "visitor_name": visitor_name,
@@ -385,22 +441,18 @@ def get_visitor_pass():
         "visit_date": visit_date,
         "pass_id": pass_id,
     }
-    pass_doc_ref.set(visitor_data)
+    visitors.set(org_id, pass_id, visitor_data)
+    change_feed.visitor_created(org_id, visit_date)
 
     return jsonify({"visitor_pass_link": f"/get_visitor_data/{pass_id}"}), 201
 
 
 @employee_bp.route("/get_visitor_data/<pass_id>", methods=["GET"])
 @jwt_required()
+@conditional()
 def get_visitor_data(pass_id):
     org_id = get_org_id()
-    visitor_ref = (
-        db.collection("Organizations")
-        .document(org_id)
-        .collection("Visitor_data")
-        .document(pass_id)
-    )
-    doc = visitor_ref.get()
+    doc = visitors.get(org_id, pass_id)
     if not doc.exists:
         return jsonify({"msg": "Visitor pass not found"}), 404
 
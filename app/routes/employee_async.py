@@ -0,0 +1,113 @@
+"""Employee routes with concurrent reads within a request, registered
+instead of employee_bp when Config.EMPLOYEE_ASYNC is set.
+
+The routes that make several independent reads issue them concurrently.
+The Firestore queries go through the async client on the process I/O loop,
+and the schedule expansion, which goes through the sync client and its
+cache, runs in a worker thread alongside them. Response shapes are built
+by the same helpers as the sync routes. Every other route is the sync view
+itself.
+
+This is not an async serving mode. The app is still served over WSGI:
+Flask runs each async view to completion on the request's thread, so a
+worker holds one request per thread as before. Holding many in-flight
+requests per worker would need an ASGI framework such as Quart, which is
+out of scope here; the gain is limited to overlapping the reads within
+one request.
+"""
+
+import asyncio
+
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import get_jwt_identity, jwt_required
+
+from app.routes import employee
+from app.routes.employee import (
+    availability_args,
+    availability_response,
+    calendar_response,
+    calendar_window_error,
+    get_org_id,
+    workstation_args,
+    workstation_response,
+)
+from app.services.schedules import schedule_expander
+from app.storage.async_repositories import bookings, workspaces
+from app.utils.conditional import conditional
+from app.utils.dates import today_str
+
+employee_async_bp = Blueprint("employee", __name__)
+
+SYNC_ROUTES = [
+    ("/mark_wfh_tomorrow", employee.mark_wfh_tomorrow, ["POST"]),
+    (
+        "/get_workstation_type_occupancy",
+        employee.get_workstation_type_occupancy,
+        ["GET"],
+    ),
+    ("/my_bookings", employee.my_bookings, ["GET"]),
+    ("/delete_my_booking", employee.delete_my_booking, ["POST"]),
+    ("/book_workspace", employee.book_workspace, ["POST"]),
+    ("/get_visitor_pass", employee.get_visitor_pass, ["POST"]),
+    ("/get_visitor_data/<pass_id>", employee.get_visitor_data, ["GET"]),
+]
+for rule, view, methods in SYNC_ROUTES:
+    employee_async_bp.add_url_rule(rule, view_func=view, methods=methods)
+
+
+@employee_async_bp.route("/get_workstation", methods=["GET"])
+@jwt_required()
+@conditional(per_minute=True)
+async def get_workstation():
+    org_id = get_org_id()
+    args, error = workstation_args()
+    if error:
+        return error
+    w_type, limit, after, today, now_str = args
+
+    active, occurrences, ws_docs = await asyncio.gather(
+        bookings.active_at(org_id, today, now_str),
+        asyncio.to_thread(schedule_expander.for_day, org_id, today),
+        workspaces.of_type(org_id, w_type.value, limit and limit + 1, after),
+    )
+    return workstation_response(ws_docs, active, occurrences, now_str, limit)
+
+
+@employee_async_bp.route("/check_workspace_availability", methods=["GET"])
+@jwt_required()
+async def check_workspace_availability():
+    org_id = get_org_id()
+    args, error = availability_args()
+    if error:
+        return error
+    ws_id, date_str, limit, after = args
+
+    # The bookings are only used when the workspace exists, which is the
+    # common case, so they are fetched alongside the existence check.
+    exists, ws_bookings, occurrences = await asyncio.gather(
+        workspaces.exists(org_id, ws_id),
+        bookings.for_workspace(org_id, ws_id, date_str, limit and limit + 1, after),
+        asyncio.to_thread(schedule_expander.for_day, org_id, date_str),
+    )
+    if not exists:
+        return jsonify({"msg": "Workspace not found"}), 404
+    return availability_response(ws_id, ws_bookings, occurrences, limit, after)
+
+
+@employee_async_bp.route("/my_calendar", methods=["GET"])
+@jwt_required()
+async def my_calendar():
+    """One-off bookings and expanded recurring schedules between ?from= and ?to=."""
+    org_id = get_org_id()
+    emp_id = get_jwt_identity()
+    start_date = request.args.get("from") or today_str()
+    end_date = request.args.get("to") or start_date
+    error = calendar_window_error(start_date, end_date)
+    if error:
+        return error
+
+    one_off, occurrences = await asyncio.gather(
+        bookings.for_employee_between(org_id, emp_id, start_date, end_date),
+        asyncio.to_thread(schedule_expander.occurrences, org_id, start_date, end_date),
+    )
+    return calendar_response(emp_id, one_off, occurrences)
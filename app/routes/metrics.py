@@ -0,0 +1,72 @@
+import hmac
+
+from flask import Blueprint, Response, jsonify, request
+from app.config import Config
+from app.services.hashing import hashing_pool
+from app.utils.metrics import metrics
+from app.utils.redis_pools import redis_metrics, redis_pools
+
+metrics_bp = Blueprint("metrics", __name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _redis_families():
+    commands = sorted(redis_metrics.commands.items())
+    yield (
+        "redis_commands_by_name_total",
+        "counter",
+        "Redis commands sent, by DB and command.",
+        [({"db": db, "command": name}, count) for (db, name), count in commands],
+    )
+    pools = redis_pools.stats()
+    for field, kind, help_text in (
+        ("max_connections", "gauge", "Connection limit of the pool."),
+        ("in_use", "gauge", "Connections checked out of the pool."),
+        ("checkouts", "counter", "Connections handed out by the pool."),
+        ("wait_seconds", "counter", "Seconds spent waiting for a connection."),
+        ("timeouts", "counter", "Checkouts that gave up waiting."),
+    ):
+        name = f"redis_pool_{field}" + ("_total" if kind == "counter" else "")
+        samples = [({"db": db}, stats[field]) for db, stats in pools.items()]
+        yield name, kind, help_text, samples
+
+
+def _hashing_families():
+    stats = hashing_pool.stats()
+    for field, name, kind, help_text in (
+        ("jobs", "hashing_jobs_total", "counter", "bcrypt jobs completed."),
+        ("rejected", "hashing_rejected_total", "counter", "bcrypt jobs refused."),
+        (
+            "queue_seconds_total",
+            "hashing_queue_seconds_total",
+            "counter",
+            "Seconds bcrypt jobs waited for a worker.",
+        ),
+        (
+            "queue_seconds_max",
+            "hashing_queue_seconds_max",
+            "gauge",
+            "Longest wait for a worker.",
+        ),
+        (
+            "hash_seconds_total",
+            "hashing_seconds_total",
+            "counter",
+            "Seconds spent hashing.",
+        ),
+        ("hash_seconds_max", "hashing_seconds_max", "gauge", "Slowest bcrypt job."),
+    ):
+        yield name, kind, help_text, [({}, stats[field])]
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    if Config.METRICS_TOKEN:
+        expected = f"Bearer {Config.METRICS_TOKEN}"
+        supplied = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(supplied.encode(), expected.encode()):
+            return jsonify({"msg": "Unauthorized"}), 401
+
+    extra = [*_redis_families(), *_hashing_families()]
+    return Response(metrics.render(extra), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,141 @@
+"""Next-day desk allocation for everyone planning to be in the office.
+
+The roster comes from Employee_attendance, the inventory and existing
+bookings from the booking index. Free desks are found with one vectorized
+pass over a workspace x minute occupancy matrix, then assigned work
+stations first and hot seats only once work stations run out, the same
+precedence book_workspace enforces one request at a time.
+"""
+
+import numpy as np
+
+from app.services import change_feed, versions
+from app.services.booking_index import booking_index
+from app.services.occupancy import occupancy_matrix, to_minute
+from app.services.schedules import schedule_expander
+from app.storage.repositories import attendance, bookings, employees
+from app.utils.bulk_import import BATCH_SIZE
+from app.utils.dates import booking_timestamps, parse_date
+from app.utils.db_utils import SERVER_TIMESTAMP
+from app.utils.enums import WorkspaceType, WorkStatus
+
+DEFAULT_START_TIME = "09:00"
+DEFAULT_END_TIME = "18:00"
+ALLOCATION_PURPOSE = "auto-allocated"
+# Desk types in the order they are handed out.
+ALLOCATABLE_TYPES = [WorkspaceType.WORK_STATION.value, WorkspaceType.HOT_SEAT.value]
+
+
+def office_roster(org_id, day):
+    """Emails of employees whose attendance for `day` is "office"."""
+    emails_by_id = None
+    roster = []
+    for doc in attendance.all(org_id):
+        data = doc.to_dict()
+        status = attendance.status_on(data, day.weekday())
+        if status != WorkStatus.OFFICE.value:
+            continue
+        if "@" in doc.id:
+            roster.append(doc.id)
+            continue
+        if emails_by_id is None:
+            emails_by_id = {
+                e.id: e.to_dict().get("email") for e in employees.all(org_id)
+            }
+        email = emails_by_id.get(doc.id)
+        if email:
+            roster.append(email)
+    return sorted(set(roster))
+
+
+class DeskAllocator:
+    def __init__(self, org_id, date_str, start_time, end_time):
+        self.org_id = org_id
+        self.date_str = date_str
+        self.start_time = start_time
+        self.end_time = end_time
+        self.start_at, self.end_at = booking_timestamps(date_str, start_time, end_time)
+
+    def _already_booked(self):
+        booked = {
+            b.to_dict().get("required_id")
+            for b in bookings.on_date(self.org_id, self.date_str)
+        }
+        booked.update(
+            o["required_id"]
+            for o in schedule_expander.for_day(self.org_id, self.date_str)
+        )
+        return booked
+
+    def _free_desks(self):
+        """Free desk ids and their types, in allocation order."""
+        # Current at the org version, so other workers' bookings are seen.
+        day = booking_index.get(
+            self.org_id, self.date_str, versions.current(self.org_id)
+        )
+        ws_ids, ws_types = [], []
+        with booking_index.read_lock():
+            for ws_type in ALLOCATABLE_TYPES:
+                ids = sorted(day.by_type.get(ws_type, ()))
+                ws_ids.extend(ids)
+                ws_types.extend([ws_type] * len(ids))
+            if not ws_ids:
+                return [], []
+            busy = occupancy_matrix(day, ws_ids)
+        window = busy[:, to_minute(self.start_time) : to_minute(self.end_time)]
+        free = np.flatnonzero(~window.any(axis=1))
+        return [ws_ids[i] for i in free], [ws_types[i] for i in free]
+
+    def plan(self):
+        booked = self._already_booked()
+        roster = [
+            email
+            for email in office_roster(self.org_id, parse_date(self.date_str))
+            if email not in booked
+        ]
+        desk_ids, desk_types = self._free_desks()
+        n = min(len(roster), len(desk_ids))
+        assignments = [
+            {
+                "required_id": roster[i],
+                "workspace_ID": desk_ids[i],
+                "workspace_type": desk_types[i],
+            }
+            for i in range(n)
+        ]
+        return {
+            "date": self.date_str,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "assigned": assignments,
+            "unassigned": roster[n:],
+            "already_booked": len(booked),
+        }
+
+    def commit(self, assignments):
+        """Write one booking per assignment in Firestore-sized batches."""
+        pending = []
+        for assignment in assignments:
+            booking = {
+                "workspace_ID": assignment["workspace_ID"],
+                "required_id": assignment["required_id"],
+                "start_time": self.start_time,
+                "end_time": self.end_time,
+                "purpose": ALLOCATION_PURPOSE,
+                "date": self.date_str,
+                "start_at": self.start_at,
+                "end_at": self.end_at,
+                "timestamp": SERVER_TIMESTAMP,
+            }
+            pending.append((bookings.new_id(self.org_id), booking))
+            if len(pending) == BATCH_SIZE:
+                self._write(pending)
+                pending = []
+        self._write(pending)
+
+    def _write(self, docs):
+        if not docs:
+            return
+        bookings.set_many(self.org_id, docs)
+        for booking_id, booking in docs:
+            change_feed.booking_created(self.org_id, booking_id, booking)
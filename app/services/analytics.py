@@ -0,0 +1,336 @@
+"""Utilization rollups behind the analytics dashboard.
+
+Each day gets one Analytics_rollups document holding 24-entry arrays per
+workspace type: booked workspace-minutes per hour and visitors per hour,
+next to workspace and booking counts. Booking and visitor writes only mark
+their day dirty. A background thread recomputes every dirty day once per
+ANALYTICS_FLUSH_INTERVAL from that day's documents, so a burst of writes
+costs one recomputation. The dashboard reads the precomputed documents and
+summarizes them with NumPy.
+
+Rollups use the workspace inventory at the time they are computed.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from app.config import Config
+from app.services.booking_index import DayIndex
+from app.services.occupancy import MINUTES_PER_DAY, occupancy_matrix
+from app.services.schedules import iter_merged, schedule_expander
+from app.storage.repositories import (
+    analytics_rollups,
+    attendance,
+    bookings,
+    visitors,
+    workspaces,
+)
+from app.utils.bulk_import import BATCH_SIZE
+from app.utils.dates import DATE_FORMAT, parse_date, today_str
+from app.utils.db_utils import SERVER_TIMESTAMP
+from app.utils.enums import WorkspaceType, WorkStatus
+
+HOURS_PER_DAY = 24
+WORKSPACE_TYPES = [t.value for t in WorkspaceType]
+ATTENDANCE_STATUSES = [s.value for s in WorkStatus if s is not WorkStatus.NULL]
+# Days on either side of today whose rollups a schedule change recomputes.
+SCHEDULE_ROLLUP_DAYS = 366
+
+
+def visit_time(data):
+    return data.get("visit_date") or data.get("timestamp")
+
+
+def day_rollup(date_str, ws_types, day_bookings, visit_times):
+    """Rollup document for one day.
+
+    `ws_types` maps workspace id to type, `day_bookings` are booking dicts
+    (one-off and recurring) and `visit_times` the datetimes of the day's
+    visitors.
+    """
+    day = DayIndex()
+    for ws_id, ws_type in ws_types.items():
+        day.add_workspace(ws_id, ws_type)
+    booking_counts = dict.fromkeys(WORKSPACE_TYPES, 0)
+    users = set()
+    for i, b in enumerate(day_bookings):
+        ws_type = ws_types.get(b.get("workspace_ID"))
+        if ws_type not in booking_counts:
+            continue
+        day.add_booking(
+            b.get("booking_id", i), b["workspace_ID"], b["start_time"], b["end_time"]
+        )
+        booking_counts[ws_type] += 1
+        users.add(b.get("required_id"))
+
+    ws_ids = list(ws_types)
+    # Booked minutes per workspace and hour, then summed per type.
+    hourly = (
+        occupancy_matrix(day, ws_ids)
+        .reshape(len(ws_ids), HOURS_PER_DAY, MINUTES_PER_DAY // HOURS_PER_DAY)
+        .sum(axis=2)
+    )
+    types = np.array([ws_types[ws_id] for ws_id in ws_ids], dtype=object)
+    booked_minutes = {
+        t: hourly[types == t].sum(axis=0).astype(int).tolist() for t in WORKSPACE_TYPES
+    }
+
+    visitors_by_hour = np.bincount(
+        np.array([t.hour for t in visit_times], dtype=int), minlength=HOURS_PER_DAY
+    )
+    return {
+        "date": date_str,
+        "workspaces": {t: int((types == t).sum()) for t in WORKSPACE_TYPES},
+        "bookings": booking_counts,
+        "booked_minutes": booked_minutes,
+        "unique_users": len(users),
+        "visitors": visitors_by_hour.tolist(),
+        "updated_at": SERVER_TIMESTAMP,
+    }
+
+
+def attendance_rollup(attendance_docs):
+    """Employees per status for each weekday, Monday first."""
+    counts = {s: [0] * 7 for s in ATTENDANCE_STATUSES}
+    for doc in attendance_docs:
+        data = doc.to_dict()
+        for weekday in range(7):
+            status = attendance.status_on(data, weekday)
+            if status in counts:
+                counts[status][weekday] += 1
+    return {"counts": counts, "updated_at": SERVER_TIMESTAMP}
+
+
+def _workspace_types(org_id):
+    return {ws.id: ws.to_dict().get("workspace_type") for ws in workspaces.all(org_id)}
+
+
+def dates_between(start_date, end_date):
+    """Every YYYY-MM-DD from start_date through end_date."""
+    first, last = parse_date(start_date), parse_date(end_date)
+    return [
+        (first + timedelta(days=i)).strftime(DATE_FORMAT)
+        for i in range((last - first).days + 1)
+    ]
+
+
+def schedule_rollup_range(valid_from=None):
+    """(first, last) dates whose rollups a schedule change can affect.
+
+    The new pattern applies from valid_from and the one it replaces to any
+    day, so the range runs from the earlier of valid_from and today through
+    SCHEDULE_ROLLUP_DAYS ahead. Older days need rebuild-analytics.
+    """
+    today = parse_date(today_str())
+    first = today
+    if valid_from:
+        first = max(
+            min(parse_date(valid_from), today),
+            today - timedelta(days=SCHEDULE_ROLLUP_DAYS),
+        )
+    last = today + timedelta(days=SCHEDULE_ROLLUP_DAYS - 1)
+    return first.strftime(DATE_FORMAT), last.strftime(DATE_FORMAT)
+
+
+def compute_day(org_id, date_str, ws_types=None):
+    one_off = [
+        {"booking_id": b.id, **b.to_dict()} for b in bookings.on_date(org_id, date_str)
+    ]
+    day_bookings = list(
+        iter_merged(one_off, schedule_expander.for_day(org_id, date_str))
+    )
+    # Firestore returns timestamps timezone-aware, so the bounds must be too.
+    start = datetime.combine(
+        parse_date(date_str), datetime.min.time(), tzinfo=timezone.utc
+    )
+    visit_times = [
+        visit_time(v.to_dict())
+        for v in visitors.between(org_id, start, start + timedelta(days=1))
+    ]
+    if ws_types is None:
+        ws_types = _workspace_types(org_id)
+    return day_rollup(date_str, ws_types, day_bookings, visit_times)
+
+
+def rebuild(org_id, start_date=None, end_date=None):
+    """Recompute every rollup from history with one scan per collection.
+
+    Every date from start_date through end_date is written, including days
+    with only recurring bookings or nothing at all. A missing bound defaults
+    to the earliest or latest dated booking or visit, or today.
+
+    Returns the number of day documents written.
+    """
+
+    def in_range(date_str):
+        return (start_date is None or date_str >= start_date) and (
+            end_date is None or date_str <= end_date
+        )
+
+    by_date = defaultdict(list)
+    for b in bookings.all(org_id):
+        data = b.to_dict()
+        if "date" in data and in_range(data["date"]):
+            by_date[data["date"]].append({"booking_id": b.id, **data})
+
+    visits_by_date = defaultdict(list)
+    for v in visitors.all(org_id):
+        moment = visit_time(v.to_dict())
+        if isinstance(moment, datetime) and in_range(moment.strftime(DATE_FORMAT)):
+            visits_by_date[moment.strftime(DATE_FORMAT)].append(moment)
+
+    ws_types = _workspace_types(org_id)
+    pending, written = [], 0
+    known = set(by_date) | set(visits_by_date) | {today_str()}
+    for date_str in dates_between(start_date or min(known), end_date or max(known)):
+        day_bookings = list(
+            iter_merged(by_date[date_str], schedule_expander.for_day(org_id, date_str))
+        )
+        rollup = day_rollup(date_str, ws_types, day_bookings, visits_by_date[date_str])
+        pending.append((date_str, rollup))
+        if len(pending) == BATCH_SIZE:
+            analytics_rollups.set_many(org_id, pending)
+            written += len(pending)
+            pending = []
+    if pending:
+        analytics_rollups.set_many(org_id, pending)
+        written += len(pending)
+
+    analytics_rollups.set(
+        org_id,
+        analytics_rollups.attendance_doc_id,
+        attendance_rollup(attendance.all(org_id)),
+    )
+    return written
+
+
+def _percentiles(values):
+    if values.size == 0:
+        return 0.0, 0.0
+    p50, p95 = np.percentile(values, [50, 95])
+    return float(p50), float(p95)
+
+
+def summarize(day_docs, attendance_doc=None):
+    """Dashboard figures for a list of day rollup dicts."""
+    days = sorted(day_docs, key=lambda d: d["date"])
+    zeros = [0] * HOURS_PER_DAY
+    utilization = {}
+    booked_hours = 0.0
+    for t in WORKSPACE_TYPES:
+        booked = np.array(
+            [d.get("booked_minutes", {}).get(t, zeros) for d in days], dtype=float
+        ).reshape(len(days), HOURS_PER_DAY)
+        capacity = np.array(
+            [d.get("workspaces", {}).get(t, 0) for d in days], dtype=float
+        ).reshape(len(days), 1) * (MINUTES_PER_DAY // HOURS_PER_DAY)
+        hourly = np.divide(
+            booked, capacity, out=np.zeros_like(booked), where=capacity > 0
+        )
+        # Only hours with any booking count toward the distribution, so the
+        # empty night does not drag every percentile to zero.
+        p50, p95 = _percentiles(hourly[hourly > 0])
+        profile = hourly.mean(axis=0) if len(days) else np.zeros(HOURS_PER_DAY)
+        booked_hours += booked.sum() / 60
+        utilization[t] = {
+            "bookings": int(sum(d.get("bookings", {}).get(t, 0) for d in days)),
+            "mean_percent": round(float(profile.mean()) * 100, 2),
+            "p50_percent": round(p50 * 100, 2),
+            "p95_percent": round(p95 * 100, 2),
+            "peak_hour": int(profile.argmax()) if profile.any() else None,
+            "by_hour_percent": np.round(profile * 100, 2).tolist(),
+        }
+
+    users = np.array([d.get("unique_users", 0) for d in days], dtype=float)
+    visits = np.array([d.get("visitors", zeros) for d in days], dtype=int).reshape(
+        len(days), HOURS_PER_DAY
+    )
+    return {
+        "days": len(days),
+        "booked_hours": round(float(booked_hours), 2),
+        "daily_active_users": {
+            "mean": round(float(users.mean()), 2) if users.size else 0,
+            "max": int(users.max()) if users.size else 0,
+        },
+        "visitors": {
+            "total": int(visits.sum()),
+            "by_hour": visits.sum(axis=0).tolist(),
+        },
+        "utilization": utilization,
+        "attendance": (attendance_doc or {}).get("counts", {}),
+    }
+
+
+class RollupWriter:
+    """Coalesces change notifications and recomputes dirty rollups."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._dirty = set()  # (org_id, date) or (org_id, None) for attendance
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def mark_day(self, org_id, date_str):
+        if date_str:
+            self._mark((org_id, date_str))
+
+    def mark_days(self, org_id, start_date, end_date):
+        with self._lock:
+            self._dirty.update(
+                (org_id, date_str) for date_str in dates_between(start_date, end_date)
+            )
+        self._ensure_started()
+
+    def mark_attendance(self, org_id):
+        self._mark((org_id, None))
+
+    def _mark(self, key):
+        with self._lock:
+            self._dirty.add(key)
+        self._ensure_started()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="analytics-rollups", daemon=True
+                )
+                self._thread.start()
+
+    def flush(self):
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        ws_types = {}
+        for org_id, date_str in sorted(dirty, key=lambda k: (k[0], k[1] or "")):
+            try:
+                if date_str is None:
+                    analytics_rollups.set(
+                        org_id,
+                        analytics_rollups.attendance_doc_id,
+                        attendance_rollup(attendance.all(org_id)),
+                    )
+                else:
+                    # One inventory read per org, however many days are dirty.
+                    if org_id not in ws_types:
+                        ws_types[org_id] = _workspace_types(org_id)
+                    analytics_rollups.set(
+                        org_id,
+                        date_str,
+                        compute_day(org_id, date_str, ws_types[org_id]),
+                    )
+            except Exception as e:
+                print(f"Analytics rollup for {org_id} {date_str} failed: {e}")
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+
+rollup_writer = RollupWriter(Config.ANALYTICS_FLUSH_INTERVAL)
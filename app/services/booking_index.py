@@ -0,0 +1,346 @@
+import bisect
+import threading
+
+from app.services import versions
+from app.services.schedules import merge_bookings, schedule_expander
+from app.storage.repositories import bookings, workspaces
+from app.utils.ttl_cache import TTLCache
+
+# Seconds before a day index is reloaded from Firestore. Callers that pass
+# the org version see other workers' writes sooner (see BookingIndex).
+INDEX_TTL = 300
+# Maximum number of (org_id, date) indexes held in memory.
+INDEX_MAX_ENTRIES = 512
+DAY_START = "00:00"
+# Sorts after every "HH:MM" time, so a day's last free gap is open-ended.
+DAY_END = "24:00"
+
+
+class WorkspaceSchedule:
+    """Bookings of a single workspace on a single day.
+
+    Intervals are half-open [start, end) "HH:MM" strings kept sorted by start,
+    alongside a running maximum of end times so an overlap test is a single
+    bisect.
+    """
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.booking_ids = []
+        self.max_ends = []
+
+    def add(self, booking_id, start, end):
+        i = bisect.bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.booking_ids.insert(i, booking_id)
+        self.max_ends.insert(i, end)
+        self._rebuild_max_ends(i)
+
+    def remove(self, booking_id):
+        try:
+            i = self.booking_ids.index(booking_id)
+        except ValueError:
+            return False
+        del self.starts[i]
+        del self.ends[i]
+        del self.booking_ids[i]
+        del self.max_ends[i]
+        self._rebuild_max_ends(i)
+        return True
+
+    def is_free(self, start, end):
+        # Only bookings starting before `end` can overlap; among those, the
+        # latest end decides.
+        i = bisect.bisect_left(self.starts, end)
+        return i == 0 or self.max_ends[i - 1] <= start
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _rebuild_max_ends(self, i):
+        running = self.max_ends[i - 1] if i > 0 else ""
+        for j in range(i, len(self.ends)):
+            running = max(running, self.ends[j])
+            self.max_ends[j] = running
+
+
+def free_gaps(schedule):
+    """Maximal [start, end) stretches of the day outside a schedule's bookings."""
+    gaps = []
+    cursor = DAY_START
+    if schedule is not None:
+        for start, end in zip(schedule.starts, schedule.ends):
+            if start > cursor:
+                gaps.append((cursor, start))
+            cursor = max(cursor, end)
+    if cursor < DAY_END:
+        gaps.append((cursor, DAY_END))
+    return gaps
+
+
+class FreeGaps:
+    """Free gaps of every workspace of one type.
+
+    Gaps are kept sorted by start alongside a running maximum of their ends,
+    like WorkspaceSchedule, so whether any workspace of the type is free for
+    [start, end) is a single bisect: some gap starting at or before `start`
+    must reach `end`.
+    """
+
+    def __init__(self):
+        self.gaps = []  # (start, end, ws_id), sorted
+        self.starts = []
+        self.max_ends = []
+
+    def replace(self, gaps_by_workspace):
+        """Swap in new gaps for the workspaces in {ws_id: gaps}."""
+        gaps = [g for g in self.gaps if g[2] not in gaps_by_workspace]
+        for ws_id, ws_gaps in gaps_by_workspace.items():
+            gaps.extend((start, end, ws_id) for start, end in ws_gaps)
+        gaps.sort()
+        self.gaps = gaps
+        self.starts = [start for start, _, _ in gaps]
+        self.max_ends = []
+        running = ""
+        for _, end, _ in gaps:
+            running = max(running, end)
+            self.max_ends.append(running)
+
+    def fits(self, start, end):
+        i = bisect.bisect_right(self.starts, start)
+        return i > 0 and self.max_ends[i - 1] >= end
+
+
+class DayIndex:
+    """All workspaces and bookings of one org on one day.
+
+    Per workspace type, the free gaps of its workspaces are indexed for
+    any_free(). Writes only mark a workspace's gaps stale; they are
+    recomputed on the next any_free() for its type.
+    """
+
+    def __init__(self, version=None):
+        self.workspace_types = {}
+        self.by_type = {}
+        self.schedules = {}
+        self.bookings = {}
+        # Org version (app/services/versions.py) the day is known current at.
+        self.version = version
+        self._free = {}  # ws_type -> FreeGaps
+        self._stale = {}  # ws_type -> ws_ids whose gaps need recomputing
+
+    def add_workspace(self, ws_id, ws_type):
+        old_type = self.workspace_types.get(ws_id)
+        if old_type is not None:
+            self.by_type.get(old_type, set()).discard(ws_id)
+            self._stale.setdefault(old_type, set()).add(ws_id)
+        self.workspace_types[ws_id] = ws_type
+        self.by_type.setdefault(ws_type, set()).add(ws_id)
+        self._stale.setdefault(ws_type, set()).add(ws_id)
+
+    def add_booking(self, booking_id, ws_id, start, end):
+        if booking_id in self.bookings:
+            self.remove_booking(booking_id)
+        self.schedules.setdefault(ws_id, WorkspaceSchedule()).add(
+            booking_id, start, end
+        )
+        self.bookings[booking_id] = ws_id
+        self._mark_stale(ws_id)
+
+    def remove_booking(self, booking_id):
+        ws_id = self.bookings.pop(booking_id, None)
+        if ws_id is None:
+            return None
+        schedule = self.schedules.get(ws_id)
+        if schedule is not None:
+            schedule.remove(booking_id)
+            if not schedule:
+                del self.schedules[ws_id]
+        self._mark_stale(ws_id)
+        return ws_id
+
+    def _mark_stale(self, ws_id):
+        ws_type = self.workspace_types.get(ws_id)
+        if ws_type is not None:
+            self._stale.setdefault(ws_type, set()).add(ws_id)
+
+    def is_free(self, ws_id, start, end):
+        schedule = self.schedules.get(ws_id)
+        return schedule is None or schedule.is_free(start, end)
+
+    def any_free(self, ws_type, start, end):
+        return self._free_gaps(ws_type).fits(start, end)
+
+    def _free_gaps(self, ws_type):
+        gaps = self._free.setdefault(ws_type, FreeGaps())
+        stale = self._stale.pop(ws_type, None)
+        if stale:
+            gaps.replace(
+                {
+                    ws_id: (
+                        free_gaps(self.schedules.get(ws_id))
+                        if self.workspace_types.get(ws_id) == ws_type
+                        else []
+                    )
+                    for ws_id in stale
+                }
+            )
+        return gaps
+
+
+class BookingIndex:
+    """LRU of DayIndex objects keyed by (org_id, date).
+
+    Days load from Firestore outside the lock. Changes that arrive while a
+    load is in flight are logged against it and replayed onto the loaded day
+    before it is stored, so a booking written mid-load is never dropped.
+
+    Each day records the org version it was loaded at. Local writes move it
+    along with this process's own bumps, so a cached day that is behind the
+    org version passed to get() missed another worker's write and is
+    reloaded. The booking checks always pass the current version.
+    """
+
+    def __init__(self, ttl=INDEX_TTL, max_entries=INDEX_MAX_ENTRIES):
+        self._days = TTLCache(ttl, max_entries)
+        self._lock = threading.RLock()
+        # (org_id, date) -> change logs of the loads in flight for that day;
+        # a None entry marks the day invalidated.
+        self._loading = {}
+
+    def get(self, org_id, date, version=None):
+        """The day's index, reloaded if it is behind `version` when given."""
+        key = (org_id, date)
+        day = self._days.get(key)
+        if day is not None and self._is_current(day, version):
+            return day
+        if version is None:
+            version = versions.current(org_id)
+        log = []
+        with self._lock:
+            self._loading.setdefault(key, []).append(log)
+        try:
+            day = self._load(org_id, date, version)
+        except BaseException:
+            with self._lock:
+                self._end_load(key, log)
+            raise
+        # One locked section: a change arriving between dropping the log and
+        # storing the day would otherwise reach neither.
+        with self._lock:
+            self._end_load(key, log)
+            # Replaying is idempotent, whether or not the load saw a change.
+            for change in log:
+                if change is None:
+                    return day  # Invalidated mid-load: use it, don't keep it.
+                change(day)
+            cached = self._days.get(key)
+            if cached is not None and self._is_current(cached, day.version):
+                return cached
+            self._days.set(key, day)
+        return day
+
+    @staticmethod
+    def _is_current(day, version):
+        # Without a version (none asked for, or Redis unreachable) the TTL
+        # alone bounds staleness.
+        if version is None:
+            return True
+        return day.version is not None and day.version >= version
+
+    def on_version_bumped(self, org_id, version):
+        # Only this process's writes happened since the day's version, and
+        # they were applied to it as they were made.
+        with self._lock:
+            for (day_org, _), day in self._days.items():
+                if day_org == org_id and day.version == version - 1:
+                    day.version = version
+
+    def _end_load(self, key, log):
+        # Logs compare by value, so remove this load's by identity.
+        logs = self._loading[key]
+        logs[:] = [other for other in logs if other is not log]
+        if not logs:
+            del self._loading[key]
+
+    def _log(self, matches, change):
+        for key, logs in self._loading.items():
+            if matches(key):
+                for log in logs:
+                    log.append(change)
+
+    def read_lock(self):
+        """Hold while reading a DayIndex this index hands out; it mutates them."""
+        return self._lock
+
+    def is_any_free(self, org_id, date, ws_type, start, end):
+        day = self.get(org_id, date, versions.current(org_id))
+        with self._lock:
+            return day.any_free(ws_type, start, end)
+
+    def is_free(self, org_id, date, ws_id, start, end):
+        day = self.get(org_id, date, versions.current(org_id))
+        with self._lock:
+            return day.is_free(ws_id, start, end)
+
+    def on_booking_created(self, org_id, booking_id, booking):
+        def change(day):
+            day.add_booking(
+                booking_id,
+                booking["workspace_ID"],
+                booking["start_time"],
+                booking["end_time"],
+            )
+
+        self._on_day_changed((org_id, booking.get("date")), change)
+
+    def on_booking_deleted(self, org_id, booking_id, booking):
+        self._on_day_changed(
+            (org_id, booking.get("date")), lambda day: day.remove_booking(booking_id)
+        )
+
+    def _on_day_changed(self, key, change):
+        with self._lock:
+            day = self._days.get(key)
+            if day is not None:
+                change(day)
+            self._log(lambda loading: loading == key, change)
+
+    def on_workspace_created(self, org_id, ws_id, ws_type):
+        def change(day):
+            day.add_workspace(ws_id, ws_type)
+
+        with self._lock:
+            for (day_org, _), day in self._days.items():
+                if day_org == org_id:
+                    change(day)
+            self._log(lambda key: key[0] == org_id, change)
+
+    def invalidate(self, org_id=None):
+        with self._lock:
+            if org_id is None:
+                self._days.clear()
+            else:
+                self._days.pop_where(lambda key: key[0] == org_id)
+            self._log(lambda key: org_id is None or key[0] == org_id, None)
+
+    def _load(self, org_id, date, version):
+        day = DayIndex(version)
+        for ws in workspaces.all(org_id):
+            day.add_workspace(ws.id, ws.to_dict().get("workspace_type"))
+
+        one_off = [
+            {"booking_id": b.id, **b.to_dict()} for b in bookings.on_date(org_id, date)
+        ]
+        occurrences = schedule_expander.for_day(org_id, date)
+        for b in merge_bookings(one_off, occurrences):
+            day.add_booking(
+                b["booking_id"], b["workspace_ID"], b["start_time"], b["end_time"]
+            )
+        return day
+
+
+booking_index = BookingIndex()
+versions.on_bump(booking_index.on_version_bumped)
@@ -0,0 +1,51 @@
+"""Fan-out of writes to the in-process caches, analytics rollups and org versions."""
+
+from app.services import versions
+from app.services.analytics import rollup_writer, schedule_rollup_range
+from app.services.booking_index import booking_index
+from app.services.heatmap import heatmap_cache
+from app.services.occupancy import occupancy_cache
+from app.services.schedules import schedule_expander
+from app.utils.dates import DATE_FORMAT, today_str
+
+
+def booking_created(org_id, booking_id, booking):
+    booking_index.on_booking_created(org_id, booking_id, booking)
+    occupancy_cache.on_booking_changed(org_id, booking)
+    heatmap_cache.on_booking_changed(org_id, booking)
+    rollup_writer.mark_day(org_id, booking.get("date"))
+    versions.bump(org_id)
+
+
+def booking_deleted(org_id, booking_id, booking):
+    booking_index.on_booking_deleted(org_id, booking_id, booking)
+    occupancy_cache.on_booking_changed(org_id, booking)
+    heatmap_cache.on_booking_changed(org_id, booking)
+    rollup_writer.mark_day(org_id, booking.get("date"))
+    versions.bump(org_id)
+
+
+def workspace_created(org_id, ws_id, ws_type):
+    booking_index.on_workspace_created(org_id, ws_id, ws_type)
+    occupancy_cache.on_workspace_created(org_id, ws_type)
+    heatmap_cache.invalidate(org_id)
+    rollup_writer.mark_day(org_id, today_str())
+    versions.bump(org_id)
+
+
+def schedule_changed(org_id, valid_from=None):
+    # A pattern can touch any future day, so drop the org's cached days.
+    schedule_expander.invalidate(org_id)
+    booking_index.invalidate(org_id)
+    occupancy_cache.invalidate(org_id)
+    rollup_writer.mark_days(org_id, *schedule_rollup_range(valid_from))
+    versions.bump(org_id)
+
+
+def attendance_changed(org_id):
+    rollup_writer.mark_attendance(org_id)
+
+
+def visitor_created(org_id, visit_date):
+    rollup_writer.mark_day(org_id, visit_date.strftime(DATE_FORMAT))
+    versions.bump(org_id)
@@ -0,0 +1,74 @@
+"""Tier and tool entitlements used by requires_tier / requires_tool.
+
+An employee's tier is the "tier" on their Employee_data document, falling
+back to the organization document and then Config.DEFAULT_TIER. Tools are
+the union of "tools_access" and "features_availed". Both are embedded in
+JWT claims when tokens are issued, so gated requests normally resolve
+nothing; tokens minted before this existed fall back to the cache below.
+Changes reach existing sessions on the next /auth/refresh.
+"""
+
+from app.config import Config
+from app.storage.repositories import employees, organizations
+from app.utils.bulk_import import split_list
+from app.utils.ttl_cache import TTLCache
+
+TIER_CLAIM = "tier"
+TOOLS_CLAIM = "tools"
+
+
+class EntitlementCache:
+    def __init__(self, ttl, max_entries):
+        self._users = TTLCache(ttl, max_entries)
+        self._org_tiers = TTLCache(ttl, max_entries)
+
+    def _org_tier(self, org_id):
+        tier = self._org_tiers.get(org_id)
+        if tier is None:
+            doc = organizations.get(org_id)
+            tier = (doc.to_dict() or {}).get("tier") if doc.exists else None
+            tier = tier or Config.DEFAULT_TIER
+            self._org_tiers.set(org_id, tier)
+        return tier
+
+    def resolve(self, org_id, email):
+        """{"tier": str, "tools": [str]} for an employee, cached per org."""
+        key = (org_id, email)
+        entitlements = self._users.get(key)
+        if entitlements is not None:
+            return entitlements
+
+        doc = employees.find_by_email(org_id, email) if org_id and email else None
+        data = doc.to_dict() if doc is not None else {}
+        tools = split_list(data.get("tools_access")) + split_list(
+            data.get("features_availed")
+        )
+        entitlements = {
+            "tier": data.get("tier") or self._org_tier(org_id),
+            "tools": sorted(set(tools)),
+        }
+        self._users.set(key, entitlements)
+        return entitlements
+
+    def claims(self, org_id, email):
+        entitlements = self.resolve(org_id, email)
+        return {TIER_CLAIM: entitlements["tier"], TOOLS_CLAIM: entitlements["tools"]}
+
+    def invalidate(self, org_id, email=None):
+        if email is not None:
+            self._users.pop((org_id, email))
+            return
+        self._org_tiers.pop(org_id)
+        self._users.pop_where(lambda key: key[0] == org_id)
+
+
+entitlements = EntitlementCache(
+    Config.ENTITLEMENT_CACHE_TTL, Config.ENTITLEMENT_CACHE_MAX_ENTRIES
+)
+
+
+def current_entitlements(claims, identity):
+    """Entitlements from the verified token, or the cache for older tokens."""
+    if TIER_CLAIM in claims and TOOLS_CLAIM in claims:
+        return {"tier": claims[TIER_CLAIM], "tools": claims[TOOLS_CLAIM]}
+    return entitlements.resolve(claims.get("org_id"), identity)
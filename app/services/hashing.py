@@ -0,0 +1,116 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+
+from app.config import Config
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing queue is full for longer than the queue timeout."""
+
+
+def _hash_password(password):
+    started = time.time()
+    hashed = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    return hashed, started, time.time()
+
+
+def _check_password(hashed_password, password):
+    started = time.time()
+    ok = bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8"))
+    return ok, started, time.time()
+
+
+class HashingPool:
+    """Bounded process pool for bcrypt work.
+
+    At most `max_pending` jobs may be queued or running at once; callers wait
+    up to `queue_timeout` seconds for a slot and then get HashingBusy, which
+    create_app turns into a 503. With `workers=0` hashing runs inline on the
+    calling thread.
+    """
+
+    def __init__(self, workers, max_pending, queue_timeout):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "jobs": 0,
+            "rejected": 0,
+            "queue_seconds_total": 0.0,
+            "queue_seconds_max": 0.0,
+            "hash_seconds_total": 0.0,
+            "hash_seconds_max": 0.0,
+        }
+
+    def _get_executor(self):
+        # Executors are not fork-safe; each worker process gets its own.
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                    self._pid = os.getpid()
+        return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._stats_lock:
+                self._stats["rejected"] += 1
+            raise HashingBusy("Password hashing queue is full")
+        try:
+            submitted = time.time()
+            if self.workers:
+                value, started, finished = (
+                    self._get_executor().submit(fn, *args).result()
+                )
+            else:
+                value, started, finished = fn(*args)
+        finally:
+            self._slots.release()
+
+        self._record(max(started - submitted, 0.0), finished - started)
+        return value
+
+    def _record(self, queue_seconds, hash_seconds):
+        with self._stats_lock:
+            stats = self._stats
+            stats["jobs"] += 1
+            stats["queue_seconds_total"] += queue_seconds
+            stats["queue_seconds_max"] = max(stats["queue_seconds_max"], queue_seconds)
+            stats["hash_seconds_total"] += hash_seconds
+            stats["hash_seconds_max"] = max(stats["hash_seconds_max"], hash_seconds)
+
+    def hash_password(self, password):
+        return self._run(_hash_password, password)
+
+    def check_password(self, hashed_password, password):
+        return self._run(_check_password, hashed_password, password)
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+hashing_pool = HashingPool(
+    workers=Config.HASH_WORKERS,
+    max_pending=Config.HASH_MAX_PENDING,
+    queue_timeout=Config.HASH_QUEUE_TIMEOUT,
+)
@@ -0,0 +1,109 @@
+"""Workspace x time-slot occupancy bitmaps for the heatmap endpoint.
+
+Each (org_id, date) is rasterized once from the booking index into a boolean
+matrix with one row per workspace and one column per SLOT_MINUTES slot; a
+slot is set when any booking overlaps it. A date range is the per-day
+matrices side by side, bit-packed and base64 encoded (optionally zlib
+compressed), so 500 desks over 30 days is 180 KB before compression.
+"""
+
+import base64
+import threading
+import zlib
+from datetime import timedelta
+
+import numpy as np
+
+from app.services import versions
+from app.services.booking_index import INDEX_MAX_ENTRIES, INDEX_TTL, booking_index
+from app.services.occupancy import MINUTES_PER_DAY, occupancy_matrix
+from app.utils.dates import DATE_FORMAT, parse_date
+from app.utils.ttl_cache import TTLCache
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = MINUTES_PER_DAY // SLOT_MINUTES
+MAX_RANGE_DAYS = 62
+
+
+class DayBitmap:
+    def __init__(self, day):
+        self.day = day
+        self.ws_ids = sorted(day.workspace_types)
+        self.rows = {ws_id: i for i, ws_id in enumerate(self.ws_ids)}
+        busy = occupancy_matrix(day, self.ws_ids)
+        self.bits = busy.reshape(len(self.ws_ids), SLOTS_PER_DAY, SLOT_MINUTES).any(
+            axis=2
+        )
+
+
+class HeatmapCache:
+    """Per-(org_id, date) DayBitmap, rebuilt after bookings change.
+
+    Bitmaps follow the booking index's day, which day() asks for at the
+    current org version, so another worker's writes rebuild them too.
+    """
+
+    def __init__(self, ttl=INDEX_TTL, max_entries=INDEX_MAX_ENTRIES):
+        self._days = TTLCache(ttl, max_entries)
+        self._lock = threading.Lock()
+
+    def day(self, org_id, date, version=None):
+        day = booking_index.get(org_id, date, version)
+        # DayBitmap reads the day index, which bookings mutate under its lock.
+        with booking_index.read_lock(), self._lock:
+            bitmap = self._days.get((org_id, date))
+            if bitmap is None or bitmap.day is not day:
+                bitmap = DayBitmap(day)
+                self._days.set((org_id, date), bitmap)
+            return bitmap
+
+    def matrix(self, org_id, start_date, end_date, ws_type=None):
+        """(ws_ids, workspace_types, dates, bool matrix (len(ws_ids), days * slots))."""
+        first, last = parse_date(start_date), parse_date(end_date)
+        dates = [
+            (first + timedelta(days=i)).strftime(DATE_FORMAT)
+            for i in range((last - first).days + 1)
+        ]
+        version = versions.current(org_id)
+        bitmaps = [self.day(org_id, date, version) for date in dates]
+
+        workspace_types = {}
+        for bitmap in bitmaps:
+            workspace_types.update(bitmap.day.workspace_types)
+        ws_ids = sorted(
+            ws_id
+            for ws_id, t in workspace_types.items()
+            if ws_type is None or t == ws_type
+        )
+
+        matrix = np.zeros((len(ws_ids), len(dates), SLOTS_PER_DAY), dtype=bool)
+        for d, bitmap in enumerate(bitmaps):
+            rows = [bitmap.rows.get(ws_id, -1) for ws_id in ws_ids]
+            present = np.array([r >= 0 for r in rows], dtype=bool)
+            if present.any():
+                source = np.array(rows)[present]
+                matrix[present, d] = bitmap.bits[source]
+        shape = (len(ws_ids), len(dates) * SLOTS_PER_DAY)
+        return ws_ids, workspace_types, dates, matrix.reshape(shape)
+
+    def on_booking_changed(self, org_id, booking):
+        self._days.pop((org_id, booking.get("date")))
+
+    def invalidate(self, org_id=None):
+        if org_id is None:
+            self._days.clear()
+        else:
+            self._days.pop_where(lambda key: key[0] == org_id)
+
+
+def encode_bitmap(matrix, compress=True):
+    """Row-major packbits of `matrix`, base64 encoded; returns (encoding, data)."""
+    packed = np.packbits(matrix, axis=None).tobytes()
+    encoding = "packbits"
+    if compress:
+        packed = zlib.compress(packed)
+        encoding += "+zlib"
+    return encoding + "+base64", base64.b64encode(packed).decode("ascii")
+
+
+heatmap_cache = HeatmapCache()
@@ -1,4 +1,8 @@
+import heapq
+import queue
 import smtplib
+import threading
+import time
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from app.config import Config
@@ -9,16 +13,160 @@ EMAIL_HOST_USER = Config.EMAIL_HOST_USER
 EMAIL_HOST_PASSWORD = Config.EMAIL_HOST_PASSWORD
 
 
+def build_message(to_email, subject, html_body):
+    msg = MIMEMultipart()
+    msg["From"] = EMAIL_HOST_USER or "no-reply@localhost"
+    msg["To"] = to_email
+    msg["Subject"] = subject
+
+    msg.attach(MIMEText(html_body, "html"))
+    return msg
+
+
+class MailDispatcher:
+    """Background SMTP sender with one persistent connection per process.
+
+    Requests only enqueue. A daemon thread drains the queue in batches of up
+    to `batch_size` messages over the same SMTP session, retries failed
+    messages with exponential backoff, and closes the session after
+    `idle_timeout` seconds without mail.
+    """
+
+    def __init__(self, batch_size, max_retries, backoff, idle_timeout, max_queue):
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.idle_timeout = idle_timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._retries = []  # heap of (retry_at, seq, attempt, msg)
+        self._seq = 0
+        self._smtp = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._idle = threading.Condition()
+        self.sent = 0
+        self.failed = 0
+
+    def send(self, msg):
+        self._ensure_started()
+        with self._idle:
+            self._pending += 1
+        try:
+            self._queue.put_nowait((0, msg))
+        except queue.Full:
+            self._done(failed=True)
+            print(f"Mail queue full, dropping mail to {msg['To']}")
+
+    def flush(self, timeout=None):
+        """Block until every queued message was sent or given up on."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="mail-dispatcher", daemon=True
+                )
+                self._thread.start()
+
+    def _done(self, failed=False):
+        with self._idle:
+            self._pending -= 1
+            if failed:
+                self.failed += 1
+            else:
+                self.sent += 1
+            self._idle.notify_all()
+
+    def _next_batch(self):
+        timeout = self.idle_timeout
+        if self._retries:
+            timeout = max(0.0, min(timeout, self._retries[0][0] - time.monotonic()))
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=timeout))
+        except queue.Empty:
+            pass
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        now = time.monotonic()
+        while self._retries and self._retries[0][0] <= now:
+            if len(batch) >= self.batch_size:
+                break
+            _, _, attempt, msg = heapq.heappop(self._retries)
+            batch.append((attempt, msg))
+        return batch
+
+    def _connection(self):
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except smtplib.SMTPException:
+                pass
+            self._close()
+
+        smtp = smtplib.SMTP(EMAIL_HOST, int(EMAIL_PORT), timeout=30)
+        if Config.EMAIL_USE_TLS:
+            smtp.starttls()
+        if EMAIL_HOST_USER and EMAIL_HOST_PASSWORD:
+            smtp.login(EMAIL_HOST_USER, EMAIL_HOST_PASSWORD)
+        self._smtp = smtp
+        return smtp
+
+    def _close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+    def _deliver(self, attempt, msg):
+        try:
+            self._connection().send_message(msg)
+        except (smtplib.SMTPException, OSError) as e:
+            self._close()
+            if attempt + 1 >= self.max_retries:
+                print(f"Giving up on mail to {msg['To']}: {e}")
+                self._done(failed=True)
+                return
+            retry_at = time.monotonic() + self.backoff * 2**attempt
+            self._seq += 1
+            heapq.heappush(self._retries, (retry_at, self._seq, attempt + 1, msg))
+            return
+        self._done()
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                if not self._retries:
+                    self._close()
+                continue
+            for attempt, msg in batch:
+                self._deliver(attempt, msg)
+
+
+mail_dispatcher = MailDispatcher(
+    batch_size=Config.EMAIL_BATCH_SIZE,
+    max_retries=Config.EMAIL_MAX_RETRIES,
+    backoff=Config.EMAIL_RETRY_BACKOFF,
+    idle_timeout=Config.EMAIL_IDLE_TIMEOUT,
+    max_queue=Config.EMAIL_MAX_QUEUE,
+)
+
+
 def send_mail(to_email, subject, html_body):
-    print(to_email, subject, html_body)
-    # msg = MIMEMultipart()
-    # msg["From"] = EMAIL_HOST_USER
-    # msg["To"] = to_email
-    # msg["Subject"] = subject
-
-    # msg.attach(MIMEText(html_body, "html"))
-
-    # with smtplib.SMTP(EMAIL_HOST, EMAIL_PORT) as server:
-    #     server.starttls()
-    #     server.login(EMAIL_HOST_USER, EMAIL_HOST_PASSWORD)
-    #     server.send_message(msg)
+    if not EMAIL_HOST:
+        # No SMTP server configured: log the mail instead of sending it.
+        print(to_email, subject, html_body)
+        return
+    mail_dispatcher.send(build_message(to_email, subject, html_body))
@@ -0,0 +1,158 @@
+import threading
+
+import numpy as np
+
+from app.services import versions
+from app.services.booking_index import booking_index, INDEX_TTL
+from app.utils.enums import WorkspaceType
+from app.utils.ttl_cache import TTLCache
+
+MINUTES_PER_DAY = 24 * 60
+# Maximum number of (org_id, date) snapshots held in memory.
+SNAPSHOT_MAX_ENTRIES = 512
+
+
+def minute_of(hhmm):
+    hours, minutes = hhmm.split(":")
+    return min(int(hours) * 60 + int(minutes), MINUTES_PER_DAY - 1)
+
+
+def to_minute(hhmm):
+    """Unclamped minute of day, so an "HH:MM" end maps to an exclusive bound."""
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def occupancy_matrix(day_index, ws_ids):
+    """Boolean (len(ws_ids), MINUTES_PER_DAY) matrix of booked minutes.
+
+    Bookings are half-open [start, end) like the booking index. Each one adds
+    +1 at its start and -1 at its end in a difference array, so a single
+    cumulative sum yields every workspace's occupancy.
+    """
+    rows, starts, ends = [], [], []
+    for row, ws_id in enumerate(ws_ids):
+        schedule = day_index.schedules.get(ws_id)
+        if schedule is None:
+            continue
+        for start, end in zip(schedule.starts, schedule.ends):
+            lo, hi = to_minute(start), to_minute(end)
+            if hi <= lo:
+                continue
+            rows.append(row)
+            starts.append(lo)
+            ends.append(hi)
+
+    diff = np.zeros((len(ws_ids), MINUTES_PER_DAY + 1), dtype=np.int32)
+    if rows:
+        rows = np.asarray(rows)
+        np.add.at(diff, (rows, np.asarray(starts)), 1)
+        np.add.at(diff, (rows, np.asarray(ends)), -1)
+    return np.cumsum(diff[:, :MINUTES_PER_DAY], axis=1) > 0
+
+
+def _covered_ranges(schedule):
+    """Merge a workspace's bookings into disjoint inclusive minute ranges."""
+    ranges = []
+    if schedule is None:
+        return ranges
+    for start, end in zip(schedule.starts, schedule.ends):
+        lo, hi = minute_of(start), minute_of(end)
+        if hi < lo:
+            continue
+        if ranges and lo <= ranges[-1][1] + 1:
+            ranges[-1][1] = max(ranges[-1][1], hi)
+        else:
+            ranges.append([lo, hi])
+    return ranges
+
+
+class OccupancySnapshot:
+    """Workspace totals per type and occupied-workspace counts per minute.
+
+    A workspace counts as occupied at minute m when one of its bookings has
+    start_time <= m <= end_time, matching the original Firestore range query.
+    """
+
+    def __init__(self, day):
+        self.day = day
+        self.totals = {t.value: 0 for t in WorkspaceType}
+        self.occupied = {t.value: [0] * MINUTES_PER_DAY for t in WorkspaceType}
+        self.ranges = {}
+        for ws_type, ws_ids in day.by_type.items():
+            if ws_type in self.totals:
+                self.totals[ws_type] = len(ws_ids)
+        for ws_id in day.schedules:
+            self.refresh_workspace(ws_id)
+
+    def refresh_workspace(self, ws_id):
+        ws_type = self.day.workspace_types.get(ws_id)
+        counts = self.occupied.get(ws_type)
+        if counts is None:
+            return
+        for lo, hi in self.ranges.pop(ws_id, ()):
+            for m in range(lo, hi + 1):
+                counts[m] -= 1
+        ranges = _covered_ranges(self.day.schedules.get(ws_id))
+        for lo, hi in ranges:
+            for m in range(lo, hi + 1):
+                counts[m] += 1
+        if ranges:
+            self.ranges[ws_id] = ranges
+
+    def add_workspace(self, ws_type):
+        if ws_type in self.totals:
+            self.totals[ws_type] += 1
+
+    def at(self, hhmm):
+        m = minute_of(hhmm)
+        return {
+            ws_type: (self.totals[ws_type], self.occupied[ws_type][m])
+            for ws_type in self.totals
+        }
+
+
+class OccupancyCache:
+    """Per-(org_id, date) OccupancySnapshot built on top of the booking index.
+
+    Snapshots read the booking index's DayIndex, so they are built and
+    refreshed under its lock, taken before this cache's own. get() asks the
+    index for a day current at the org version, read after the ETag's, so a
+    snapshot is never older than the tag it is served under.
+    """
+
+    def __init__(self, ttl=INDEX_TTL, max_entries=SNAPSHOT_MAX_ENTRIES):
+        self._snapshots = TTLCache(ttl, max_entries)
+        self._lock = threading.RLock()
+
+    def get(self, org_id, date):
+        key = (org_id, date)
+        day = booking_index.get(org_id, date, versions.current(org_id))
+        with booking_index.read_lock(), self._lock:
+            snapshot = self._snapshots.get(key)
+            # A reloaded day index means the snapshot was built from stale data.
+            if snapshot is None or snapshot.day is not day:
+                snapshot = OccupancySnapshot(day)
+                self._snapshots.set(key, snapshot)
+            return snapshot
+
+    def on_booking_changed(self, org_id, booking):
+        with booking_index.read_lock(), self._lock:
+            snapshot = self._snapshots.get((org_id, booking.get("date")))
+            if snapshot is not None:
+                snapshot.refresh_workspace(booking["workspace_ID"])
+
+    def on_workspace_created(self, org_id, ws_type):
+        with self._lock:
+            for (snap_org, _), snapshot in self._snapshots.items():
+                if snap_org == org_id:
+                    snapshot.add_workspace(ws_type)
+
+    def invalidate(self, org_id=None):
+        if org_id is None:
+            self._snapshots.clear()
+        else:
+            self._snapshots.pop_where(lambda key: key[0] == org_id)
+
+
+occupancy_cache = OccupancyCache()
@@ -0,0 +1,129 @@
+from datetime import timedelta
+
+from app.storage.repositories import schedules
+from app.utils.dates import DATE_FORMAT, parse_date
+from app.utils.enums import BookingPattern
+from app.utils.ttl_cache import TTLCache
+
+# date.weekday() -> BookingPattern value
+WEEKDAY_KEYS = [p.value for p in BookingPattern]
+# Seconds a loaded schedule list / expanded week stays cached per org.
+SCHEDULE_CACHE_TTL = 300
+SCHEDULE_CACHE_MAX_ENTRIES = 4096
+# Longest date window a single expansion request may ask for.
+MAX_WINDOW_DAYS = 366
+
+
+def _week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def occurrence_id(required_id, date_str):
+    return f"schedule:{required_id}:{date_str}"
+
+
+class ScheduleExpander:
+    """Expands Scheduling_data booking patterns into dated occurrences.
+
+    Schedules are read once per org and expanded lazily one ISO week at a
+    time, so a window query costs one Firestore read per org per TTL no
+    matter how many weeks a schedule spans. Occurrences use the same fields
+    as Workspace_booking_data documents plus "recurring": True.
+    """
+
+    def __init__(self, ttl=SCHEDULE_CACHE_TTL, max_entries=SCHEDULE_CACHE_MAX_ENTRIES):
+        self._schedules = TTLCache(ttl, max_entries)
+        self._weeks = TTLCache(ttl, max_entries)
+
+    def _org_schedules(self, org_id):
+        loaded = self._schedules.get(org_id)
+        if loaded is None:
+            loaded = [doc.to_dict() for doc in schedules.all(org_id)]
+            self._schedules.set(org_id, loaded)
+        return loaded
+
+    def _expand_week(self, org_id, monday):
+        key = (org_id, monday)
+        week = self._weeks.get(key)
+        if week is not None:
+            return week
+
+        week = []
+        days = [monday + timedelta(days=i) for i in range(7)]
+        for schedule in self._org_schedules(org_id):
+            pattern = set(schedule.get("booking_pattern") or ())
+            valid_from = schedule.get("valid_from")
+            valid_until = schedule.get("valid_until")
+            for day in days:
+                if WEEKDAY_KEYS[day.weekday()] not in pattern:
+                    continue
+                date_str = day.strftime(DATE_FORMAT)
+                if valid_from and date_str < valid_from:
+                    continue
+                if valid_until and date_str > valid_until:
+                    continue
+                week.append(
+                    {
+                        "booking_id": occurrence_id(schedule["required_id"], date_str),
+                        "workspace_ID": schedule["workspace_id"],
+                        "required_id": schedule["required_id"],
+                        "start_time": schedule["start_time"],
+                        "end_time": schedule["end_time"],
+                        "date": date_str,
+                        "recurring": True,
+                    }
+                )
+        self._weeks.set(key, week)
+        return week
+
+    def occurrences(self, org_id, start_date, end_date):
+        """Occurrences with start_date <= date <= end_date ("YYYY-MM-DD")."""
+        first, last = parse_date(start_date), parse_date(end_date)
+        monday = _week_start(first)
+        result = []
+        while monday <= last:
+            for occurrence in self._expand_week(org_id, monday):
+                if start_date <= occurrence["date"] <= end_date:
+                    result.append(occurrence)
+            monday += timedelta(days=7)
+        return result
+
+    def for_day(self, org_id, date_str):
+        return self.occurrences(org_id, date_str, date_str)
+
+    def invalidate(self, org_id):
+        self._schedules.pop(org_id)
+        self._weeks.pop_where(lambda key: key[0] == org_id)
+
+
+def _booking_key(b):
+    return (
+        b.get("required_id"),
+        b.get("workspace_ID"),
+        b.get("date"),
+        b.get("start_time"),
+        b.get("end_time"),
+    )
+
+
+def iter_merged(one_off, occurrences):
+    """Yield one-off booking dicts, then the occurrences they do not cover.
+
+    An occurrence is dropped when a one-off booking already covers the same
+    person, workspace, day and time (book_workspace writes both for the day
+    a schedule is created). `one_off` may be a lazy stream.
+    """
+    seen = set()
+    for booking in one_off:
+        seen.add(_booking_key(booking))
+        yield booking
+    for occurrence in occurrences:
+        if _booking_key(occurrence) not in seen:
+            yield occurrence
+
+
+def merge_bookings(one_off, occurrences):
+    return list(iter_merged(one_off, occurrences))
+
+
+schedule_expander = ScheduleExpander()
@@ -0,0 +1,98 @@
+"""Minimal local SMTP server that accepts every message and keeps it in memory.
+
+Point the app at it with EMAIL_HOST=localhost, EMAIL_PORT=1025 and
+EMAIL_USE_TLS=0. Run standalone with `python app/services/smtp_sink.py` to
+print received mail, or start it in-process via SMTPSink(port=0).start().
+"""
+
+import argparse
+import email
+import socketserver
+import threading
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        sink = self.server.sink
+        mail_from, rcpt_to = None, []
+        self.reply("220 smtp-sink ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").strip()
+            verb = command[:4].upper()
+            if verb in ("HELO", "EHLO"):
+                self.reply("250 smtp-sink")
+            elif verb == "MAIL":
+                mail_from, rcpt_to = command.split(":", 1)[1].strip(), []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                rcpt_to.append(command.split(":", 1)[1].strip())
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if not data_line or data_line in (b".\r\n", b".\n"):
+                        break
+                    if data_line.startswith(b".."):
+                        data_line = data_line[1:]
+                    lines.append(data_line)
+                sink.deliver(mail_from, rcpt_to, b"".join(lines))
+                self.reply("250 OK")
+            elif verb in ("RSET", "NOOP"):
+                if verb == "RSET":
+                    mail_from, rcpt_to = None, []
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class SMTPSink:
+    def __init__(self, host="127.0.0.1", port=1025, echo=False):
+        self.server = _Server((host, port), _SMTPHandler)
+        self.server.sink = self
+        self.echo = echo
+        self.messages = []
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def deliver(self, mail_from, rcpt_to, data):
+        message = email.message_from_bytes(data)
+        with self._lock:
+            self.messages.append({"from": mail_from, "to": rcpt_to, "message": message})
+        if self.echo:
+            print(f"From {mail_from} to {', '.join(rcpt_to)}: {message['Subject']}")
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local SMTP sink")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    args = parser.parse_args()
+    SMTPSink(args.host, args.port, echo=True).server.serve_forever()
@@ -0,0 +1,112 @@
+"""Per-organization change counters versioning the employee read endpoints.
+
+change_feed bumps an org's counter on every booking, workspace, schedule and
+visitor write. The counter lives in Redis so every worker sees the same
+value, and app/utils/conditional.py stamps ETags with it. Inside an app
+context bumps are coalesced: each org is bumped once when the request's
+response is built (or when a CLI command's context ends), so batched
+writes cost one Redis call rather than one per document. A missing counter
+is seeded from the clock rather than starting at zero, so a flushed Redis
+can never hand out a version an old ETag already carries.
+"""
+
+import time
+
+import redis
+from flask import g, has_app_context
+
+from app.extensions import redis_versions
+
+VERSION_KEY = "ORG_VERSION:{}"
+
+# ARGV: seed
+BUMP_SCRIPT = """
+local version = redis.call('INCR', KEYS[1])
+if version == 1 then
+    version = redis.call('INCRBY', KEYS[1], ARGV[1])
+end
+return version
+"""
+
+# ARGV: seed
+CURRENT_SCRIPT = """
+local version = redis.call('GET', KEYS[1])
+if not version then
+    redis.call('SET', KEYS[1], ARGV[1])
+    version = ARGV[1]
+end
+return version
+"""
+
+_scripts = {}
+# Called with (org_id, new_version) after each bump made by this process.
+_listeners = []
+
+
+def _script(source):
+    script = _scripts.get(source)
+    if script is None:
+        script = _scripts[source] = redis_versions.register_script(source)
+    return script
+
+
+def _seed():
+    # Microseconds: Lua numbers are doubles, so script results must stay
+    # below 2**53 to come back exact.
+    return time.time_ns() // 1000
+
+
+def current(org_id):
+    """The org's version, or None when Redis cannot be reached."""
+    try:
+        version = redis_versions.get(VERSION_KEY.format(org_id))
+        if version is None:
+            version = _script(CURRENT_SCRIPT)(
+                keys=[VERSION_KEY.format(org_id)], args=[_seed()]
+            )
+    except redis.RedisError as e:
+        print(f"Reading version of {org_id} failed: {e}")
+        return None
+    return int(version)
+
+
+def bump(org_id):
+    """Bump the org's version, once per app context when inside one."""
+    if has_app_context():
+        g.setdefault("versions_pending", set()).add(org_id)
+        return
+    _bump(org_id)
+
+
+def flush():
+    for org_id in g.pop("versions_pending", ()):
+        _bump(org_id)
+
+
+def init_app(app):
+    # After the view, so a client polling right after a write sees the new
+    # version; teardown covers requests that failed and CLI commands.
+    @app.after_request
+    def flush_versions(response):
+        flush()
+        return response
+
+    @app.teardown_appcontext
+    def flush_versions_on_teardown(exc):
+        flush()
+
+
+def on_bump(listener):
+    _listeners.append(listener)
+
+
+def _bump(org_id):
+    try:
+        version = _script(BUMP_SCRIPT)(
+            keys=[VERSION_KEY.format(org_id)], args=[_seed()]
+        )
+    except redis.RedisError as e:
+        print(f"Bumping version of {org_id} failed: {e}")
+        return
+    for listener in _listeners:
+        listener(org_id, int(version))
@@ -0,0 +1,80 @@
+"""Async read-only view of a MemoryClient, mirroring Firestore's AsyncClient.
+
+References and queries wrap their MemoryClient counterparts and read the
+same documents. Each read awaits the client's simulated round trip with
+asyncio.sleep instead of blocking, so concurrent reads overlap just as
+they do against Firestore.
+"""
+
+import asyncio
+
+
+class AsyncDocumentReference:
+    def __init__(self, client, reference):
+        self._client = client
+        self._reference = reference
+
+    @property
+    def id(self):
+        return self._reference.id
+
+    @property
+    def path(self):
+        return self._reference.path
+
+    def collection(self, name):
+        return AsyncCollectionReference(self._client, self._reference.collection(name))
+
+    async def get(self):
+        await self._client._round_trip()
+        return self._reference._snapshot()
+
+
+class AsyncQuery:
+    def __init__(self, client, query):
+        self._client = client
+        self._query = query
+
+    def where(self, field_path, op_string, value):
+        return AsyncQuery(self._client, self._query.where(field_path, op_string, value))
+
+    def order_by(self, field_path, **kwargs):
+        return AsyncQuery(self._client, self._query.order_by(field_path, **kwargs))
+
+    def limit(self, count):
+        return AsyncQuery(self._client, self._query.limit(count))
+
+    def start_after(self, cursor):
+        return AsyncQuery(self._client, self._query.start_after(cursor))
+
+    async def stream(self):
+        await self._client._round_trip()
+        for snapshot in self._query._snapshots():
+            yield snapshot
+
+    async def get(self):
+        return [snapshot async for snapshot in self.stream()]
+
+
+class AsyncCollectionReference(AsyncQuery):
+    @property
+    def id(self):
+        return self._query.id
+
+    def document(self, document_id=None):
+        return AsyncDocumentReference(self._client, self._query.document(document_id))
+
+
+class AsyncMemoryClient:
+    def __init__(self, client):
+        self._sync = client
+
+    async def _round_trip(self):
+        if self._sync.latency:
+            await asyncio.sleep(self._sync.latency)
+
+    def collection(self, name):
+        return AsyncCollectionReference(self, self._sync.collection(name))
+
+    def document(self, path):
+        return AsyncDocumentReference(self, self._sync.document(path))
@@ -0,0 +1,93 @@
+"""Async counterparts of the repository queries the async employee routes run.
+
+Queries are built exactly as in app/storage/repositories.py, but against
+get_async_db(), and they execute on the process I/O loop. Streams are
+collected into lists there. Calls are counted into the request metrics
+like the sync client's.
+"""
+
+from app.storage.repositories import (
+    BookingRepository,
+    WorkspaceRepository,
+    page_after,
+)
+from app.utils.db_utils import get_async_db
+from app.utils.io_loop import io_loop
+from app.utils.metrics import metrics
+
+
+async def _collect(query):
+    return [doc async for doc in query.stream()]
+
+
+class AsyncOrgCollectionRepository:
+    collection_name = None
+
+    def collection(self, org_id):
+        return (
+            get_async_db()
+            .collection("Organizations")
+            .document(org_id)
+            .collection(self.collection_name)
+        )
+
+    async def get(self, org_id, doc_id):
+        metrics.record("firestore_document_reads")
+        return await io_loop.run(self.collection(org_id).document(doc_id).get())
+
+    async def exists(self, org_id, doc_id):
+        return (await self.get(org_id, doc_id)).exists
+
+    async def _fetch(self, query):
+        metrics.record("firestore_queries")
+        docs = await io_loop.run(_collect(query))
+        metrics.record("firestore_streamed_documents", len(docs))
+        return docs
+
+    async def _stream(self, org_id, query, limit=None, after=None):
+        """Like OrgCollectionRepository._stream, returning a list."""
+        if after is not None:
+            query = page_after(query, after)
+        if limit is not None:
+            query = query.limit(limit)
+        return await self._fetch(query)
+
+
+class AsyncWorkspaceRepository(AsyncOrgCollectionRepository):
+    collection_name = WorkspaceRepository.collection_name
+
+    async def of_type(self, org_id, ws_type, limit=None, after=None):
+        query = self.collection(org_id).where("workspace_type", "==", ws_type)
+        return await self._stream(org_id, query, limit, after)
+
+
+class AsyncBookingRepository(AsyncOrgCollectionRepository):
+    collection_name = BookingRepository.collection_name
+
+    async def for_workspace(self, org_id, ws_id, date=None, limit=None, after=None):
+        query = self.collection(org_id).where("workspace_ID", "==", ws_id)
+        if date is not None:
+            query = query.where("date", "==", date)
+        return await self._stream(org_id, query, limit, after)
+
+    async def for_employee_between(self, org_id, emp_id, start_date, end_date):
+        query = (
+            self.collection(org_id)
+            .where("required_id", "==", emp_id)
+            .where("date", ">=", start_date)
+            .where("date", "<=", end_date)
+        )
+        return await self._fetch(query)
+
+    async def active_at(self, org_id, date, hhmm):
+        query = (
+            self.collection(org_id)
+            .where("date", "==", date)
+            .where("start_time", "<=", hhmm)
+        )
+        docs = await self._fetch(query)
+        return [doc for doc in docs if doc.get("end_time") >= hhmm]
+
+
+workspaces = AsyncWorkspaceRepository()
+bookings = AsyncBookingRepository()
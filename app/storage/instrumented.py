@@ -0,0 +1,141 @@
+"""Client wrapper that counts Firestore calls into app.utils.metrics.
+
+get_db() hands out an InstrumentedClient around whichever backend is
+configured. Collections, documents, queries and batches obtained through it
+are wrapped in turn, so every document get, query, streamed document and
+write is counted against the request that made it. Everything else is
+passed through to the wrapped object unchanged.
+"""
+
+from app.utils.metrics import metrics
+
+
+class _Proxy:
+    __slots__ = ("_target",)
+
+    def __init__(self, target):
+        self._target = target
+
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+
+def _unwrap(obj):
+    return obj._target if isinstance(obj, _Proxy) else obj
+
+
+class InstrumentedQuery(_Proxy):
+    __slots__ = ()
+
+    def _chain(self, method, *args, **kwargs):
+        return InstrumentedQuery(getattr(self._target, method)(*args, **kwargs))
+
+    def where(self, *args, **kwargs):
+        return self._chain("where", *args, **kwargs)
+
+    def order_by(self, *args, **kwargs):
+        return self._chain("order_by", *args, **kwargs)
+
+    def limit(self, *args, **kwargs):
+        return self._chain("limit", *args, **kwargs)
+
+    def start_after(self, *args, **kwargs):
+        return self._chain("start_after", *args, **kwargs)
+
+    def stream(self, *args, **kwargs):
+        metrics.record("firestore_queries")
+        streamed = 0
+        try:
+            for snapshot in self._target.stream(*args, **kwargs):
+                streamed += 1
+                yield snapshot
+        finally:
+            metrics.record("firestore_streamed_documents", streamed)
+
+    def get(self, *args, **kwargs):
+        return list(self.stream(*args, **kwargs))
+
+
+class InstrumentedCollection(InstrumentedQuery):
+    __slots__ = ()
+
+    def document(self, *args, **kwargs):
+        return InstrumentedDocument(self._target.document(*args, **kwargs))
+
+    def add(self, *args, **kwargs):
+        metrics.record("firestore_writes")
+        timestamp, ref = self._target.add(*args, **kwargs)
+        return timestamp, InstrumentedDocument(ref)
+
+    def list_documents(self, *args, **kwargs):
+        metrics.record("firestore_queries")
+        refs = [InstrumentedDocument(ref) for ref in self._target.list_documents()]
+        metrics.record("firestore_streamed_documents", len(refs))
+        return refs
+
+
+class InstrumentedDocument(_Proxy):
+    __slots__ = ()
+
+    def collection(self, *args, **kwargs):
+        return InstrumentedCollection(self._target.collection(*args, **kwargs))
+
+    def get(self, *args, **kwargs):
+        metrics.record("firestore_document_reads")
+        return self._target.get(*args, **kwargs)
+
+    def _write(self, method, *args, **kwargs):
+        metrics.record("firestore_writes")
+        return getattr(self._target, method)(*args, **kwargs)
+
+    def set(self, *args, **kwargs):
+        return self._write("set", *args, **kwargs)
+
+    def update(self, *args, **kwargs):
+        return self._write("update", *args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        return self._write("delete", *args, **kwargs)
+
+
+class InstrumentedBatch(_Proxy):
+    __slots__ = ("_writes",)
+
+    def __init__(self, target):
+        super().__init__(target)
+        self._writes = 0
+
+    def set(self, reference, *args, **kwargs):
+        self._writes += 1
+        return self._target.set(_unwrap(reference), *args, **kwargs)
+
+    def update(self, reference, *args, **kwargs):
+        self._writes += 1
+        return self._target.update(_unwrap(reference), *args, **kwargs)
+
+    def delete(self, reference, *args, **kwargs):
+        self._writes += 1
+        return self._target.delete(_unwrap(reference), *args, **kwargs)
+
+    def commit(self, *args, **kwargs):
+        metrics.record("firestore_writes", self._writes)
+        self._writes = 0
+        return self._target.commit(*args, **kwargs)
+
+
+class InstrumentedClient(_Proxy):
+    __slots__ = ()
+
+    def collection(self, *args, **kwargs):
+        return InstrumentedCollection(self._target.collection(*args, **kwargs))
+
+    def document(self, *args, **kwargs):
+        return InstrumentedDocument(self._target.document(*args, **kwargs))
+
+    def batch(self, *args, **kwargs):
+        return InstrumentedBatch(self._target.batch(*args, **kwargs))
+
+    def get_all(self, references, *args, **kwargs):
+        references = [_unwrap(reference) for reference in references]
+        metrics.record("firestore_document_reads", len(references))
+        return self._target.get_all(references, *args, **kwargs)
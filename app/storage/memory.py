@@ -0,0 +1,422 @@
+"""In-process stand-in for the subset of the Firestore client API used by the app.
+
+Documents live in plain dicts keyed by collection path, so the repositories in
+app/storage/repositories.py can run unchanged against either backend. Query
+semantics follow Firestore: filters on a missing field never match, range
+filters only match values of the same type class, and results are ordered by
+the explicit order_by fields, then any range-filtered field, then document id.
+
+`latency` adds a fixed sleep to every read and write, standing in for the
+Firestore round trip when benchmarking access patterns.
+"""
+
+import copy
+import functools
+import random
+import string
+import threading
+import time
+from datetime import datetime, timezone
+
+from app.utils.db_utils import SERVER_TIMESTAMP
+
+ASCENDING = "ASCENDING"
+DESCENDING = "DESCENDING"
+
+_AUTO_ID_CHARS = string.ascii_letters + string.digits
+_RANGE_OPS = {"<", "<=", ">", ">="}
+_DOCUMENT_ID = "__name__"
+_MISSING = object()
+
+
+def _auto_id():
+    return "".join(random.choices(_AUTO_ID_CHARS, k=20))
+
+
+def _type_rank(value):
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, datetime):
+        return 3
+    if isinstance(value, str):
+        return 4
+    if isinstance(value, bytes):
+        return 5
+    if isinstance(value, DocumentReference):
+        return 6
+    if isinstance(value, (list, tuple)):
+        return 8
+    return 9
+
+
+def _as_utc(value):
+    """Firestore stores naive datetimes as UTC and returns them aware."""
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _compare(a, b):
+    rank_a, rank_b = _type_rank(a), _type_rank(b)
+    if rank_a != rank_b:
+        return -1 if rank_a < rank_b else 1
+    if rank_a == 0:
+        return 0
+    if rank_a == 3:
+        a, b = _as_utc(a), _as_utc(b)
+    elif rank_a == 6:
+        a, b = a.path, b.path
+    elif rank_a == 8:
+        for x, y in zip(a, b):
+            c = _compare(x, y)
+            if c:
+                return c
+        a, b = len(a), len(b)
+    elif rank_a == 9:
+        a, b = sorted(a.items()), sorted(b.items())
+    return (a > b) - (a < b)
+
+
+def _get_field(data, field_path):
+    value = data
+    for part in field_path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _set_field(data, field_path, value):
+    parts = field_path.split(".")
+    for part in parts[:-1]:
+        data = data.setdefault(part, {})
+    data[parts[-1]] = value
+
+
+def _resolve_sentinels(value):
+    if value is SERVER_TIMESTAMP:
+        return datetime.now(timezone.utc)
+    if isinstance(value, dict):
+        return {k: _resolve_sentinels(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_resolve_sentinels(v) for v in value]
+    return _as_utc(value)
+
+
+def _deep_merge(target, updates):
+    for key, value in updates.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _deep_merge(target[key], value)
+        else:
+            target[key] = value
+
+
+def _matches(value, op, expected):
+    if value is _MISSING:
+        return False
+    value, expected = _as_utc(value), _as_utc(expected)
+    if op == "==":
+        return _type_rank(value) == _type_rank(expected) and value == expected
+    if op == "!=":
+        return value is not None and value != expected
+    if op in _RANGE_OPS:
+        if _type_rank(value) != _type_rank(expected):
+            return False
+        c = _compare(value, expected)
+        return {"<": c < 0, "<=": c <= 0, ">": c > 0, ">=": c >= 0}[op]
+    if op == "in":
+        return any(value == _as_utc(e) for e in expected)
+    if op == "not-in":
+        return value is not None and all(value != _as_utc(e) for e in expected)
+    if op == "array_contains":
+        return isinstance(value, list) and expected in value
+    if op == "array_contains_any":
+        return isinstance(value, list) and any(e in value for e in expected)
+    raise ValueError(f"Unsupported operator: {op}")
+
+
+class DocumentSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self._data = data
+
+    @property
+    def id(self):
+        return self.reference.id
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data)
+
+    def get(self, field_path):
+        value = _get_field(self._data or {}, field_path)
+        if value is _MISSING:
+            raise KeyError(field_path)
+        return copy.deepcopy(value)
+
+
+class DocumentReference:
+    def __init__(self, client, collection_path, doc_id):
+        self._client = client
+        self._collection_path = collection_path
+        self.id = doc_id
+
+    @property
+    def path(self):
+        return f"{self._collection_path}/{self.id}"
+
+    @property
+    def parent(self):
+        return CollectionReference(self._client, self._collection_path)
+
+    def collection(self, name):
+        return CollectionReference(self._client, f"{self.path}/{name}")
+
+    def _snapshot(self):
+        with self._client._lock:
+            data = self._client._docs(self._collection_path).get(self.id)
+            return DocumentSnapshot(self, copy.deepcopy(data))
+
+    def get(self):
+        self._client._round_trip()
+        return self._snapshot()
+
+    def set(self, data, merge=False):
+        self._client._round_trip()
+        self._set(data, merge)
+
+    def update(self, data):
+        self._client._round_trip()
+        self._update(data)
+
+    def delete(self):
+        self._client._round_trip()
+        self._delete()
+
+    def _set(self, data, merge=False):
+        data = _resolve_sentinels(copy.deepcopy(data))
+        with self._client._lock:
+            docs = self._client._docs(self._collection_path)
+            if merge and self.id in docs:
+                _deep_merge(docs[self.id], data)
+            else:
+                docs[self.id] = data
+
+    def _update(self, data):
+        with self._client._lock:
+            docs = self._client._docs(self._collection_path)
+            if self.id not in docs:
+                raise KeyError(f"No document to update: {self.path}")
+            for field_path, value in data.items():
+                _set_field(
+                    docs[self.id], field_path, _resolve_sentinels(copy.deepcopy(value))
+                )
+
+    def _delete(self):
+        with self._client._lock:
+            self._client._docs(self._collection_path).pop(self.id, None)
+
+
+class Query:
+    def __init__(self, client, collection_path, filters=(), orders=(), limit=None):
+        self._client = client
+        self._collection_path = collection_path
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._limit = limit
+        self._start_after = None
+
+    def _copy(self, **changes):
+        query = Query(
+            self._client,
+            self._collection_path,
+            changes.get("filters", self._filters),
+            changes.get("orders", self._orders),
+            changes.get("limit", self._limit),
+        )
+        query._start_after = changes.get("start_after", self._start_after)
+        return query
+
+    def where(self, field_path, op_string, value):
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path, direction=ASCENDING):
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def start_after(self, cursor):
+        # Firestore fails on a cursor snapshot of a missing document too.
+        if cursor is None or (
+            isinstance(cursor, DocumentSnapshot) and not cursor.exists
+        ):
+            raise TypeError("'NoneType' object does not support item assignment")
+        return self._copy(start_after=cursor)
+
+    def _effective_orders(self):
+        orders = list(self._orders)
+        ordered = {field for field, _ in orders}
+        for field, op, _ in self._filters:
+            if op in _RANGE_OPS and field not in ordered:
+                orders.append((field, ASCENDING))
+                ordered.add(field)
+        return orders
+
+    def _sort_key(self, orders, doc_id, data):
+        return [
+            doc_id if field == _DOCUMENT_ID else _get_field(data, field)
+            for field, _ in orders
+        ] + [doc_id]
+
+    def _compare_keys(self, orders, a, b):
+        for (_, direction), x, y in zip(orders, a, b):
+            c = _compare(x, y)
+            if c:
+                return -c if direction == DESCENDING else c
+        if len(a) > len(orders) and len(b) > len(orders):
+            return _compare(a[-1], b[-1])
+        return 0
+
+    def _cursor_key(self, orders):
+        cursor = self._start_after
+        if isinstance(cursor, DocumentSnapshot):
+            return self._sort_key(orders, cursor.id, cursor._data or {})
+        key = []
+        for field, _ in orders:
+            value = cursor.get(field)
+            if field == _DOCUMENT_ID and isinstance(value, DocumentReference):
+                value = value.id
+            key.append(value)
+        return key
+
+    def _snapshots(self):
+        """Matching snapshots, without the simulated round trip."""
+        orders = self._effective_orders()
+        with self._client._lock:
+            docs = self._client._docs(self._collection_path)
+            rows = []
+            for doc_id, data in docs.items():
+                if not all(
+                    _matches(_get_field(data, f), op, v) for f, op, v in self._filters
+                ):
+                    continue
+                if any(
+                    f != _DOCUMENT_ID and _get_field(data, f) is _MISSING
+                    for f, _ in orders
+                ):
+                    continue
+                rows.append(
+                    (self._sort_key(orders, doc_id, data), doc_id, copy.deepcopy(data))
+                )
+
+        cmp = functools.cmp_to_key(lambda a, b: self._compare_keys(orders, a, b))
+        rows.sort(key=lambda row: cmp(row[0]))
+        if self._start_after is not None:
+            cursor = self._cursor_key(orders)
+            rows = [r for r in rows if self._compare_keys(orders, r[0], cursor) > 0]
+        if self._limit is not None:
+            rows = rows[: self._limit]
+
+        return [
+            DocumentSnapshot(
+                DocumentReference(self._client, self._collection_path, doc_id), data
+            )
+            for _, doc_id, data in rows
+        ]
+
+    def stream(self):
+        self._client._round_trip()
+        yield from self._snapshots()
+
+    def get(self):
+        return list(self.stream())
+
+
+class CollectionReference(Query):
+    def __init__(self, client, path):
+        super().__init__(client, path)
+        self.path = path
+
+    @property
+    def id(self):
+        return self.path.rsplit("/", 1)[-1]
+
+    def document(self, document_id=None):
+        return DocumentReference(self._client, self.path, document_id or _auto_id())
+
+    def add(self, document_data, document_id=None):
+        ref = self.document(document_id)
+        ref.set(document_data)
+        return datetime.now(timezone.utc), ref
+
+    def list_documents(self):
+        with self._client._lock:
+            ids = list(self._client._docs(self.path))
+        return [self.document(doc_id) for doc_id in ids]
+
+
+class WriteBatch:
+    def __init__(self, client):
+        self._client = client
+        self._ops = []
+
+    def set(self, reference, document_data, merge=False):
+        # One round trip for the whole batch, taken in commit().
+        self._ops.append(lambda: reference._set(document_data, merge=merge))
+
+    def update(self, reference, field_updates):
+        self._ops.append(lambda: reference._update(field_updates))
+
+    def delete(self, reference):
+        self._ops.append(reference._delete)
+
+    def commit(self):
+        self._client._round_trip()
+        with self._client._lock:
+            for op in self._ops:
+                op()
+        self._ops = []
+
+    def __len__(self):
+        return len(self._ops)
+
+
+class MemoryClient:
+    def __init__(self, latency=0.0):
+        self.latency = latency  # seconds per simulated round trip
+        self._collections = {}
+        self._lock = threading.RLock()
+
+    def _round_trip(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _docs(self, collection_path):
+        return self._collections.setdefault(collection_path, {})
+
+    def collection(self, name):
+        return CollectionReference(self, name)
+
+    def document(self, path):
+        collection_path, doc_id = path.rsplit("/", 1)
+        return DocumentReference(self, collection_path, doc_id)
+
+    def batch(self):
+        return WriteBatch(self)
+
+    def get_all(self, references, field_paths=None):
+        self._round_trip()
+        for reference in references:
+            yield reference._snapshot()
+
+    def clear(self):
+        with self._lock:
+            self._collections.clear()
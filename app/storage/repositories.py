@@ -0,0 +1,279 @@
+"""Per-org collection access for the Firestore document model.
+
+Each repository wraps one collection under Organizations/{org_id} and names
+the queries the routes run against it. Queries return document snapshots
+(`.id`, `.exists`, `.to_dict()`) from whichever client get_db() selected, so
+the same code runs against Firestore and the in-memory stand-in.
+"""
+
+from app.config import Config
+from app.utils.db_utils import generate_emp_id, get_db, get_org_collection
+from app.utils.ttl_cache import TTLCache
+
+# Field path of the document id, Firestore's FieldPath.document_id().
+DOCUMENT_ID = "__name__"
+
+
+def page_after(query, doc_id):
+    """Continue `query` after `doc_id` in document id order.
+
+    The cursor is the id itself rather than a snapshot, so no read is spent
+    on it and it still works after the document was deleted.
+    """
+    return query.order_by(DOCUMENT_ID).start_after({DOCUMENT_ID: doc_id})
+
+
+class OrgCollectionRepository:
+    collection_name = None
+
+    def collection(self, org_id):
+        return get_org_collection(org_id, self.collection_name)
+
+    def get(self, org_id, doc_id):
+        return self.collection(org_id).document(doc_id).get()
+
+    def exists(self, org_id, doc_id):
+        return self.get(org_id, doc_id).exists
+
+    def new_id(self, org_id):
+        return self.collection(org_id).document().id
+
+    def set(self, org_id, doc_id, data, merge=False):
+        self.collection(org_id).document(doc_id).set(data, merge=merge)
+
+    def set_many(self, org_id, docs, merge=False):
+        """Write (doc_id, data) pairs in a single batch (at most 500)."""
+        collection = self.collection(org_id)
+        batch = get_db().batch()
+        for doc_id, data in docs:
+            batch.set(collection.document(doc_id), data, merge=merge)
+        batch.commit()
+
+    def existing_ids(self, org_id, doc_ids):
+        """The subset of `doc_ids` that exist, read in one batched get."""
+        collection = self.collection(org_id)
+        refs = [collection.document(doc_id) for doc_id in doc_ids]
+        return {doc.id for doc in get_db().get_all(refs) if doc.exists}
+
+    def add(self, org_id, data):
+        _, ref = self.collection(org_id).add(data)
+        return ref.id
+
+    def delete(self, org_id, doc_id):
+        self.collection(org_id).document(doc_id).delete()
+
+    def all(self, org_id):
+        return self.collection(org_id).stream()
+
+    def _stream(self, org_id, query, limit=None, after=None):
+        """Stream `query` in document id order, optionally after a doc id."""
+        if after is not None:
+            query = page_after(query, after)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.stream()
+
+
+class OrganizationRepository:
+    """The Organizations/{org_id} documents themselves."""
+
+    def document(self, org_id):
+        return get_db().collection("Organizations").document(org_id)
+
+    def get(self, org_id):
+        return self.document(org_id).get()
+
+    def set(self, org_id, data, merge=False):
+        self.document(org_id).set(data, merge=merge)
+
+
+class EmployeeRepository(OrgCollectionRepository):
+    collection_name = "Employee_data"
+
+    def __init__(self):
+        # Read-through cache of (org_id, email) -> emp_id; misses are not cached.
+        self._ids_by_email = TTLCache(
+            Config.EMP_ID_CACHE_TTL, Config.EMP_ID_CACHE_MAX_ENTRIES
+        )
+
+    def find_id_by_email(self, org_id, email):
+        emp_id = self._ids_by_email.get((org_id, email))
+        if emp_id is not None:
+            return emp_id
+
+        query = self.collection(org_id).where("email", "==", email).limit(1)
+        for doc in query.stream():
+            self._ids_by_email.set((org_id, email), doc.id)
+            return doc.id  # Firestore doc ID is the emp_id
+        return None
+
+    def set(self, org_id, doc_id, data, merge=False):
+        super().set(org_id, doc_id, data, merge=merge)
+        if "email" in data:
+            self.invalidate_email(org_id, data["email"])
+
+    def set_many(self, org_id, docs, merge=False):
+        super().set_many(org_id, docs, merge=merge)
+        for _, data in docs:
+            if "email" in data:
+                self.invalidate_email(org_id, data["email"])
+
+    def find_by_email(self, org_id, email):
+        emp_id = self.find_id_by_email(org_id, email)
+        if emp_id is None:
+            return None
+        doc = self.get(org_id, emp_id)
+        return doc if doc.exists else None
+
+    def invalidate_email(self, org_id, email):
+        self._ids_by_email.pop((org_id, email))
+
+    def ensure(self, org_id, email):
+        emp_id = self.find_id_by_email(org_id, email)
+        if emp_id:
+            return emp_id
+
+        emp_id = generate_emp_id(org_id)
+        self.set(
+            org_id,
+            emp_id,
+            {
+                "emp_ID": emp_id,
+                "email": email,
+                "name": email.split("@")[0],
+                "role": "employee",
+                "features_availed": [],  # Or set defaults here
+            },
+        )
+        return emp_id
+
+
+class TeamRepository(OrgCollectionRepository):
+    collection_name = "Team_data"
+
+
+class TeamMembershipRepository(OrgCollectionRepository):
+    collection_name = "Employee_team_correlation"
+
+
+class AttendanceRepository(OrgCollectionRepository):
+    collection_name = "Employee_attendance"
+
+    # (short, long) keys per date.weekday(). The API writes "mon".."sun";
+    # mark_wfh_tomorrow writes "mo".."su", which overrides the weekly plan.
+    day_keys = [
+        ("mo", "mon"),
+        ("tu", "tue"),
+        ("we", "wed"),
+        ("th", "thu"),
+        ("fr", "fri"),
+        ("sa", "sat"),
+        ("su", "sun"),
+    ]
+
+    @classmethod
+    def status_on(cls, data, weekday):
+        short_key, long_key = cls.day_keys[weekday]
+        return data.get(short_key) or data.get(long_key)
+
+
+class WorkspaceRepository(OrgCollectionRepository):
+    collection_name = "Workspace_data"
+
+    def of_type(self, org_id, ws_type, limit=None, after=None):
+        query = self.collection(org_id).where("workspace_type", "==", ws_type)
+        return self._stream(org_id, query, limit, after)
+
+
+class BookingRepository(OrgCollectionRepository):
+    collection_name = "Workspace_booking_data"
+
+    def for_employee(self, org_id, emp_id, limit=None, after=None):
+        query = self.collection(org_id).where("required_id", "==", emp_id)
+        return self._stream(org_id, query, limit, after)
+
+    def for_workspace(self, org_id, ws_id, date=None, limit=None, after=None):
+        query = self.collection(org_id).where("workspace_ID", "==", ws_id)
+        if date is not None:
+            query = query.where("date", "==", date)
+        return self._stream(org_id, query, limit, after)
+
+    def for_employee_between(self, org_id, emp_id, start_date, end_date):
+        query = (
+            self.collection(org_id)
+            .where("required_id", "==", emp_id)
+            .where("date", ">=", start_date)
+            .where("date", "<=", end_date)
+        )
+        return query.stream()
+
+    def on_date(self, org_id, date):
+        return self.collection(org_id).where("date", "==", date).stream()
+
+    def active_at(self, org_id, date, hhmm):
+        # Bounded to one day's partition; the end bound is checked in memory
+        # so the query needs only the (date, start_time) composite index.
+        docs = (
+            self.collection(org_id)
+            .where("date", "==", date)
+            .where("start_time", "<=", hhmm)
+            .stream()
+        )
+        return (doc for doc in docs if doc.get("end_time") >= hhmm)
+
+    def missing_date(self, org_id):
+        """Bookings written before bookings were partitioned by date."""
+        for doc in self.all(org_id):
+            if "date" not in doc.to_dict():
+                yield doc
+
+
+class ScheduleRepository(OrgCollectionRepository):
+    collection_name = "Scheduling_data"
+
+
+class VisitorRepository(OrgCollectionRepository):
+    collection_name = "Visitor_data"
+
+    # Passes issued by employees carry visit_date; visitors added through the
+    # API only carry their creation timestamp.
+    time_fields = ("visit_date", "timestamp")
+
+    def between(self, org_id, start, end):
+        """Visitors whose visit_date or timestamp is in [start, end)."""
+        seen = set()
+        for field in self.time_fields:
+            query = (
+                self.collection(org_id).where(field, ">=", start).where(field, "<", end)
+            )
+            for doc in query.stream():
+                if doc.id not in seen:
+                    seen.add(doc.id)
+                    yield doc
+
+
+class AnalyticsRollupRepository(OrgCollectionRepository):
+    """Precomputed utilization, one document per day plus "attendance"."""
+
+    collection_name = "Analytics_rollups"
+    attendance_doc_id = "attendance"
+
+    def between(self, org_id, start_date, end_date):
+        query = (
+            self.collection(org_id)
+            .where("date", ">=", start_date)
+            .where("date", "<=", end_date)
+        )
+        return query.stream()
+
+
+organizations = OrganizationRepository()
+employees = EmployeeRepository()
+teams = TeamRepository()
+team_memberships = TeamMembershipRepository()
+attendance = AttendanceRepository()
+workspaces = WorkspaceRepository()
+bookings = BookingRepository()
+schedules = ScheduleRepository()
+visitors = VisitorRepository()
+analytics_rollups = AnalyticsRollupRepository()
@@ -8,6 +8,8 @@ from flask_jwt_extended import (
 )
 from jwt import ExpiredSignatureError
 
+from app.services.entitlements import current_entitlements
+
 
 def jwt_required(func=None, **outer_kwargs):
     """
@@ -66,26 +68,37 @@ def jwt_required(func=None, **outer_kwargs):
     return decorator
 
 
-def requires_tier(required_tier):
+def requires_role(*roles):
+    """
+    Decorator to restrict a route to tokens whose role claim is one of
+    `roles`. Goes below jwt_required.
+    """
+
     def decorator(fn):
         @wraps(fn)
         def wrapper(*args, **kwargs):
-            if not g.db:
-                return jsonify({"msg": "Org DB not available"}), 500
+            role = get_jwt().get("role")
+            if role not in roles:
+                return jsonify({"msg": "Access denied. Employer role required."}), 403
+
+            return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
 
-            user_email = g.get("user_email") or g.get("identity")
-            user = g.db.execute(
-                "SELECT tier FROM employee_data WHERE email = %s", (user_email,)
-            ).fetchone()
 
-            if not user:
-                return jsonify({"msg": "User not found in org DB"}), 404
+def requires_tier(required_tier):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            tier = current_entitlements(get_jwt(), get_jwt_identity())["tier"]
 
-            if user["tier"] != required_tier:
+            if tier != required_tier:
                 return (
                     jsonify(
                         {
-                            "msg": f"Insufficient tier. Required: {required_tier}, You have: {user['tier']}"
+                            "msg": f"Insufficient tier. Required: {required_tier}, You have: {tier}"
                         }
                     ),
                     403,
@@ -101,7 +114,7 @@ def requires_tier(required_tier):
 def requires_tool(required_tool):
     """
     Decorator to ensure the logged-in user has access to a specific tool,
-    based on org-specific data stored in g.db.
+    based on the entitlements carried in their JWT claims.
     """
 
     def decorator(fn):
@@ -111,23 +124,7 @@ def requires_tool(required_tool):
             if not identity:
                 return jsonify({"msg": "Missing JWT identity"}), 401
 
-            if not g.get("db"):
-                return jsonify({"msg": "Org database not set"}), 500
-
-            # Assuming `employee_data` table exists in org-specific DB
-            try:
-                result = g.db.execute(
-                    "SELECT tools_access FROM employee_data WHERE email = :email",
-                    {"email": identity},
-                ).fetchone()
-            except Exception as e:
-                return jsonify({"msg": "Error querying org DB", "detail": str(e)}), 500
-
-            if not result:
-                return jsonify({"msg": "User not found in org DB"}), 404
-
-            tools_str = result[0] or ""
-            tools_list = tools_str.split("|")
+            tools_list = current_entitlements(get_jwt(), identity)["tools"]
 
             if required_tool not in tools_list:
                 return (
@@ -0,0 +1,160 @@
+import csv
+import io
+import json
+
+# Firestore accepts at most 500 writes per batch.
+BATCH_SIZE = 500
+# Per-row errors returned in a bulk response before the list is truncated.
+MAX_REPORTED_ERRORS = 1000
+
+
+class RowError(ValueError):
+    pass
+
+
+def iter_rows(stream, fmt):
+    """Yield (row_number, dict) from a CSV or NDJSON byte stream, line by line.
+
+    A body that stops decoding or parsing part way ends the rows with one
+    RowError for the first row not read, so the rows before it are still
+    imported and the failure is reported like any other row.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    rows = _csv_rows(text) if fmt == "csv" else _ndjson_rows(text)
+    row_number = 0
+    try:
+        for row_number, row in rows:
+            yield row_number, row
+    except (UnicodeDecodeError, csv.Error) as e:
+        message = f"Unreadable file from this row on: {e}"
+        yield row_number + 1, RowError(message)
+
+
+def _csv_rows(text):
+    return enumerate(csv.DictReader(text), start=1)
+
+
+def _ndjson_rows(text):
+    for row_number, line in enumerate(text, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, RowError(f"Invalid JSON: {e.msg}")
+            continue
+        if not isinstance(row, dict):
+            yield row_number, RowError("Each line must be a JSON object")
+            continue
+        yield row_number, row
+
+
+def request_format(req):
+    fmt = req.args.get("format")
+    if fmt:
+        return fmt.lower()
+    content_type = (req.mimetype or "").lower()
+    if content_type in ("text/csv", "application/csv"):
+        return "csv"
+    return "ndjson"
+
+
+def split_list(value):
+    """CSV cells carry lists as "a|b|c"; NDJSON rows may carry real lists."""
+    if value is None or value == "":
+        return []
+    if isinstance(value, list):
+        return value
+    return [v.strip() for v in str(value).split("|") if v.strip()]
+
+
+def require(row, *fields):
+    missing = [f for f in fields if not row.get(f)]
+    if missing:
+        raise RowError(f"Missing required field(s): {', '.join(missing)}")
+    return [row[f] for f in fields]
+
+
+class BulkImport:
+    """Validate rows with `build` and write them to `repository` in batches.
+
+    `build(row)` returns (doc_id, data) or raises RowError. `after_write` is
+    called with the (doc_id, data) pairs of every committed batch. With
+    `new_id(data)`, which returns a fresh (doc_id, data), generated ids are
+    checked against the collection with one batched read per batch, and rows
+    whose id is taken are re-keyed instead of overwriting a document.
+    """
+
+    def __init__(self, repository, org_id, build, after_write=None, new_id=None):
+        self.repository = repository
+        self.org_id = org_id
+        self.build = build
+        self.after_write = after_write
+        self.new_id = new_id
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self.ids = []
+
+    def _error(self, row_number, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "error": message})
+
+    def _free_ids(self, pending):
+        taken = self.repository.existing_ids(
+            self.org_id, [doc_id for _, doc_id, _ in pending]
+        )
+        while taken:
+            rekeyed = []
+            for i, (row_number, doc_id, data) in enumerate(pending):
+                if doc_id in taken:
+                    doc_id, data = self.new_id(data)
+                    pending[i] = (row_number, doc_id, data)
+                    rekeyed.append(doc_id)
+            taken = self.repository.existing_ids(self.org_id, rekeyed)
+
+    def _flush(self, pending):
+        if not pending:
+            return
+        try:
+            if self.new_id:
+                self._free_ids(pending)
+            docs = [(doc_id, data) for _, doc_id, data in pending]
+            self.repository.set_many(self.org_id, docs)
+        except Exception as e:
+            for row_number, _, _ in pending:
+                self._error(row_number, f"Write failed: {e}")
+            return
+        self.imported += len(docs)
+        self.ids.extend(doc_id for doc_id, _ in docs)
+        if self.after_write:
+            self.after_write(docs)
+
+    def run(self, rows):
+        pending = []
+        for row_number, row in rows:
+            if isinstance(row, RowError):
+                self._error(row_number, str(row))
+                continue
+            try:
+                doc_id, data = self.build(row)
+            except RowError as e:
+                self._error(row_number, str(e))
+                continue
+            pending.append((row_number, doc_id, data))
+            if len(pending) >= BATCH_SIZE:
+                self._flush(pending)
+                pending = []
+        self._flush(pending)
+        return self
+
+    def summary(self):
+        return {
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "ids": self.ids,
+        }
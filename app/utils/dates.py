@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta, timezone
+
+DATE_FORMAT = "%Y-%m-%d"
+TIME_FORMAT = "%H:%M"
+
+
+def today_str():
+    return datetime.utcnow().strftime(DATE_FORMAT)
+
+
+def tomorrow_str():
+    return (datetime.utcnow() + timedelta(days=1)).strftime(DATE_FORMAT)
+
+
+def parse_date(date_str):
+    return datetime.strptime(date_str, DATE_FORMAT).date()
+
+
+def booking_timestamps(date_str, start_time, end_time):
+    """Full UTC datetimes for a booking's "HH:MM" window on `date_str`.
+
+    Raises ValueError when the date or either time is malformed.
+    """
+    day = parse_date(date_str)
+    start = datetime.strptime(start_time, TIME_FORMAT).time()
+    end = datetime.strptime(end_time, TIME_FORMAT).time()
+    return (
+        datetime.combine(day, start, tzinfo=timezone.utc),
+        datetime.combine(day, end, tzinfo=timezone.utc),
+    )
@@ -1,51 +1,88 @@
+import os
 import random
 import string
-from app.firebase_init import db
+import threading
+from app.config import Config
 
+try:
+    from google.cloud.firestore import SERVER_TIMESTAMP
+except ImportError:
+    # Only the in-memory backend is usable without the Firestore SDK.
+    SERVER_TIMESTAMP = object()
 
-def generate_emp_id(org_code: str):
-    suffix = "".join(random.choices(string.ascii_uppercase + string.digits, k=4))
-    return f"{org_code}-{suffix}"
+_db = None
+_db_pid = None
+_db_lock = threading.Lock()
+_async_db = None
+_async_db_pid = None
+_async_db_lock = threading.Lock()
 
 
-def get_org_collection(org_id: str, collection_name: str):
-    return db.collection("Organizations").document(org_id).collection(collection_name)
+def _create_db(previous):
+    if Config.STORAGE_BACKEND == "memory":
+        if previous is not None:
+            # A forked child keeps its own copy of the parent's documents.
+            return previous
+        from app.storage.memory import MemoryClient
 
+        db = MemoryClient(latency=Config.MEMORY_STORE_LATENCY_MS / 1000)
+    else:
+        from app.firebase_init import create_client
 
-def get_emp_id_from_firestore(org_id, email):
-    employees_ref = (
-        db.collection("Organizations").document(org_id).collection("Employee_data")
-    )
+        db = create_client()
+    if Config.METRICS_ENABLED:
+        from app.storage.instrumented import InstrumentedClient
 
-    # Query Firestore for employee with matching email
-    query = employees_ref.where("email", "==", email).limit(1).stream()
+        db = InstrumentedClient(db)
+    return db
 
-    for doc in query:
-        return doc.id  # Firestore doc ID is your emp_id
 
-    return None  # Not found
+def get_db():
+    """Return the document store client selected by Config.STORAGE_BACKEND.
 
+    Created on first use in each process: Firestore's gRPC channels must not
+    be shared with workers forked after the app was loaded.
+    """
+    global _db, _db_pid
+    if _db_pid != os.getpid():
+        with _db_lock:
+            if _db_pid != os.getpid():
+                _db = _create_db(_db)
+                _db_pid = os.getpid()
+    return _db
 
-def ensure_employee_in_firestore(email, org_id):
-    employees_ref = (
-        db.collection("Organizations").document(org_id).collection("Employee_data")
-    )
 
-    # Check if employee already exists
-    existing_query = employees_ref.where("email", "==", email).limit(1).stream()
-    for doc in existing_query:
-        return doc.id  # Already exists, return emp_id
-
-    # Create a new employee document
-    emp_id = generate_emp_id(org_id)
-    employees_ref.document(emp_id).set(
-        {
-            "emp_ID": emp_id,
-            "email": email,
-            "name": email.split("@")[0],
-            "role": "employee",
-            "features_availed": [],  # Or set defaults here
-        }
-    )
+def get_async_db():
+    """Async counterpart of get_db() for the async employee routes.
+
+    Its calls must run on app.utils.io_loop, which owns the client.
+    """
+    global _async_db, _async_db_pid
+    if _async_db_pid != os.getpid():
+        with _async_db_lock:
+            if _async_db_pid != os.getpid():
+                if Config.STORAGE_BACKEND == "memory":
+                    from app.storage.async_memory import AsyncMemoryClient
+
+                    # Reads the documents the sync client writes.
+                    _async_db = AsyncMemoryClient(get_db())
+                else:
+                    from app.firebase_init import create_async_client
 
-    return emp_id
+                    _async_db = create_async_client()
+                _async_db_pid = os.getpid()
+    return _async_db
+
+
+def generate_emp_id(org_code: str):
+    suffix = "".join(random.choices(string.ascii_uppercase + string.digits, k=4))
+    return f"{org_code}-{suffix}"
+
+
+def get_org_collection(org_id: str, collection_name: str):
+    return (
+        get_db()
+        .collection("Organizations")
+        .document(org_id)
+        .collection(collection_name)
+    )
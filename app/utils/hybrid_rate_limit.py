@@ -0,0 +1,172 @@
+"""Default rate limit enforced from in-process token buckets.
+
+Flask-Limiter charges one Redis round trip per request for the global
+default limit. In "hybrid" mode that limit is instead checked against a
+token bucket per client held in the worker, and the hits each worker
+accepted are pushed to Redis in one pipeline every `sync_interval`
+seconds. The pipeline returns the window totals across all workers, and
+whatever other workers consumed is taken out of the local bucket.
+
+A worker never holds more than `max_drift` unreported hits for a key: the
+hit that reaches it wakes the sync thread early. So the cluster-wide
+overshoot is bounded by workers * max_drift plus what arrives during one
+round trip. Routes in `skip_blueprints` (the auth blueprint, which keeps
+Flask-Limiter's per-request Redis accounting) are not checked here.
+"""
+
+import os
+import threading
+import time
+
+import redis
+from flask import jsonify, request
+from limits import parse
+
+KEY_PREFIX = "HYBRID_RL"
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated", "window", "pending", "own", "others")
+
+    def __init__(self, capacity, now, window):
+        self.tokens = float(capacity)
+        self.updated = now
+        self.window = window
+        self.pending = 0  # hits accepted here, not yet sent to Redis
+        self.own = 0  # hits this worker reported for `window`
+        self.others = 0  # hits other workers reported for `window`
+
+
+class HybridRateLimiter:
+    def __init__(self, limit, key_func, sync_interval, max_drift, pool):
+        item = parse(limit)
+        self.capacity = item.amount
+        self.period = item.get_expiry()
+        self.rate = self.capacity / self.period  # tokens per second
+        self.key_func = key_func
+        self.sync_interval = sync_interval
+        self.max_drift = max_drift
+        self._pool = pool
+        self._client = None
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pid = None
+
+    def init_app(self, app, is_enabled, skip_blueprints=("auth",)):
+        @app.before_request
+        def enforce_default_limit():
+            if not is_enabled() or request.endpoint in (None, "static"):
+                return None
+            if request.blueprint in skip_blueprints:
+                return None
+            allowed, retry_after = self.hit(self.key_func())
+            if allowed:
+                return None
+            response = jsonify({"msg": "Too many requests"})
+            response.headers["Retry-After"] = str(max(1, int(retry_after + 0.999)))
+            return response, 429
+
+    def _window(self):
+        return int(time.time() // self.period)
+
+    def hit(self, key):
+        """Take one token for `key`; returns (allowed, seconds until one frees)."""
+        self.ensure_started()
+        now = time.monotonic()
+        window = self._window()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = _Bucket(self.capacity, now, window)
+            if bucket.window != window:
+                bucket.window, bucket.own, bucket.others = window, 0, 0
+            bucket.tokens = min(
+                self.capacity, bucket.tokens + (now - bucket.updated) * self.rate
+            )
+            bucket.updated = now
+            if bucket.tokens < 1:
+                return False, (1 - bucket.tokens) / self.rate
+            bucket.tokens -= 1
+            bucket.pending += 1
+            drifted = bucket.pending >= self.max_drift
+        if drifted:
+            self._wake.set()
+        return True, 0.0
+
+    def ensure_started(self):
+        # Threads do not survive fork, so each worker process starts its own.
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._buckets.clear()
+            threading.Thread(
+                target=self._run, name="hybrid-rate-limit", daemon=True
+            ).start()
+
+    def sync(self):
+        """Report pending hits to Redis and charge other workers' hits locally."""
+        with self._lock:
+            batch = []
+            for key, bucket in self._buckets.items():
+                if bucket.pending:
+                    batch.append((key, bucket.window, bucket.pending))
+                    bucket.own += bucket.pending
+                    bucket.pending = 0
+        if not batch:
+            return
+
+        if self._client is None:
+            self._client = redis.Redis(connection_pool=self._pool)
+        pipe = self._client.pipeline(transaction=False)
+        for key, window, hits in batch:
+            redis_key = f"{KEY_PREFIX}:{key}:{window}"
+            pipe.incrby(redis_key, hits)
+            pipe.expire(redis_key, 2 * self.period)
+        try:
+            results = pipe.execute()
+        except Exception:
+            # Keep the hits so they are reported on the next attempt.
+            with self._lock:
+                for key, window, hits in batch:
+                    bucket = self._buckets.get(key)
+                    if bucket is not None and bucket.window == window:
+                        bucket.own -= hits
+                        bucket.pending += hits
+            raise
+
+        with self._lock:
+            for (key, window, _), total in zip(batch, results[::2]):
+                bucket = self._buckets.get(key)
+                if bucket is None or bucket.window != window:
+                    continue
+                others = int(total) - bucket.own
+                if others > bucket.others:
+                    bucket.tokens -= others - bucket.others
+                    bucket.others = others
+
+    def _prune(self):
+        # Full buckets with nothing to report carry no state worth keeping.
+        now = time.monotonic()
+        with self._lock:
+            idle = [
+                key
+                for key, bucket in self._buckets.items()
+                if not bucket.pending and now - bucket.updated >= self.period
+            ]
+            for key in idle:
+                del self._buckets[key]
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.sync_interval)
+            self._wake.clear()
+            try:
+                self.sync()
+                self._prune()
+            except Exception as e:
+                print(f"Hybrid rate limit sync failed: {e}")
+                time.sleep(self.sync_interval)
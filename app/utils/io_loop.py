@@ -0,0 +1,39 @@
+"""One asyncio event loop per process for async document store calls.
+
+Flask runs each async view in an event loop of its own, but async
+Firestore clients are bound to the loop they first ran on. So the clients
+live on this long-lived loop in a daemon thread. Views hand coroutines to
+`run()` and await the result, and the requests in flight on the worker's
+threads share the loop's connections.
+"""
+
+import asyncio
+import os
+import threading
+
+
+class IOLoop:
+    def __init__(self):
+        self._loop = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def loop(self):
+        # Threads do not survive fork, so each worker process starts its own.
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._loop = asyncio.new_event_loop()
+                    threading.Thread(
+                        target=self._loop.run_forever, name="io-loop", daemon=True
+                    ).start()
+                    self._pid = os.getpid()
+        return self._loop
+
+    async def run(self, coro):
+        """Run `coro` on the I/O loop and await its result from any loop."""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop())
+        return await asyncio.wrap_future(future)
+
+
+io_loop = IOLoop()
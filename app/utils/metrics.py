@@ -0,0 +1,187 @@
+"""Request latency histograms and per-request backend call counts.
+
+Every request is timed from before_request until its response is closed,
+so streamed (NDJSON) bodies are included, and filed under its blueprint
+and endpoint. Firestore and Redis calls made while serving it are counted
+into the request through `record()`; calls made outside a request (the
+rollup writer, CLI commands) are filed under the "background" endpoint.
+`render()` writes everything in the Prometheus text exposition format.
+"""
+
+import threading
+import time
+from collections import Counter
+
+from flask import g, has_request_context, request
+
+PREFIX = "synergy"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Calls per request; a route whose reads grow with its result size shows up
+# in the upper buckets.
+CALL_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# Backend calls counted per request: name -> help text
+CALL_KINDS = {
+    "firestore_document_reads": "Single-document Firestore reads.",
+    "firestore_queries": "Firestore queries and collection scans started.",
+    "firestore_streamed_documents": "Documents returned by Firestore queries.",
+    "firestore_writes": "Firestore document writes, including batched writes.",
+    "redis_commands": "Redis commands sent, including pipelined ones.",
+}
+BACKGROUND = ("", "background")
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+def _number(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency = {}  # (blueprint, endpoint, method) -> Histogram
+        self._responses = Counter()  # (blueprint, endpoint, method, status)
+        self._calls = Counter()  # (blueprint, endpoint, kind) -> total
+        self._calls_per_request = {}  # (blueprint, endpoint, kind) -> Histogram
+
+    def init_app(self, app):
+        @app.before_request
+        def start_request_metrics():
+            g.metrics_started = time.perf_counter()
+            g.metrics_calls = Counter()
+
+        @app.after_request
+        def finish_request_metrics(response):
+            started = g.get("metrics_started")
+            if started is None:
+                return response
+            route = (request.blueprint or "", request.endpoint or "unmatched")
+            method, status = request.method, response.status_code
+            calls = g.metrics_calls
+            response.call_on_close(
+                lambda: self._finish(
+                    route, method, status, time.perf_counter() - started, calls
+                )
+            )
+            return response
+
+    def record(self, kind, count=1):
+        if has_request_context():
+            calls = g.get("metrics_calls")
+            if calls is not None:
+                calls[kind] += count
+                return
+        with self._lock:
+            self._calls[BACKGROUND + (kind,)] += count
+
+    def _finish(self, route, method, status, seconds, calls):
+        with self._lock:
+            key = route + (method,)
+            latency = self._latency.get(key)
+            if latency is None:
+                latency = self._latency[key] = Histogram(LATENCY_BUCKETS)
+            latency.observe(seconds)
+            self._responses[key + (status,)] += 1
+            for kind in CALL_KINDS:
+                key = route + (kind,)
+                histogram = self._calls_per_request.get(key)
+                if histogram is None:
+                    histogram = self._calls_per_request[key] = Histogram(CALL_BUCKETS)
+                histogram.observe(calls[kind])
+                self._calls[key] += calls[kind]
+
+    def render(self, extra=()):
+        """Prometheus text format; `extra` yields further (name, type, help, samples)."""
+        with self._lock:
+            latency = sorted(
+                (key, list(hist.cumulative()), hist.sum, hist.count)
+                for key, hist in self._latency.items()
+            )
+            responses = sorted(self._responses.items())
+            calls = sorted(self._calls.items())
+            per_request = sorted(
+                (key, list(hist.cumulative()), hist.sum, hist.count)
+                for key, hist in self._calls_per_request.items()
+            )
+
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+
+        def histogram(name, labels, buckets, total, count):
+            for bound, cumulative in buckets:
+                le = _labels(**labels, le=_number(float(bound)))
+                lines.append(f"{PREFIX}_{name}_bucket{{{le}}} {cumulative}")
+            le = _labels(**labels, le="+Inf")
+            lines.append(f"{PREFIX}_{name}_bucket{{{le}}} {count}")
+            lines.append(f"{PREFIX}_{name}_sum{{{_labels(**labels)}}} {_number(total)}")
+            lines.append(f"{PREFIX}_{name}_count{{{_labels(**labels)}}} {count}")
+
+        family("request_duration_seconds", "histogram", "Request latency by route.")
+        for (blueprint, endpoint, method), buckets, total, count in latency:
+            labels = {"blueprint": blueprint, "endpoint": endpoint, "method": method}
+            histogram("request_duration_seconds", labels, buckets, total, count)
+
+        family("responses_total", "counter", "Responses by route and status.")
+        for (blueprint, endpoint, method, status), count in responses:
+            labels = _labels(
+                blueprint=blueprint, endpoint=endpoint, method=method, status=status
+            )
+            lines.append(f"{PREFIX}_responses_total{{{labels}}} {count}")
+
+        for kind, help_text in CALL_KINDS.items():
+            family(f"{kind}_total", "counter", help_text)
+            for (blueprint, endpoint, k), count in calls:
+                if k == kind:
+                    labels = _labels(blueprint=blueprint, endpoint=endpoint)
+                    lines.append(f"{PREFIX}_{kind}_total{{{labels}}} {count}")
+
+            family(f"{kind}_per_request", "histogram", help_text + " Per request.")
+            for (blueprint, endpoint, k), buckets, total, count in per_request:
+                if k == kind:
+                    labels = {"blueprint": blueprint, "endpoint": endpoint}
+                    histogram(f"{kind}_per_request", labels, buckets, total, count)
+
+        for name, kind, help_text, samples in extra:
+            family(name, kind, help_text)
+            for labels, value in samples:
+                suffix = f"{{{_labels(**labels)}}}" if labels else ""
+                lines.append(f"{PREFIX}_{name}{suffix} {_number(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
@@ -1,54 +1,108 @@
+"""Registration state kept in one Redis hash per email.
+
+REG:{email} holds the pending OTP and its expiry, the org_id and a verified
+flag. Each step of the flow is one Lua script, so every step is a single
+round trip and cannot interleave with another request for the same email.
+"""
+
 import random
 from app.extensions import redis_otp
 from app.config import Config
 
+REGISTRATION_KEY = "REG:{}"
+
+# ARGV: otp, org_id, otp_ttl, registration_ttl
+SAVE_SCRIPT = """
+local now = tonumber(redis.call('TIME')[1])
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], 'otp', ARGV[1], 'otp_expires', now + tonumber(ARGV[3]),
+    'org_id', ARGV[2], 'attempts', 0, 'verified', 0)
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[4]))
+return 1
+"""
+
+# ARGV: submitted otp, registration_ttl, max_attempts
+VERIFY_SCRIPT = """
+local state = redis.call('HMGET', KEYS[1], 'otp', 'otp_expires')
+if not state[1] then
+    return 'expired'
+end
+local now = tonumber(redis.call('TIME')[1])
+if now > tonumber(state[2]) then
+    redis.call('HDEL', KEYS[1], 'otp', 'otp_expires')
+    return 'expired'
+end
+if state[1] ~= ARGV[1] then
+    if redis.call('HINCRBY', KEYS[1], 'attempts', 1) >= tonumber(ARGV[3]) then
+        redis.call('DEL', KEYS[1])
+    end
+    return 'invalid'
+end
+redis.call('HDEL', KEYS[1], 'otp', 'otp_expires')
+redis.call('HSET', KEYS[1], 'verified', 1)
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]))
+return 'valid'
+"""
+
+CONSUME_SCRIPT = """
+local state = redis.call('HMGET', KEYS[1], 'verified', 'org_id')
+if state[1] ~= '1' then
+    return {'unverified', false}
+end
+redis.call('DEL', KEYS[1])
+return {'ok', state[2]}
+"""
+
+_scripts = {}
+
+
+def _script(source):
+    script = _scripts.get(source)
+    if script is None:
+        script = _scripts[source] = redis_otp.register_script(source)
+    return script
+
+
+def _decode(value):
+    if isinstance(value, bytes):
+        return value.decode()
+    return value
+
 
 def generate_otp(length=6):
     return "".join(str(random.randint(0, 9)) for _ in range(length))
 
 
-def save_otp(email, otp, ttl=Config.OTP_TTL):
-    redis_otp.setex(f"OTP:{email}", ttl, otp)
+def save_registration(email, org_id, otp):
+    """Replace any pending registration for `email` with a fresh OTP."""
+    _script(SAVE_SCRIPT)(
+        keys=[REGISTRATION_KEY.format(email)],
+        args=[otp, org_id, Config.OTP_TTL, Config.REGISTRATION_TTL],
+    )
 
 
 def verify_otp(email, submitted_otp):
-    key = f"OTP:{email}"
-    stored_otp = redis_otp.get(key)
-
-    if stored_otp is None:
-        return "expired"
-
-    if isinstance(stored_otp, bytes):
-        stored_otp = stored_otp.decode()
-
-    if stored_otp != submitted_otp:
-        return "invalid"
-
-    redis_otp.delete(key)
-    redis_otp.setex(f"VERIFIED:{email}", Config.OTP_TTL, "true")
-    return "valid"
-
-
-def is_email_verified(email):
-    return redis_otp.get(f"VERIFIED:{email}") is not None
-
-
-def clear_email_verification(email):
-    redis_otp.delete(f"VERIFIED:{email}")
+    """Returns "valid", "invalid" or "expired"; a valid OTP is consumed."""
+    result = _script(VERIFY_SCRIPT)(
+        keys=[REGISTRATION_KEY.format(email)],
+        args=[submitted_otp, Config.REGISTRATION_TTL, Config.OTP_MAX_ATTEMPTS],
+    )
+    return _decode(result)
 
 
-def save_org_id(email, org_id, ttl=Config.OTP_TTL):
-    redis_otp.setex(f"ORG_ID:{email}", 300, org_id)
+def is_verified(email):
+    """Whether `email` has a verified registration pending, in one HGET.
 
+    Only a cheap early check: consume_registration() remains the atomic one.
+    """
+    return _decode(redis_otp.hget(REGISTRATION_KEY.format(email), "verified")) == "1"
 
-def get_org_id(email):
-    org_id = redis_otp.get(f"ORG_ID:{email}")
-    if org_id is None:
-        return None
-    if isinstance(org_id, bytes):
-        org_id = org_id.decode()
-    return org_id
 
+def consume_registration(email):
+    """Consume a verified registration.
 
-def clear_org_id(email):
-    redis_otp.delete(f"ORG_ID:{email}")
+    Returns ("ok", org_id), or ("unverified", None) when the email was never
+    verified or its registration has expired.
+    """
+    status, org_id = _script(CONSUME_SCRIPT)(keys=[REGISTRATION_KEY.format(email)])
+    return _decode(status), _decode(org_id)
@@ -0,0 +1,66 @@
+import base64
+import binascii
+
+from flask import Response, current_app, stream_with_context
+
+MAX_PAGE_SIZE = 500
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def encode_cursor(doc_id):
+    return base64.urlsafe_b64encode(doc_id.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.b64decode(cursor.encode("ascii"), altchars=b"-_", validate=True)
+        return raw.decode("utf-8")
+    except (binascii.Error, UnicodeError, ValueError):
+        raise PaginationError("Invalid cursor")
+
+
+def page_args(args):
+    """Read ?limit= and ?cursor=; returns (limit, after_doc_id), either may be None."""
+    limit = args.get("limit")
+    cursor = args.get("cursor")
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise PaginationError("limit must be an integer")
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise PaginationError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    elif cursor is not None:
+        limit = MAX_PAGE_SIZE
+    return limit, decode_cursor(cursor) if cursor else None
+
+
+def fetch_page(docs, limit):
+    """Split a stream queried with limit + 1 into (page, next_cursor)."""
+    page = []
+    for doc in docs:
+        if len(page) == limit:
+            return page, encode_cursor(page[-1].id)
+        page.append(doc)
+    return page, None
+
+
+def wants_ndjson(req):
+    if req.args.get("stream") == "ndjson":
+        return True
+    return req.accept_mimetypes.best == NDJSON_MIMETYPE
+
+
+def ndjson_response(rows):
+    """Stream one JSON document per line as rows are produced."""
+    dumps = current_app.json.dumps
+
+    def generate():
+        for row in rows:
+            yield dumps(row) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
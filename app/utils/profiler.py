@@ -0,0 +1,150 @@
+"""Opt-in sampling profiler that writes collapsed stacks per route.
+
+A request is profiled when it is picked by PROFILE_SAMPLE_RATE or carries
+a PROFILE_HEADER token signed with SECRET_KEY (see `flask profile-token`).
+While any request is being profiled, a sampler thread records the stack of
+each profiled request thread every PROFILE_INTERVAL seconds, until the
+response is closed, so streamed bodies and JSON encoding are included.
+The samples are appended to PROFILE_DIR/<endpoint>.collapsed as lines of
+"outer;...;inner count". That is the input format of flamegraph.pl,
+speedscope and inferno. Requests that are not profiled pay for one random()
+call and one header lookup.
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import g, request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+TOKEN_SALT = "request-profile"
+
+
+def _frame_name(code):
+    filename = code.co_filename
+    for prefix in sys.path:
+        if prefix and filename.startswith(prefix):
+            filename = filename[len(prefix) :].lstrip(os.sep)
+            break
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    def __init__(self, interval):
+        self.interval = interval
+        self._targets = {}  # thread id -> Counter of collapsed stacks
+        self._names = {}  # code object -> frame name
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pid = None
+
+    def _ensure_started(self):
+        # Threads do not survive fork, so each worker process starts its own.
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._targets.clear()
+        threading.Thread(target=self._run, name="stack-sampler", daemon=True).start()
+
+    def start(self, thread_id):
+        with self._lock:
+            self._ensure_started()
+            self._targets[thread_id] = Counter()
+        self._wake.set()
+
+    def stop(self, thread_id):
+        with self._lock:
+            return self._targets.pop(thread_id, Counter())
+
+    def _collapse(self, frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            name = self._names.get(code)
+            if name is None:
+                name = self._names[code] = _frame_name(code)
+            names.append(name)
+            frame = frame.f_back
+        names.reverse()
+        return ";".join(names)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                idle = not self._targets
+                if idle:
+                    self._wake.clear()
+            if idle:
+                self._wake.wait()
+                continue
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, stacks in self._targets.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[self._collapse(frame)] += 1
+            del frames
+            time.sleep(self.interval)
+
+
+class RequestProfiler:
+    def __init__(self, sample_rate, interval, output_dir, header, secret_key):
+        self.sample_rate = sample_rate
+        self.output_dir = output_dir
+        self.header = header
+        self._sampler = StackSampler(interval)
+        self._serializer = URLSafeTimedSerializer(secret_key) if secret_key else None
+        self._write_lock = threading.Lock()
+
+    def token(self):
+        """A header value that profiles the requests carrying it."""
+        if self.header is None or self._serializer is None:
+            raise RuntimeError(
+                "Profile tokens need PROFILE_HEADER_ENABLED and SECRET_KEY"
+            )
+        return self._serializer.dumps("profile", salt=TOKEN_SALT)
+
+    def _requested(self, max_age):
+        token = request.headers.get(self.header)
+        if self._serializer is None:
+            return False
+        try:
+            self._serializer.loads(token, salt=TOKEN_SALT, max_age=max_age)
+        except BadSignature:
+            return False
+        return True
+
+    def init_app(self, app, token_max_age):
+        @app.before_request
+        def start_profile():
+            sampled = self.sample_rate and random.random() < self.sample_rate
+            if sampled or (
+                self.header is not None
+                and self.header in request.headers
+                and self._requested(token_max_age)
+            ):
+                g.profile_thread = threading.get_ident()
+                self._sampler.start(g.profile_thread)
+
+        @app.after_request
+        def finish_profile(response):
+            thread_id = g.get("profile_thread")
+            if thread_id is not None:
+                endpoint = request.endpoint or "unmatched"
+                response.call_on_close(lambda: self._finish(thread_id, endpoint))
+            return response
+
+    def _finish(self, thread_id, endpoint):
+        stacks = self._sampler.stop(thread_id)
+        if not stacks:
+            return
+        lines = "".join(f"{stack} {count}\n" for stack, count in stacks.items())
+        path = os.path.join(self.output_dir, f"{endpoint}.collapsed")
+        with self._write_lock:
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(path, "a") as f:
+                f.write(lines)
@@ -1,5 +1,22 @@
-from flask import request
+from flask import g, request
 from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt import PyJWTError
+
+
+def request_identity():
+    """JWT identity of the current request, decoded at most once per request.
+
+    Every stacked @limiter.limit calls its key function; they all share this.
+    """
+    if "rate_limit_identity" not in g:
+        try:
+            verify_jwt_in_request(optional=True)
+            identity = get_jwt_identity()
+        except (JWTExtendedException, PyJWTError):
+            identity = None
+        g.rate_limit_identity = identity or "unauthenticated"
+    return g.rate_limit_identity
 
 
 def ip_only():
@@ -7,13 +24,9 @@ def ip_only():
 
 
 def email_only():
-    verify_jwt_in_request(optional=True)
-    email = get_jwt_identity() or "unauthenticated"
-    return f"{email}"
+    return f"{request_identity()}"
 
 
 def ip_email_combined():
     ip = request.remote_addr or "unknown"
-    verify_jwt_in_request(optional=True)
-    email = get_jwt_identity() or "unauthenticated"
-    return f"{ip}:{email}"
+    return f"{ip}:{request_identity()}"
@@ -0,0 +1,165 @@
+"""Process-wide Redis connection pools, one per logical database.
+
+The limiter, the JWT blacklist and the OTP store each select a different
+Redis DB, and a connection is bound to the DB it selected, so the registry
+hands out one sized BlockingConnectionPool per DB instead of a pool per
+client. Idle connections are health-checked before reuse, callers wait up
+to REDIS_POOL_TIMEOUT for a free connection instead of opening more, and
+every command and pool checkout is counted for the metrics endpoint.
+"""
+
+import threading
+import time
+from collections import Counter
+
+import redis
+
+from app.config import Config
+from app.utils.metrics import metrics
+
+
+class RedisMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.commands = Counter()  # (db, command) -> count
+        self.checkouts = Counter()  # db -> connections handed out
+        self.wait_seconds = Counter()  # db -> time spent waiting for one
+        self.timeouts = Counter()  # db -> checkouts that gave up
+
+    def record_command(self, db, name):
+        with self._lock:
+            self.commands[(db, name)] += 1
+
+    def record_checkout(self, db, waited):
+        with self._lock:
+            self.checkouts[db] += 1
+            self.wait_seconds[db] += waited
+
+    def record_timeout(self, db):
+        with self._lock:
+            self.timeouts[db] += 1
+
+
+redis_metrics = RedisMetrics()
+
+
+def _command_name(args):
+    name = args[0] if args else "UNKNOWN"
+    if isinstance(name, bytes):
+        name = name.decode("ascii", "replace")
+    # Multi-word commands such as "CLIENT SETNAME" arrive as one string.
+    return str(name).split(" ", 1)[0].upper()
+
+
+class _CountingMixin:
+    def send_command(self, *args, **kwargs):
+        redis_metrics.record_command(self.db, _command_name(args))
+        metrics.record("redis_commands")
+        return super().send_command(*args, **kwargs)
+
+    def pack_commands(self, commands):
+        # Pipelines and transactions send pre-packed batches.
+        for args in commands:
+            redis_metrics.record_command(self.db, _command_name(args))
+        metrics.record("redis_commands", len(commands))
+        return super().pack_commands(commands)
+
+
+class CountingConnection(_CountingMixin, redis.Connection):
+    pass
+
+
+class CountingSSLConnection(_CountingMixin, redis.SSLConnection):
+    pass
+
+
+class CountingUnixConnection(_CountingMixin, redis.UnixDomainSocketConnection):
+    pass
+
+
+_COUNTING_CLASSES = {
+    redis.Connection: CountingConnection,
+    redis.SSLConnection: CountingSSLConnection,
+    redis.UnixDomainSocketConnection: CountingUnixConnection,
+}
+
+
+class InstrumentedPool(redis.BlockingConnectionPool):
+    def __init__(self, *args, **kwargs):
+        self._in_use_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+        self.db = self.connection_kwargs.get("db", 0)
+
+    def get_connection(self, *args, **kwargs):
+        started = time.monotonic()
+        try:
+            connection = super().get_connection(*args, **kwargs)
+        except redis.ConnectionError:
+            redis_metrics.record_timeout(self.db)
+            raise
+        redis_metrics.record_checkout(self.db, time.monotonic() - started)
+        with self._in_use_lock:
+            self.in_use += 1
+        return connection
+
+    def release(self, connection):
+        with self._in_use_lock:
+            self.in_use -= 1
+        super().release(connection)
+
+    def reset(self):
+        super().reset()
+        self.in_use = 0
+
+
+class RedisPools:
+    def __init__(self):
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def get(self, db):
+        pool = self._pools.get(db)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(db)
+                if pool is None:
+                    pool = self._pools[db] = self._create(db)
+        return pool
+
+    def _create(self, db):
+        pool = InstrumentedPool.from_url(
+            Config.REDIS_URL,
+            db=db,
+            max_connections=Config.REDIS_MAX_CONNECTIONS,
+            timeout=Config.REDIS_POOL_TIMEOUT,
+            health_check_interval=Config.REDIS_HEALTH_CHECK_INTERVAL,
+            socket_timeout=Config.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=Config.REDIS_SOCKET_TIMEOUT,
+        )
+        pool.connection_class = _COUNTING_CLASSES.get(
+            pool.connection_class, pool.connection_class
+        )
+        return pool
+
+    def stats(self):
+        return {
+            db: {
+                "max_connections": pool.max_connections,
+                "in_use": pool.in_use,
+                "checkouts": redis_metrics.checkouts[db],
+                "wait_seconds": redis_metrics.wait_seconds[db],
+                "timeouts": redis_metrics.timeouts[db],
+            }
+            for db, pool in sorted(self._pools.items())
+        }
+
+
+redis_pools = RedisPools()
+
+
+class PooledRedis(redis.Redis):
+    """Redis client for FlaskRedis that draws from the shared pool of its DB."""
+
+    @classmethod
+    def from_url(cls, url, db=0, **kwargs):
+        return cls(connection_pool=redis_pools.get(db), **kwargs)
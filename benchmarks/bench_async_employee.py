@@ -0,0 +1,90 @@
+"""Latency of the concurrent-read employee routes against the sync ones.
+
+Both blueprints are served from one process over the same seeded data,
+on the in-memory document store with --rtt-ms of simulated latency per
+call. That stands in for the Firestore round trip the async routes
+overlap within a request; requests still run one per thread either way.
+Reports p50/p99 per route and mode as JSON.
+
+    python -m benchmarks.bench_async_employee --rtt-ms 5 --requests 200
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+
+from benchmarks import local_app
+from benchmarks.bench_endpoints import measure
+
+ROUTES = ("get_workstation", "check_workspace_availability", "my_calendar")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rtt-ms", type=float, default=5.0)
+    parser.add_argument("--employees", type=int, default=500)
+    parser.add_argument("--workspaces", type=int, default=300)
+    parser.add_argument("--bookings", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the JSON report here.")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Seeding writes in batches, so the simulated latency costs it little.
+        sync_app = local_app.start(tmp, MEMORY_STORE_LATENCY_MS=args.rtt_ms)
+        from app import create_app
+        from app.config import Config
+        from app.utils.dates import today_str
+
+        Config.EMPLOYEE_ASYNC = True
+        async_app = create_app()
+        org = local_app.seed_org(
+            "BENCH", args.employees, args.workspaces, args.bookings
+        )
+        tokens = [
+            local_app.access_token(sync_app, org, i) for i in range(len(org["emails"]))
+        ]
+
+        ws_ids = list(org["workspace_types"])
+        today = today_str()
+
+        def request_for(route):
+            headers = {"Authorization": f"Bearer {random.choice(tokens)}"}
+            if route == "get_workstation":
+                path = "/employee/get_workstation?type=work_station"
+            elif route == "check_workspace_availability":
+                ws_id = random.choice(ws_ids)
+                path = (
+                    "/employee/check_workspace_availability"
+                    f"?workspace_ID={ws_id}&date={today}"
+                )
+            else:
+                path = f"/employee/my_calendar?from={today}"
+            return "GET", path, {"headers": headers}
+
+        results = {}
+        for route in ROUTES:
+            results[route] = {}
+            for mode, app in (("sync", sync_app), ("async", async_app)):
+                results[route][mode] = measure(
+                    app, lambda: request_for(route), args.requests, args.threads
+                )
+            results[route]["p50_speedup"] = (
+                results[route]["sync"]["p50_ms"] / results[route]["async"]["p50_ms"]
+            )
+
+    report = {"params": vars(args), "cpu_count": os.cpu_count(), "results": results}
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""Throughput and p50/p99 latency of the main endpoints, end to end.
+
+Runs create_app() against the in-memory document store, fakeredis and a
+temporary SQLite users.db (see benchmarks/local_app.py). It seeds
+synthetic organizations and drives each endpoint through the Flask test
+client. Every request comes from its own client address, so the global
+default rate limit never trips and per-client limits are still exercised.
+Results are written as JSON so runs can be compared across commits.
+
+    python -m benchmarks.bench_endpoints --orgs 2 --employees 500 \\
+        --workspaces 300 --bookings 2000 --requests 500 --output bench.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import local_app
+
+_addresses = itertools.count(1)
+
+
+def _client_address():
+    n = next(_addresses)
+    return f"10.{(n >> 16) & 255}.{(n >> 8) & 255}.{n & 255}"
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(app, make_request, n_requests, threads):
+    """Issue `n_requests` calls of make_request() -> (method, path, kwargs)."""
+
+    def one(_):
+        method, path, kwargs = make_request()
+        client = app.test_client()
+        started = time.perf_counter()
+        response = client.open(
+            path,
+            method=method,
+            environ_base={"REMOTE_ADDR": _client_address()},
+            **kwargs,
+        )
+        response.get_data()
+        response.close()
+        return time.perf_counter() - started, response.status_code
+
+    start = time.perf_counter()
+    if threads <= 1:
+        samples = [one(i) for i in range(n_requests)]
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            samples = list(pool.map(one, range(n_requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(seconds for seconds, _ in samples)
+    statuses = {}
+    for _, status in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "requests": n_requests,
+        "seconds": elapsed,
+        "per_second": n_requests / elapsed,
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+        "max_ms": latencies[-1] * 1000,
+        "statuses": statuses,
+    }
+
+
+def scenarios(app, orgs, tokens):
+    """name -> make_request() for every benchmarked endpoint."""
+    from app.utils.dates import today_str
+    from app.utils.enums import WorkspaceType
+
+    today = today_str()
+    stations = {
+        org["org_id"]: [
+            ws_id
+            for ws_id, ws_type in org["workspace_types"].items()
+            if ws_type == WorkspaceType.WORK_STATION.value
+        ]
+        for org in orgs
+    }
+    counter = itertools.count()
+
+    def employee():
+        org = random.choice(orgs)
+        index = random.randrange(len(org["emails"]))
+        return org, {"Authorization": f"Bearer {tokens[org['org_id']][index]}"}
+
+    def employer():
+        org = random.choice(orgs)
+        return org, {"Authorization": f"Bearer {tokens[org['org_id']][0]}"}
+
+    def slot():
+        hour = random.randint(7, 20)
+        return f"{hour:02d}:00", f"{hour + random.randint(1, 3):02d}:00"
+
+    def login():
+        org = random.choice(orgs)
+        body = {"email": random.choice(org["emails"]), "password": local_app.PASSWORD}
+        return "POST", "/auth/login", {"json": body}
+
+    def book_workspace():
+        org, headers = employee()
+        start, end = slot()
+        body = {
+            "workspace_ID": random.choice(stations[org["org_id"]]),
+            "start_time": start,
+            "end_time": end,
+            "date": today,
+        }
+        return "POST", "/employee/book_workspace", {"json": body, "headers": headers}
+
+    def type_occupancy():
+        _, headers = employee()
+        path = "/employee/get_workstation_type_occupancy"
+        return "GET", path, {"headers": headers}
+
+    def add_employee():
+        _, headers = employer()
+        n = next(counter)
+        body = {
+            "email": f"bench{n}@example.com",
+            "name": f"Bench {n}",
+            "role": "employee",
+            "features_availed": [],
+        }
+        return "POST", "/api/add_employee", {"json": body, "headers": headers}
+
+    def add_workspace():
+        _, headers = employer()
+        body = {"workspace_type": WorkspaceType.WORK_STATION.value}
+        return "POST", "/api/add_workspace", {"json": body, "headers": headers}
+
+    def add_attendance():
+        org, headers = employer()
+        body = {
+            "emp_ID": f"{org['org_id']}-E{random.randrange(len(org['emails']))}",
+            **{day: "office" for day in ("mon", "tue", "wed", "thu", "fri")},
+        }
+        return "POST", "/api/add_attendance", {"json": body, "headers": headers}
+
+    def add_visitor():
+        org, headers = employer()
+        body = {
+            "emp_ID": f"{org['org_id']}-E0",
+            "visitor_name": "Visitor",
+            "visitor_email": "visitor@example.com",
+            "visitor_img": "",
+            "time_allocated_start": "10:00",
+            "time_allocated_end": "11:00",
+            "time_utilized_start": "10:05",
+            "time_utilized_end": "10:55",
+        }
+        return "POST", "/api/add_visitor", {"json": body, "headers": headers}
+
+    def api_book_workspace():
+        org, headers = employer()
+        start, end = slot()
+        body = {
+            "workspace_ID": random.choice(stations[org["org_id"]]),
+            "required_id": random.choice(org["emails"]),
+            "start_time": start,
+            "end_time": end,
+            "purpose": "benchmark",
+            "date": today,
+        }
+        return "POST", "/api/book_workspace", {"json": body, "headers": headers}
+
+    return {
+        "auth_login": login,
+        "employee_book_workspace": book_workspace,
+        "employee_get_workstation_type_occupancy": type_occupancy,
+        "api_add_employee": add_employee,
+        "api_add_workspace": add_workspace,
+        "api_add_attendance": add_attendance,
+        "api_add_visitor": add_visitor,
+        "api_book_workspace": api_book_workspace,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orgs", type=int, default=2)
+    parser.add_argument("--employees", type=int, default=500)
+    parser.add_argument("--workspaces", type=int, default=300)
+    parser.add_argument("--bookings", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument(
+        "--login-requests",
+        type=int,
+        default=50,
+        help="Logins are dominated by bcrypt, so they get their own count.",
+    )
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--only", nargs="*", help="Scenario names to run.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the JSON report here.")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = local_app.start(tmp)
+        started = time.perf_counter()
+        orgs = [
+            local_app.seed_org(
+                f"BENCH{i}", args.employees, args.workspaces, args.bookings
+            )
+            for i in range(args.orgs)
+        ]
+        seed_seconds = time.perf_counter() - started
+        tokens = {
+            org["org_id"]: [
+                local_app.access_token(app, org, i) for i in range(len(org["emails"]))
+            ]
+            for org in orgs
+        }
+
+        results = {}
+        for name, make_request in scenarios(app, orgs, tokens).items():
+            if args.only and name not in args.only:
+                continue
+            n = args.login_requests if name == "auth_login" else args.requests
+            results[name] = measure(app, make_request, n, args.threads)
+
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "params": vars(args),
+        "seed_seconds": seed_seconds,
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
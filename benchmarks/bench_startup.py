@@ -0,0 +1,111 @@
+"""Cold-start cost of the app: import, create_app() and the first request.
+
+Each run is a fresh interpreter on the in-memory document store, timing
+`import app`, `create_app()` and one request through the full hook chain.
+One extra run under `-X importtime` lists the slowest top-level imports.
+The report is JSON. The exit status is 1 when the median of import plus
+create_app() exceeds --budget seconds, so a regression fails CI.
+
+    python -m benchmarks.bench_startup --runs 5 --budget 1.5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+DEFAULT_BUDGET_SECONDS = 1.5
+
+CHILD = """
+import json, os, sys, time
+sys.path.insert(0, os.getcwd())
+from benchmarks import local_env
+local_env.configure(USERS_DB_FILE=sys.argv[1])
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+app.test_client().get("/employee/my_bookings").close()
+served = time.perf_counter()
+print(json.dumps({
+    "import_seconds": imported - started,
+    "create_app_seconds": created - imported,
+    "first_request_seconds": served - created,
+    "modules": len(sys.modules),
+}))
+"""
+
+
+def run_child(users_db, importtime=False):
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", CHILD, users_db]
+    result = subprocess.run(command, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def slowest_imports(importtime_log, limit, max_depth=2):
+    """Slowest imports by cumulative time, from -X importtime output.
+
+    Only modules at most `max_depth` levels below a top-level import are
+    ranked, which names the app modules and the packages they pull in.
+    """
+    ranked = []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        indent = len(name) - len(name.lstrip(" "))
+        depth = (indent - 1) // 2
+        if not 1 <= depth <= max_depth or not cumulative.strip().isdigit():
+            continue
+        ranked.append((int(cumulative) / 1e6, depth, name.strip()))
+    ranked.sort(reverse=True)
+    return [
+        {"module": name, "depth": depth, "seconds": seconds}
+        for seconds, depth, name in ranked[:limit]
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_SECONDS)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output", help="Also write the JSON report here.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        users_db = os.path.join(tmp, "users.db")
+        runs = [run_child(users_db)[0] for _ in range(args.runs)]
+        _, importtime_log = run_child(users_db, importtime=True)
+
+    summary = {
+        key: statistics.median(run[key] for run in runs)
+        for key in ("import_seconds", "create_app_seconds", "first_request_seconds")
+    }
+    startup = summary["import_seconds"] + summary["create_app_seconds"]
+    report = {
+        "python": sys.version.split()[0],
+        "runs": runs,
+        "median": summary,
+        "startup_seconds": startup,
+        "budget_seconds": args.budget,
+        "within_budget": startup <= args.budget,
+        "slowest_imports": slowest_imports(importtime_log, args.top),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+    sys.exit(0 if report["within_budget"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Lookup throughput of the SQLite user store, before and after pooling.
+
+Compares the original connect-per-call lookup against the pooled WAL-mode
+ConnectionManager in app/models/user.py, single-threaded and with a pool of
+threads issuing concurrent lookups.
+
+    python -m benchmarks.bench_user_store --users 5000 --lookups 20000 --threads 8
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import local_env
+
+
+def legacy_get_user_by_email(db_file, email):
+    with sqlite3.connect(db_file) as conn:
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM users WHERE email = ?", (email,))
+        row = cursor.fetchone()
+        return dict(row) if row else None
+
+
+def seed(db_file, n_users):
+    with sqlite3.connect(db_file) as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS users (
+                email TEXT PRIMARY KEY,
+                hashed_password TEXT NOT NULL,
+                org_id TEXT NOT NULL DEFAULT ''
+            )
+        """)
+        conn.executemany(
+            "INSERT OR IGNORE INTO users VALUES (?, ?, ?)",
+            ((f"user{i}@example.com", "x" * 60, "ORG") for i in range(n_users)),
+        )
+    return [f"user{i}@example.com" for i in range(n_users)]
+
+
+def measure(lookup, emails, n_lookups, threads):
+    sample = [random.choice(emails) for _ in range(n_lookups)]
+    start = time.perf_counter()
+    if threads <= 1:
+        for email in sample:
+            lookup(email)
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(lookup, sample, chunksize=256))
+    elapsed = time.perf_counter() - start
+    return {"lookups": n_lookups, "seconds": elapsed, "per_second": n_lookups / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "users.db")
+        local_env.configure(USERS_DB_FILE=db_file)
+        emails = seed(db_file, args.users)
+
+        from app.models import user
+
+        results = {}
+        for threads in (1, args.threads):
+            results[f"legacy_threads_{threads}"] = measure(
+                lambda e: legacy_get_user_by_email(db_file, e),
+                emails,
+                args.lookups,
+                threads,
+            )
+            results[f"pooled_threads_{threads}"] = measure(
+                user.get_user_by_email, emails, args.lookups, threads
+            )
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""create_app() against local stand-ins, and synthetic organizations to load.
+
+`start()` points the app at the in-memory document store, a temporary
+SQLite users.db and an in-process fakeredis server. Every Redis DB pool is
+repointed at fakeredis, so the limiter, the blacklist, the OTP store and
+the org change counters still go through their pools and Lua scripts.
+`seed_org()` writes employees, workspaces, bookings and login users
+straight through the repositories.
+
+fakeredis and lupa come from requirements-dev.txt.
+"""
+
+import os
+import random
+from datetime import datetime
+
+from benchmarks import local_env
+
+PASSWORD = "benchmark-password"
+# Share of seeded workspaces per type; the rest are discussion rooms.
+WORK_STATION_SHARE = 0.7
+HOT_SEAT_SHARE = 0.2
+SEED_BATCH = 500
+
+
+def start(tmp_dir, **env):
+    """Configure the environment, install fakeredis and return create_app()."""
+    local_env.configure(
+        STORAGE_BACKEND="memory",
+        USERS_DB_FILE=os.path.join(tmp_dir, "users.db"),
+        **env,
+    )
+    import fakeredis
+
+    from app.config import Config
+    from app.utils.redis_pools import redis_pools
+
+    server = fakeredis.FakeServer()
+    for db in (
+        Config.REDIS_DB_LIMITER,
+        Config.REDIS_DB_BLACKLIST,
+        Config.REDIS_DB_OTP,
+        Config.REDIS_DB_VERSIONS,
+    ):
+        # No connection has been opened yet, so the pools can be repointed.
+        pool = redis_pools.get(db)
+        pool.connection_class = fakeredis.FakeConnection
+        pool.connection_kwargs = {"server": server, "db": db}
+
+    from app import create_app
+    from app.models import user
+
+    user.init_db()
+    return create_app()
+
+
+def _batches(rows):
+    for i in range(0, len(rows), SEED_BATCH):
+        yield rows[i : i + SEED_BATCH]
+
+
+def seed_org(org_id, n_employees, n_workspaces, n_bookings, date_str=None):
+    """Seed one organization; returns its emails, workspace ids and employer."""
+    from app.models import user
+    from app.services.hashing import hashing_pool
+    from app.storage.repositories import (
+        bookings,
+        employees,
+        organizations,
+        workspaces,
+    )
+    from app.utils.dates import TIME_FORMAT, booking_timestamps, today_str
+    from app.utils.enums import WorkspaceType
+
+    date_str = date_str or today_str()
+    organizations.set(org_id, {"name": org_id, "tier": "pro"})
+
+    emails = [f"user{i}@{org_id.lower()}.example.com" for i in range(n_employees)]
+    employee_rows = [
+        (
+            f"{org_id}-E{i}",
+            {
+                "emp_ID": f"{org_id}-E{i}",
+                "email": email,
+                "name": f"User {i}",
+                "role": "employer" if i == 0 else "employee",
+                "features_availed": ["analytics", "heatmaps"],
+            },
+        )
+        for i, email in enumerate(emails)
+    ]
+    for batch in _batches(employee_rows):
+        employees.set_many(org_id, batch)
+
+    n_stations = int(n_workspaces * WORK_STATION_SHARE)
+    n_hot_seats = int(n_workspaces * HOT_SEAT_SHARE)
+    workspace_types = {}
+    for i in range(n_workspaces):
+        if i < n_stations:
+            ws_type = WorkspaceType.WORK_STATION
+        elif i < n_stations + n_hot_seats:
+            ws_type = WorkspaceType.HOT_SEAT
+        else:
+            ws_type = WorkspaceType.DISCUSSION_ROOM
+        workspace_types[f"{org_id}-W{i}"] = ws_type.value
+    for batch in _batches(list(workspace_types.items())):
+        workspaces.set_many(
+            org_id,
+            [
+                (ws_id, {"workspace_ID": ws_id, "workspace_type": ws_type})
+                for ws_id, ws_type in batch
+            ],
+        )
+
+    booking_rows = []
+    ws_ids = list(workspace_types)
+    for i in range(n_bookings if ws_ids and emails else 0):
+        start_hour = random.randint(7, 18)
+        start_at, end_at = booking_timestamps(
+            date_str,
+            f"{start_hour:02d}:00",
+            f"{min(start_hour + random.randint(1, 4), 23):02d}:00",
+        )
+        booking_rows.append(
+            (
+                f"{org_id}-B{i}",
+                {
+                    "workspace_ID": random.choice(ws_ids),
+                    "required_id": random.choice(emails),
+                    "start_time": start_at.strftime(TIME_FORMAT),
+                    "end_time": end_at.strftime(TIME_FORMAT),
+                    "purpose": "benchmark",
+                    "date": date_str,
+                    "start_at": start_at,
+                    "end_at": end_at,
+                    "timestamp": datetime.utcnow(),
+                },
+            )
+        )
+    for batch in _batches(booking_rows):
+        bookings.set_many(org_id, batch)
+
+    # One bcrypt hash shared by every seeded user keeps seeding fast.
+    hashed = hashing_pool.hash_password(PASSWORD)
+    conn = user.connections.writer()
+    with conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO users (email, hashed_password, org_id) "
+            "VALUES (?, ?, ?)",
+            [(email, hashed, org_id) for email in emails],
+        )
+    return {
+        "org_id": org_id,
+        "emails": emails,
+        "employer": emails[0] if emails else None,
+        "workspace_types": workspace_types,
+    }
+
+
+def access_token(app, org, index):
+    """Access token for the org's `index`-th employee, as /auth/login issues it."""
+    from flask_jwt_extended import create_access_token
+
+    from app.routes.auth import token_claims
+
+    email = org["emails"][index]
+    role = "employer" if index == 0 else "employee"
+    emp_id = f"{org['org_id']}-E{index}"
+    with app.app_context():
+        claims = token_claims(email, org["org_id"], role, emp_id)
+        return create_access_token(identity=email, additional_claims=claims)
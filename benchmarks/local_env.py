@@ -0,0 +1,24 @@
+"""Environment defaults that let the app package import without real services.
+
+Must be applied before anything under `app` is imported, since Config and
+several modules read the environment at import time.
+"""
+
+import os
+
+DEFAULTS = {
+    "STORAGE_BACKEND": "memory",
+    "REDIS_URL": "redis://localhost:6379",
+    "SECRET_KEY": "benchmark-secret",
+    "JWT_SECRET_KEY": "benchmark-jwt-secret-key-0123456789",
+    "SALT": "benchmark-salt",
+    "SELF_URL": "http://localhost:5000",
+    "FRONTEND_URL": "http://localhost:3000",
+}
+
+
+def configure(**overrides):
+    for key, value in DEFAULTS.items():
+        os.environ.setdefault(key, value)
+    for key, value in overrides.items():
+        os.environ[key] = str(value)